@@ -1,22 +1,48 @@
 import asyncio
+import os
 import random
 import psutil
 import socket
-from datetime import datetime
+import time
+from collections import deque
+from pathlib import Path
 from typing import Dict, List
 import logging
 
+from agent.energy_model import CarbonIntensityTable, EnergyModel
+from agent.records import MetricSample
+from config.settings import get_settings
+
 logger = logging.getLogger(__name__)
 
+root_dir = Path(__file__).parent.parent
+
+CARBON_INTENSITY_PATH = str(root_dir / "config" / "carbon_intensity.csv")
+
 class MetricsAgent:
-    def __init__(self):
+    def __init__(self, carbon_table_path: str = CARBON_INTENSITY_PATH,
+                 batch_size: int = None, calibration_interval: float = 300.0):
         self.services = []
-        self.metrics_history = []
+        # When set, services are scraped batch_size at a time with one round trip per batch
+        self.batch_size = batch_size
+        # Last 1000 samples as slotted records; dicts only at the API boundary
+        self.metrics_history = deque(maxlen=1000)
+        
+        # Regions missing from the table use cloud.energy_data.carbon_intensity_kg_per_kwh
+        default_intensity = get_settings().energy.carbon_intensity
+        carbon_table = CarbonIntensityTable(default_intensity)
+        if os.path.exists(carbon_table_path):
+            carbon_table = CarbonIntensityTable.from_csv(carbon_table_path, default_intensity)
+        self.energy_model = EnergyModel(carbon_table)
+        # Measured power is folded in every sweep; curves are refit every calibration_interval s
+        self.calibration_interval = calibration_interval
+        self.last_calibration = time.monotonic()
     
     async def initialize(self):
         """Initialize the metrics agent"""
         logger.info("📊 Initializing Metrics Agent...")
         self.services = self.discover_services()
+        self.energy_model.register(self.services)
         logger.info(f"✅ Discovered {len(self.services)} services")
         return True
     
@@ -30,7 +56,8 @@ class MetricsAgent:
                 'type': 'backend',
                 'endpoint': 'http://user-service:8080',
                 'criticality': 'high',
-                'energy_profile': 'medium'
+                'energy_profile': 'medium',
+                'region': 'us-west-2'
             },
             {
                 'id': 'payment-service-001',
@@ -38,7 +65,8 @@ class MetricsAgent:
                 'type': 'backend',
                 'endpoint': 'http://payment-service:8081',
                 'criticality': 'critical',
-                'energy_profile': 'high'
+                'energy_profile': 'high',
+                'region': 'us-west-2'
             },
             {
                 'id': 'auth-service-001',
@@ -46,7 +74,8 @@ class MetricsAgent:
                 'type': 'security',
                 'endpoint': 'http://auth-service:8082',
                 'criticality': 'high',
-                'energy_profile': 'low'
+                'energy_profile': 'low',
+                'region': 'eu-west-1'
             },
             {
                 'id': 'database-service-001',
@@ -54,7 +83,8 @@ class MetricsAgent:
                 'type': 'database',
                 'endpoint': 'http://database:5432',
                 'criticality': 'critical',
-                'energy_profile': 'high'
+                'energy_profile': 'high',
+                'region': 'eu-west-1'
             },
             {
                 'id': 'cache-service-001',
@@ -62,40 +92,64 @@ class MetricsAgent:
                 'type': 'cache',
                 'endpoint': 'http://cache:6379',
                 'criticality': 'medium',
-                'energy_profile': 'medium'
+                'energy_profile': 'medium',
+                'region': 'us-west-2'
             }
         ]
         return services
     
     async def collect_metrics(self) -> Dict[str, Dict]:
         """Collect metrics for all services"""
+        return await self.collect_services(self.services)
+    
+    async def collect_services(self, services: List[Dict]) -> Dict[str, Dict]:
+        """Collect metrics for the given services"""
         all_metrics = {}
         
-        for service in self.services:
-            try:
-                metrics = await self.collect_service_metrics(service)
-                all_metrics[service['id']] = metrics
-                
-                # Store in history
-                self.metrics_history.append({
-                    'timestamp': datetime.now(),
-                    'service_id': service['id'],
-                    'metrics': metrics
-                })
-                
-            except Exception as e:
-                logger.error(f"Failed to collect metrics for {service['id']}: {e}")
-                # Return default metrics
-                all_metrics[service['id']] = self.get_default_metrics()
+        if self.batch_size:
+            for start in range(0, len(services), self.batch_size):
+                all_metrics.update(await self.collect_batch(services[start:start + self.batch_size]))
+        else:
+            for service in services:
+                try:
+                    metrics = await self.collect_service_metrics(service)
+                    all_metrics[metrics.service_id] = metrics
+                    
+                    # Store in history (the record itself, no wrapper dict)
+                    self.metrics_history.append(metrics)
+                    
+                except Exception as e:
+                    logger.error(f"Failed to collect metrics for {service['id']}: {e}")
+                    # Return default metrics
+                    all_metrics[service['id']] = self.get_default_metrics()
         
-        # Keep only last 1000 entries
-        if len(self.metrics_history) > 1000:
-            self.metrics_history = self.metrics_history[-1000:]
+        # Energy and carbon for the whole sweep in one vectorized pass
+        collected = {sid: m for sid, m in all_metrics.items() if 'error' not in m}
+        self.energy_model.annotate(collected)
+        self.observe_power(collected)
         
         logger.info(f"✅ Collected metrics for {len(all_metrics)} services")
         return all_metrics
     
-    async def collect_service_metrics(self, service: Dict) -> Dict:
+    async def collect_batch(self, services: List[Dict]) -> Dict[str, Dict]:
+        """Collect a batch of services with one round trip and one system read"""
+        # Simulate one scrape of the whole batch (replace with actual collection)
+        await asyncio.sleep(0.1)  # Simulate network delay
+        cpu_percent = psutil.cpu_percent()
+        memory = psutil.virtual_memory()
+        
+        batch = {}
+        for service in services:
+            try:
+                metrics = self.build_sample(service, cpu_percent, memory)
+                batch[metrics.service_id] = metrics
+                self.metrics_history.append(metrics)
+            except Exception as e:
+                logger.error(f"Failed to collect metrics for {service['id']}: {e}")
+                batch[service['id']] = self.get_default_metrics()
+        return batch
+    
+    async def collect_service_metrics(self, service: Dict) -> MetricSample:
         """Collect metrics for a single service"""
         # Simulate collecting metrics (replace with actual collection)
         await asyncio.sleep(0.1)  # Simulate network delay
@@ -103,56 +157,64 @@ class MetricsAgent:
         # System metrics
         cpu_percent = psutil.cpu_percent()
         memory = psutil.virtual_memory()
-        
+        return self.build_sample(service, cpu_percent, memory)
+    
+    def build_sample(self, service: Dict, cpu_percent: float, memory) -> MetricSample:
+        """One sample from the system readings plus the service's own metrics"""
         # Service-specific metrics (simulated)
-        metrics = {
-            'service_id': service['id'],
-            'service_name': service['name'],
-            'timestamp': datetime.now().isoformat(),
+        metrics = MetricSample(
+            service_id=service['id'],
+            service_name=service['name'],
+            timestamp=time.time(),
             
             # System metrics
-            'cpu_usage_percent': cpu_percent,
-            'memory_usage_percent': memory.percent,
-            'memory_available_gb': memory.available / (1024**3),
-            'disk_io_percent': random.uniform(0, 100),
-            'network_latency_ms': random.uniform(10, 500),
+            cpu_usage_percent=cpu_percent,
+            memory_usage_percent=memory.percent,
+            memory_available_gb=memory.available / (1024**3),
+            disk_io_percent=random.uniform(0, 100),
+            network_latency_ms=random.uniform(10, 500),
             
             # Application metrics
-            'request_rate': random.uniform(50, 1000),
-            'error_rate': random.uniform(0.001, 0.05),
-            'response_time_ms': random.uniform(50, 800),
-            'active_connections': random.randint(10, 500),
+            request_rate=random.uniform(50, 1000),
+            error_rate=random.uniform(0.001, 0.05),
+            response_time_ms=random.uniform(50, 800),
+            active_connections=random.randint(10, 500),
             
-            # Energy metrics (simulated)
-            'energy_consumption_watts': self.calculate_energy_consumption(service),
-            'carbon_footprint_kg': self.calculate_carbon_footprint(service),
-            'energy_efficiency_score': random.uniform(0.7, 0.95),
+            # Energy metrics (energy_consumption_watts and carbon_footprint_kg
+            # are filled in per sweep by the energy model)
+            energy_efficiency_score=random.uniform(0.7, 0.95),
             
             # Health status
-            'health_score': self.calculate_health_score(service),
-            'status': 'healthy' if random.random() > 0.1 else 'unhealthy'
-        }
+            health_score=self.calculate_health_score(service),
+            status='healthy' if random.random() > 0.1 else 'unhealthy'
+        )
         
         return metrics
     
-    def calculate_energy_consumption(self, service: Dict) -> float:
-        """Calculate energy consumption for a service"""
-        base_energy = {
-            'low': 50,    # watts
-            'medium': 150,
-            'high': 300
-        }.get(service['energy_profile'], 100)
-        
-        # Add variation based on load
-        variation = random.uniform(0.8, 1.5)
-        return base_energy * variation
+    def read_power(self, metrics: Dict[str, Dict]) -> Dict[str, float]:
+        """Measured draw (watts) per service, for the services a power meter reports"""
+        # Simulate a power meter reading (replace with RAPL / Kepler / PDU data)
+        return {sid: m['energy_consumption_watts'] * random.uniform(0.85, 1.15)
+                for sid, m in metrics.items() if m.get('energy_consumption_watts') is not None}
     
-    def calculate_carbon_footprint(self, service: Dict) -> float:
-        """Calculate carbon footprint in kg CO2"""
-        energy_consumption = self.calculate_energy_consumption(service)
-        # Assuming 0.233 kg CO2 per kWh (US average)
-        # Convert watts to kW and assume 1 hour of operation
-        return (energy_consumption / 1000) * 0.233
+    def observe_power(self, metrics: Dict[str, Dict]) -> int:
+        """Calibrate power curves from measured draw; refits when calibration_interval has passed"""
+        readings = self.read_power(metrics)
+        service_ids = [sid for sid in readings if sid in self.energy_model.service_index]
+        if service_ids:
+            samples = [metrics[sid] for sid in service_ids]
+            self.energy_model.observe(
+                service_ids,
+                [m.get('cpu_usage_percent', 0.0) for m in samples],
+                [m.get('memory_usage_percent', 0.0) for m in samples],
+                [m.get('disk_io_percent', 0.0) for m in samples],
+                [readings[sid] for sid in service_ids]
+            )
+        now = time.monotonic()
+        if now - self.last_calibration < self.calibration_interval:
+            return 0
+        self.last_calibration = now
+        return self.energy_model.fit()
     
     def calculate_health_score(self, service: Dict) -> float:
         """Calculate health score (0-100)"""
@@ -172,8 +234,11 @@ class MetricsAgent:
             'error': 'Metrics collection failed'
         }
     
-    def get_metrics_history(self, service_id: str = None, limit: int = 100):
-        """Get metrics history for a service or all services"""
+    def get_metrics_history(self, service_id: str = None, limit: int = 100) -> List[Dict]:
+        """Get metrics history for a service or all services, as dicts"""
+        history = self.metrics_history
         if service_id:
-            return [m for m in self.metrics_history if m['service_id'] == service_id][-limit:]
-        return self.metrics_history[-limit:]
\ No newline at end of file
+            history = [m for m in history if m.service_id == service_id]
+        else:
+            history = list(history)
+        return [m.to_dict() for m in history[-limit:]]
\ No newline at end of file
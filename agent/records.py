@@ -0,0 +1,151 @@
+"""
+Records - Compact slotted records for metric samples, predictions and healing events
+"""
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+
+
+def intern_id(service_id: str) -> str:
+    """One shared string per service id across samples, predictions and events"""
+    return sys.intern(service_id) if type(service_id) is str else service_id
+
+
+class Record:
+    """Slotted record that also speaks the small dict protocol the pipeline uses.
+
+    record['cpu_usage_percent'], record.get(...), record[...] = value and
+    'error' in record work as on the dicts these replace, so feature_schema
+    getters, the energy model and the optimizer take either. Unset optional
+    fields are simply absent. Timestamps are epoch seconds; to_dict() turns
+    them into ISO strings for the API and state snapshots.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value):
+        try:
+            setattr(self, key, value)
+        except AttributeError:
+            raise KeyError(f"{type(self).__name__} has no field {key!r}") from None
+
+    def __contains__(self, key: str) -> bool:
+        return hasattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def keys(self) -> Iterable[str]:
+        return [name for name in self.__slots__ if hasattr(self, name)]
+
+    def items(self) -> Iterable[Tuple[str, object]]:
+        return [(name, getattr(self, name)) for name in self.keys()]
+
+    def to_dict(self) -> Dict:
+        data = dict(self.items())
+        if isinstance(data.get('timestamp'), float):
+            data['timestamp'] = datetime.fromtimestamp(data['timestamp']).isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict):
+        """Rebuild from to_dict() output (ISO timestamps are parsed back; unknown keys ignored)"""
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            if name in data:
+                setattr(record, name, data[name])
+        timestamp = data.get('timestamp')
+        if isinstance(timestamp, str):
+            record.timestamp = datetime.fromisoformat(timestamp).timestamp()
+        if isinstance(getattr(record, 'service_id', None), str):
+            record.service_id = intern_id(record.service_id)
+        return record
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in self.items())})"
+
+
+class MetricSample(Record):
+    """One MetricsAgent sample (the agent layout of predictor/feature_schema.py)"""
+
+    __slots__ = ('service_id', 'service_name', 'timestamp',
+                 'cpu_usage_percent', 'memory_usage_percent', 'memory_available_gb',
+                 'disk_io_percent', 'network_latency_ms', 'request_rate', 'error_rate',
+                 'response_time_ms', 'active_connections', 'energy_efficiency_score',
+                 'health_score', 'status', 'energy_consumption_watts', 'carbon_footprint_kg')
+
+    def __init__(self, service_id: str, service_name: str, timestamp: float,
+                 cpu_usage_percent: float, memory_usage_percent: float, memory_available_gb: float,
+                 disk_io_percent: float, network_latency_ms: float, request_rate: float,
+                 error_rate: float, response_time_ms: float, active_connections: int,
+                 energy_efficiency_score: float, health_score: float, status: str):
+        self.service_id = intern_id(service_id)
+        self.service_name = service_name
+        self.timestamp = timestamp
+        self.cpu_usage_percent = cpu_usage_percent
+        self.memory_usage_percent = memory_usage_percent
+        self.memory_available_gb = memory_available_gb
+        self.disk_io_percent = disk_io_percent
+        self.network_latency_ms = network_latency_ms
+        self.request_rate = request_rate
+        self.error_rate = error_rate
+        self.response_time_ms = response_time_ms
+        self.active_connections = active_connections
+        self.energy_efficiency_score = energy_efficiency_score
+        self.health_score = health_score
+        self.status = status
+        # energy_consumption_watts / carbon_footprint_kg are set by EnergyModel.annotate
+
+
+class Prediction(Record):
+    """FailurePredictor output; forecast fields are attached by MetricForecaster.annotate"""
+
+    __slots__ = ('service_id', 'will_fail', 'probability', 'cluster', 'confidence', 'timestamp',
+                 'model_used', 'features_used', 'forecast', 'time_to_breach_seconds',
+                 'breach_metric', 'error')
+
+    def __init__(self, service_id: str, will_fail: bool, probability: float, cluster: int,
+                 confidence: float, timestamp: float, model_used: str,
+                 features_used: Tuple[str, ...] = None):
+        self.service_id = intern_id(service_id)
+        self.will_fail = will_fail
+        self.probability = probability
+        self.cluster = cluster
+        self.confidence = confidence
+        self.timestamp = timestamp
+        self.model_used = model_used
+        if features_used is not None:
+            self.features_used = features_used  # Shared tuple, never a per-prediction copy
+
+
+class HealingEvent(Record):
+    """One entry of HealingController.healing_history"""
+
+    __slots__ = ('timestamp', 'service_id', 'strategy', 'prediction_cluster',
+                 'prediction_probability', 'expected_energy_saving', 'actual_energy_saving',
+                 'execution_time_seconds', 'status', 'region', 'target_node', 'carbon_intensity',
+                 'requested_carbon_intensity', 'deferred_seconds', 'carbon_reduction_kg')
+
+    def __init__(self, timestamp: float, service_id: str, strategy: str, prediction_cluster: int,
+                 prediction_probability: float, expected_energy_saving: float,
+                 actual_energy_saving: float, execution_time_seconds: float, status: str,
+                 region: str, carbon_reduction_kg: float, **extra):
+        self.timestamp = timestamp
+        self.service_id = intern_id(service_id)
+        self.strategy = strategy
+        self.prediction_cluster = prediction_cluster
+        self.prediction_probability = prediction_probability
+        self.expected_energy_saving = expected_energy_saving
+        self.actual_energy_saving = actual_energy_saving
+        self.execution_time_seconds = execution_time_seconds
+        self.status = status
+        self.region = region
+        self.carbon_reduction_kg = carbon_reduction_kg
+        for name, value in extra.items():
+            setattr(self, name, value)
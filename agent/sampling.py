@@ -0,0 +1,193 @@
+"""
+Adaptive Sampler - Per-service sampling intervals driven by failure risk under a global budget
+"""
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveSampler:
+    """Decides which services to sample next, and how often.
+
+    Services wait in a binary heap ordered by next due time (re-scheduled
+    entries are skipped lazily, as in CarbonAwareScheduler). The target
+    interval falls geometrically from max_interval at risk 0 to min_interval
+    at risk 1. Rising risk and recent healing move a service to the fast end
+    at once; stable services back off gradually, by `backoff` per sample.
+    When the summed rate of all services would exceed samples_per_second,
+    every interval is stretched by the same factor, so the fleet keeps its
+    relative priorities within the budget; a token bucket on pop_due caps
+    what is still in flight from before a stretch.
+    """
+
+    def __init__(self, min_interval: float = 5.0, max_interval: float = 120.0,
+                 samples_per_second: float = 50.0, backoff: float = 1.5, trend_gain: float = 2.0,
+                 healing_boost_seconds: float = 300.0, clock=time.monotonic, seed: int = None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget = samples_per_second
+        self.backoff = backoff
+        self.trend_gain = trend_gain
+        self.healing_boost_seconds = healing_boost_seconds
+        self.clock = clock
+        self.jitter = random.Random(seed)
+        self.queue: List = []
+        self.counter = itertools.count()
+        self.live: Dict[str, int] = {}  # service_id -> sequence number of its current heap entry
+        self.interval: Dict[str, float] = {}
+        self.risk: Dict[str, float] = {}
+        self.healed_at: Dict[str, float] = {}
+        self.rate = 0.0  # Sum of 1 / interval over all services
+        self.samples = 0
+        # Token bucket: refills at the budget rate, bursts up to min_interval worth of samples
+        self.burst = max(1.0, samples_per_second * min_interval)
+        self.tokens = self.burst
+        self.refilled = None
+
+    @classmethod
+    def from_settings(cls, settings, **kwargs):
+        """Sampler configured from monitoring.sampling in config.yaml"""
+        sampling = settings.monitoring.sampling
+        options = {
+            'min_interval': sampling.min_interval,
+            'max_interval': sampling.max_interval,
+            'samples_per_second': sampling.samples_per_second,
+            'backoff': sampling.backoff,
+            'healing_boost_seconds': sampling.healing_boost_seconds
+        }
+        options.update(kwargs)
+        return cls(**options)
+
+    def stretch(self) -> float:
+        """Factor applied to every interval so the fleet's total rate fits the budget"""
+        return max(1.0, self.rate / self.budget) if self.budget else 1.0
+
+    def push(self, service_id: str, due: float):
+        seq = next(self.counter)
+        self.live[service_id] = seq
+        heapq.heappush(self.queue, (due, seq, service_id))
+
+    def set_interval(self, service_id: str, interval: float):
+        self.rate += 1.0 / interval - 1.0 / self.interval.get(service_id, interval)
+        self.interval[service_id] = interval
+
+    def add(self, service_id: str, now: float = None):
+        """Start sampling a service; its first sample is due within min_interval (jittered).
+
+        It is accounted at max_interval until observed, so a large fleet joining
+        at once does not stretch everyone else's schedule.
+        """
+        if service_id in self.interval:
+            return
+        now = self.clock() if now is None else now
+        self.set_interval(service_id, self.max_interval)
+        self.risk[service_id] = 0.0
+        self.push(service_id, now + self.jitter.uniform(0, self.min_interval * self.stretch()))
+
+    def remove(self, service_id: str):
+        if service_id not in self.interval:
+            return
+        self.rate -= 1.0 / self.interval.pop(service_id)
+        self.live.pop(service_id, None)
+        self.risk.pop(service_id, None)
+        self.healed_at.pop(service_id, None)
+
+    def target_interval(self, risk: float, previous_risk: float) -> float:
+        """Interval for a risk level, treating a rising risk as already higher"""
+        effective = min(1.0, max(0.0, risk + self.trend_gain * max(0.0, risk - previous_risk)))
+        return self.max_interval * (self.min_interval / self.max_interval) ** effective
+
+    def observe(self, service_id: str, risk: float, now: float = None) -> float:
+        """Fold in a new risk estimate (e.g. failure probability) and re-schedule; returns the interval"""
+        if service_id not in self.interval:
+            self.add(service_id, now)
+        now = self.clock() if now is None else now
+        target = self.target_interval(risk, self.risk[service_id])
+        healed = self.healed_at.get(service_id)
+        if healed is not None and now - healed < self.healing_boost_seconds:
+            target = self.min_interval
+        current = self.interval[service_id]
+        # Speed up immediately, slow down gradually
+        interval = target if target < current else min(target, current * self.backoff)
+        self.risk[service_id] = risk
+        self.set_interval(service_id, interval)
+        self.push(service_id, now + interval * self.stretch())
+        return interval
+
+    def record_healing(self, service_id: str, now: float = None):
+        """Watch a service closely for healing_boost_seconds after an action on it"""
+        if service_id not in self.interval:
+            return
+        now = self.clock() if now is None else now
+        self.healed_at[service_id] = now
+        self.set_interval(service_id, self.min_interval)
+        self.push(service_id, now + self.min_interval)
+
+    def pop_due(self, now: float = None, limit: int = None) -> List[str]:
+        """Services due for a sample, most overdue first, as many as the budget allows now.
+
+        Each is provisionally re-queued one interval ahead, so a service whose
+        sample fails (and is never observed) is still retried.
+        """
+        now = self.clock() if now is None else now
+        if self.budget:
+            if self.refilled is not None:
+                self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.budget)
+            self.refilled = now
+            limit = int(self.tokens) if limit is None else min(limit, int(self.tokens))
+        due = []
+        while self.queue and self.queue[0][0] <= now and (limit is None or len(due) < limit):
+            _, seq, service_id = heapq.heappop(self.queue)
+            if self.live.get(service_id) != seq:
+                continue
+            due.append(service_id)
+        stretch = self.stretch()
+        for service_id in due:
+            self.push(service_id, now + self.interval[service_id] * stretch)
+        self.samples += len(due)
+        if self.budget:
+            self.tokens -= len(due)
+        self.compact()
+        return due
+
+    def next_delay(self, now: float = None) -> float:
+        """Seconds until the next service is due and the budget has a token for it"""
+        now = self.clock() if now is None else now
+        while self.queue and self.live.get(self.queue[0][2]) != self.queue[0][1]:
+            heapq.heappop(self.queue)
+        if not self.queue:
+            return self.max_interval
+        delay = self.queue[0][0] - now
+        if self.budget and self.refilled is not None:
+            # Otherwise pop_due returns nothing until a whole token has refilled
+            tokens = min(self.burst, self.tokens + (now - self.refilled) * self.budget)
+            delay = max(delay, (1.0 - tokens) / self.budget)
+        return max(0.0, delay)
+
+    def compact(self):
+        """Rebuild the heap once stale entries dominate it"""
+        if len(self.queue) > 64 and len(self.queue) > 2 * len(self.live):
+            self.queue = [entry for entry in self.queue if self.live.get(entry[2]) == entry[1]]
+            heapq.heapify(self.queue)
+
+    def __len__(self):
+        return len(self.interval)
+
+    def get_summary(self) -> Dict:
+        """Fleet sampling rate against the budget, and the spread of intervals"""
+        intervals = sorted(self.interval.values())
+        stretch = self.stretch()
+        return {
+            'services': len(intervals),
+            'samples_per_second': self.rate / stretch,
+            'budget_per_second': self.budget,
+            'stretch': stretch,
+            'fastest_interval': intervals[0] * stretch if intervals else None,
+            'median_interval': intervals[len(intervals) // 2] * stretch if intervals else None,
+            'samples_taken': self.samples
+        }
@@ -1,16 +1,24 @@
-import time, random, requests, psutil
+import sys, time, random, requests, psutil
+from pathlib import Path
+
+# ---------- FIX PYTHON PATH ----------
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+# --------------------------------------
+
+from agent.sampling import AdaptiveSampler
+from config.settings import get_settings
 
 API_URL = "http://localhost:8080/api/metrics"
 SERVICES = ["user-service", "order-service", "billing-service", "monitoring-agent"]
 
-def collect_metrics():
-    cpu = psutil.cpu_percent(interval=1)
+def collect_metrics(service):
+    cpu = psutil.cpu_percent(interval=None)  # Since the previous call; never blocks
     memory = psutil.virtual_memory().used / (1024 * 1024)  # in MB
     network = round(random.uniform(0.1, 10.0), 2)
     disk = round(random.uniform(0.1, 20.0), 2)
     energy = round(10 + 0.4 * cpu + 0.002 * memory, 2)
     latency = int(random.uniform(50, 250))
-    service = random.choice(SERVICES)
 
     data = {
         "serviceName": service,
@@ -24,16 +32,35 @@ def collect_metrics():
 
     return data
 
-print("🚀 SmartEnergy Agent started. Sending metrics every 5 seconds...")
-
-while True:
-    try:
-        metric = collect_metrics()
-        response = requests.post(API_URL, json=metric, timeout=5)
-        if response.status_code == 200:
-            print(f"[✔] Sent → {metric['serviceName']} | CPU: {metric['cpu']} | MEM: {metric['memory']:.2f} MB | Energy: {metric['energy']}")
-        else:
-            print(f"[❌] Failed ({response.status_code}) → {metric}")
-    except Exception as e:
-        print(f"[⚠] Error: {e}")
-    time.sleep(5)
+def risk(metric, critical):
+    """Closeness to the critical thresholds (0 idle .. 1 at or past a threshold)"""
+    return min(1.0, max(metric["cpu"] / critical["cpu"], metric["energy"] / critical["energy"]))
+
+def main():
+    settings = get_settings()
+    critical = settings.monitoring.critical_thresholds
+    sampler = AdaptiveSampler.from_settings(settings)
+    for service in SERVICES:
+        sampler.add(service)
+    session = requests.Session()
+    psutil.cpu_percent(interval=None)  # Prime the CPU counter
+
+    print(f"🚀 SmartEnergy Agent started. Sampling every {sampler.min_interval:g}-"
+          f"{sampler.max_interval:g} s per service by risk...")
+
+    while True:
+        for service in sampler.pop_due():
+            try:
+                metric = collect_metrics(service)
+                interval = sampler.observe(service, risk(metric, critical))
+                response = session.post(API_URL, json=metric, timeout=5)
+                if response.status_code == 200:
+                    print(f"[✔] Sent → {metric['serviceName']} | CPU: {metric['cpu']} | MEM: {metric['memory']:.2f} MB | Energy: {metric['energy']} | next in {interval:.0f}s")
+                else:
+                    print(f"[❌] Failed ({response.status_code}) → {metric}")
+            except Exception as e:
+                print(f"[⚠] Error: {e}")
+        time.sleep(sampler.next_delay())
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,57 @@
+import argparse
+import sys
+from pathlib import Path
+
+# ---------- FIX PYTHON PATH ----------
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+# --------------------------------------
+
 from flask import Flask, request, jsonify
-import joblib
-import numpy as np
+
+from predictor import feature_schema
+from predictor.model_artifacts import ModelArtifacts, artifact_paths
 
 app = Flask(__name__)
 
-# Load trained KMeans model
-MODEL_PATH = "trained_cluster_model.pkl"
-model = joblib.load(MODEL_PATH)
+# Load trained KMeans model (config.yaml ai_model.model_path, or MODEL_PATH), on the first
+# request unless started with --warmup
+artifacts = ModelArtifacts({'model': artifact_paths()['model']})
+
+# Model inputs come from the schema registry. Only predict_api-layout payloads are accepted:
+# the training dataset lacks Disk_Usage, Requests, Temp and Voltage, so dataset-layout
+# payloads are rejected rather than predicted with zeros.
+MODEL_LAYOUT = "predict_api"
 
 @app.route("/predict", methods=["POST"])
 def predict_cluster():
     data = request.json
-    if data is None:
+    if not data:
         return jsonify({"error": "Invalid JSON"}), 400
 
-    required = [
-        "CPU_Usage (%)",
-        "Memory_Usage (MB)",
-        "Network_Usage (MBps)",
-        "Disk_Usage (%)",
-        "IO_Load",
-        "Latency",
-        "Requests",
-        "Temp",
-        "Voltage",
-        "Power"
-    ]
-
-    # Check if all features exist
-    for key in required:
-        if key not in data:
-            return jsonify({"error": f"Missing feature: {key}"}), 400
-
-    # Convert to numpy array
-    features = np.array([data[key] for key in required]).reshape(1, -1)
+    # A single object or a batch (list of objects); every record is validated
+    records = data if isinstance(data, list) else [data]
+    features, missing = feature_schema.to_layout(records, MODEL_LAYOUT)
+    if features is None:
+        return jsonify({"error": f"Missing feature: {missing[0]}", "missing": missing}), 400
+
+    model = artifacts.get('model')
+    if model is None:
+        return jsonify({"error": "Model not loaded"}), 503
 
     # Predict cluster
-    cluster = int(model.predict(features)[0])
+    clusters = model.predict(features).astype(int).tolist()
 
+    if isinstance(data, list):
+        return jsonify({"clusters": clusters})
     return jsonify({
-        "cluster": cluster,
+        "cluster": clusters[0],
         "received_features": data
     })
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--warmup', action='store_true', help="load the model before serving")
+    if parser.parse_args().warmup:
+        artifacts.warmup()
     app.run(host="0.0.0.0", port=5005)
@@ -1,21 +1,23 @@
+import argparse
+import sys
 import time
-import joblib
-import requests
+from pathlib import Path
+
 import numpy as np
-import pandas as pd
 
-MODEL_PATH = r"C:\Users\verne\SmartEnergy\ai_model\cloud_cluster_model.pkl"
-API_URL = "http://localhost:9191/api/alerts"
+# ---------- FIX PYTHON PATH ----------
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+# --------------------------------------
 
-print("🤖 Loading trained cluster pipeline...")
-pipeline = joblib.load(MODEL_PATH)
+from predictor.model_artifacts import ModelArtifacts, artifact_paths
+
+API_URL = "http://localhost:9191/api/alerts"
 
-scaler = pipeline["scaler"]
-kmeans = pipeline["kmeans"]
-classifier = pipeline["classifier"]
-feature_cols = pipeline["feature_cols"]
+# cloud_cluster_model.pkl (config.yaml ai_model.cluster_model_path, or CLUSTER_MODEL_PATH);
+# joblib/sklearn/pandas are imported by the first prediction, not at startup
+artifacts = ModelArtifacts({'pipeline': artifact_paths()['cluster_model']})
 
-print("✅ Cluster pipeline loaded successfully!")
 
 def generate_dummy_metrics():
     return {
@@ -30,19 +32,29 @@ def generate_dummy_metrics():
         "Workload_Type": np.random.randint(0, 2)
     }
 
+
 def predict_cluster(metrics_dict):
+    import pandas as pd
+
+    pipeline = artifacts.get('pipeline')
+    if pipeline is None:
+        raise RuntimeError(f"Cluster pipeline not available at {artifacts.paths['pipeline']}")
+
     df = pd.DataFrame([metrics_dict])
-    
+
     df["cpu_mem_ratio"] = df["CPU_Usage (%)"] / (df["Memory_Usage (MB)"] + 1)
     df["network_disk_ratio"] = df["Network_Usage (MBps)"] / (df["Disk_IO (MBps)"] + 1)
     df["energy_latency_ratio"] = df["Energy_Consumption (Watts)"] / (df["Service_Latency (ms)"] + 1)
 
-    df = df[feature_cols]
+    df = df[pipeline["feature_cols"]]
 
-    pred = classifier.predict(df)[0]
+    pred = pipeline["classifier"].predict(df)[0]
     return int(pred)
 
+
 def send_to_backend(cluster, metrics):
+    import requests
+
     payload = {
         "serviceName": "smart-energy-service",
         "cluster": cluster,
@@ -58,10 +70,30 @@ def send_to_backend(cluster, metrics):
     except Exception as e:
         print(f"[❌] Connection Error: {e}")
 
-print("🚀 Cluster Predictor Started — sending every 10 seconds...")
 
-while True:
-    metrics = generate_dummy_metrics()
-    cluster = predict_cluster(metrics)
-    send_to_backend(cluster, metrics)
-    time.sleep(10)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cluster predictor loop")
+    parser.add_argument('--model', help="cluster pipeline path (default: config.yaml ai_model.cluster_model_path)")
+    parser.add_argument('--interval', type=float, default=10.0)
+    parser.add_argument('--warmup', action='store_true', help="load the pipeline before the first tick")
+    args = parser.parse_args(argv)
+
+    if args.model:
+        artifacts.paths['pipeline'] = args.model
+    if args.warmup:
+        print("🤖 Loading trained cluster pipeline...")
+        if not artifacts.warmup()['pipeline']:
+            sys.exit(f"❌ Could not load {artifacts.paths['pipeline']}")
+        print("✅ Cluster pipeline loaded successfully!")
+
+    print(f"🚀 Cluster Predictor Started — sending every {args.interval:g} seconds...")
+
+    while True:
+        metrics = generate_dummy_metrics()
+        cluster = predict_cluster(metrics)
+        send_to_backend(cluster, metrics)
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,54 @@
+import argparse
+import sys
+from pathlib import Path
+
+# ---------- FIX PYTHON PATH ----------
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+# --------------------------------------
+
 from flask import Flask, request, jsonify
-import joblib
-import numpy as np
+
+from predictor import feature_schema
+from predictor.model_artifacts import ModelArtifacts, artifact_paths
 
 app = Flask(__name__)
 
-# Load trained model
-MODEL_PATH = "trained_cluster_model.pkl"
-model = joblib.load(MODEL_PATH)
-
-# Expected feature names (must match JSON request)
-FEATURES = [
-    "CPU_Usage (%)",
-    "Memory_Usage (MB)",
-    "Network_Usage (MBps)",
-    "Disk_Usage (%)",
-    "IO_Load",
-    "Latency",
-    "Requests",
-    "Temp",
-    "Voltage",
-    "Power"
-]
+# Load trained model (config.yaml ai_model.model_path, or MODEL_PATH), on the first
+# request unless started with --warmup
+artifacts = ModelArtifacts({'model': artifact_paths()['model']})
+
+# Expected feature names (must match JSON request) come from the schema registry.
+# Dataset-layout payloads lack several model inputs and are rejected, not zero-filled.
+FEATURES = feature_schema.keys("predict_api")
 
 @app.route("/predict", methods=["POST"])
 def predict_cluster():
     data = request.json
+    if not data:
+        return jsonify({"error": "Invalid JSON"}), 400
 
-    # Validate all required features
-    for f in FEATURES:
-        if f not in data:
-            return jsonify({"error": f"Missing feature: {f}"}), 400
+    # Validate every record and convert in one pass (single object or a batch)
+    records = data if isinstance(data, list) else [data]
+    features, missing = feature_schema.to_layout(records, "predict_api")
+    if features is None:
+        return jsonify({"error": f"Missing feature: {missing[0]}", "missing": missing}), 400
 
-    # Convert to numpy array
-    features = np.array([data[f] for f in FEATURES]).reshape(1, -1)
+    model = artifacts.get('model')
+    if model is None:
+        return jsonify({"error": "Model not loaded"}), 503
 
     # Predict
-    cluster = int(model.predict(features)[0])
+    clusters = model.predict(features).astype(int).tolist()
 
-    return jsonify({"cluster": cluster})
+    if isinstance(data, list):
+        return jsonify({"clusters": clusters})
+    return jsonify({"cluster": clusters[0]})
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--warmup', action='store_true', help="load the model before serving")
+    if parser.parse_args().warmup:
+        artifacts.warmup()
     print("🚀 Prediction server running on port 5005")
     app.run(host="0.0.0.0", port=5005)
@@ -13,6 +13,7 @@ from sklearn.metrics import (
 )
 import joblib
 import os
+import argparse
 
 # ================================================================
 # 1. TRAINING FUNCTION (Cluster + Classifier + Pipeline Save)
@@ -97,6 +98,10 @@ def train_cluster_pipeline(df, save_path=None, n_clusters=3, random_state=42):
 # ================================================================
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--live-export", help="also train on healing rows from training_export.py")
+    args = parser.parse_args()
+
     print("📌 Loading dataset...")
     df = pd.read_csv("cloud_resource_allocation_dataset.csv")
 
@@ -105,6 +110,13 @@ if __name__ == "__main__":
     le = LabelEncoder()
     df["Workload_Type"] = le.fit_transform(df["Workload_Type"])
 
+    # Live rows are already label-encoded by the backend; only complete rows are exported
+    if args.live_export:
+        from training_export import load_frame
+        live = load_frame(args.live_export, "healing")
+        print(f"📌 Adding {len(live)} live telemetry rows from {args.live_export}...")
+        df = pd.concat([df, live[df.columns.intersection(live.columns)]], ignore_index=True)
+
     print("📌 Starting cluster training (3 clusters)...")
     model = train_cluster_pipeline(df)
 
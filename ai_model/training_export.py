@@ -0,0 +1,208 @@
+"""
+Training Export - Incremental export of live telemetry into the training dataset schema
+
+Usage:
+    python ai_model/training_export.py --db backend/smart_energy.db --out ai_model/exports
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+# ---------- FIX PYTHON PATH ----------
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+# --------------------------------------
+
+from backend.metrics_store import DEFAULT_DB_PATH, MetricsStore, table_exists
+from backend.retention import read_archive, write_archive
+from predictor.feature_schema import aliases
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_DIR = str(root_dir / "ai_model" / "exports")
+
+# Store column -> cloud_resource_allocation_dataset.csv column; agent-only columns
+# (diskio_percent, network_latency_ms) have no dataset counterpart and are not exported
+DATASET_COLUMNS = {column: keys[0] for column, keys in aliases('store', ['dataset']).items() if keys}
+LABEL_COLUMNS = ['service_name', 'timestamp', 'healed', 'Cluster_Label', 'action_taken']
+
+# Raw metrics rows, labelled with the first healing action on the same service within
+# the horizon (a LEFT JOIN on the covering healing_log index, one probe per row)
+METRICS_SQL = (
+    "SELECT m.id, m.service_name, m.timestamp, m.cpu, m.memory, m.network, m.diskio, "
+    "m.energy, m.latency_ms, h.predicted_cluster, h.action_taken "
+    "FROM metrics m LEFT JOIN healing_log h ON h.id = ("
+    "SELECT id FROM healing_log WHERE service_name = m.service_name "
+    "AND timestamp >= m.timestamp AND timestamp < m.timestamp + ? ORDER BY timestamp LIMIT 1) "
+    "WHERE (m.timestamp, m.id) > (?, ?) AND m.timestamp < ? ORDER BY m.timestamp, m.id LIMIT ?"
+)
+# Healing actions carry the full feature vector the Spring backend logged, labelled with its cluster
+HEALING_SQL = (
+    f"SELECT h.id, h.service_name, h.timestamp, "
+    f"{', '.join(f'm.{c}' for c in DATASET_COLUMNS)}, h.predicted_cluster, h.action_taken "
+    f"FROM healing_log h JOIN healing_metrics m ON m.healing_id = h.id "
+    f"WHERE (h.timestamp, h.id) > (?, ?) AND h.timestamp < ? ORDER BY h.timestamp, h.id LIMIT ?"
+)
+
+
+class TrainingExporter:
+    """Appends new telemetry to numbered shards; never re-reads exported rows.
+
+    Each stream ('metrics', 'healing') keeps a (timestamp, id) high-watermark
+    in manifest.json next to its shards. Rows younger than label_delay are
+    held back so that healing outcomes within the horizon are known before
+    a sample is exported, which keeps already written shards immutable.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, export_dir: str = DEFAULT_EXPORT_DIR,
+                 horizon_seconds: int = 600, label_delay_seconds: int = None,
+                 shard_rows: int = 100_000, batch_size: int = 5000, clock=time.time):
+        self.db_path = db_path
+        self.export_dir = Path(export_dir)
+        self.horizon_ms = horizon_seconds * 1000
+        self.label_delay_ms = (label_delay_seconds if label_delay_seconds is not None
+                               else horizon_seconds) * 1000
+        self.shard_rows = shard_rows
+        self.batch_size = batch_size
+        self.clock = clock
+        self.manifest_path = self.export_dir / "manifest.json"
+        self.manifest = self.load_manifest()
+
+    def load_manifest(self) -> Dict:
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        return {'columns': DATASET_COLUMNS, 'streams': {}}
+
+    def save_manifest(self):
+        """Atomic replace, so a crash never leaves a watermark ahead of its shard"""
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def stream_state(self, stream: str) -> Dict:
+        return self.manifest['streams'].setdefault(stream, {'cursor': [-2 ** 62, 2 ** 62],
+                                                            'shards': []})
+
+    def export(self) -> Dict[str, int]:
+        """Export everything new since the last run; returns rows written per stream"""
+        store = MetricsStore(self.db_path)
+        try:
+            store.backfill_healing_metrics()
+            end = int(self.clock() * 1000) - self.label_delay_ms
+            written = {'metrics': 0, 'healing': 0}
+            if not table_exists(store.db, 'healing_log'):
+                return written
+            if table_exists(store.db, 'metrics'):
+                written['metrics'] = self.export_stream(store, 'metrics', METRICS_SQL,
+                                                        (self.horizon_ms,), end)
+            written['healing'] = self.export_stream(store, 'healing', HEALING_SQL, (), end)
+        finally:
+            store.close()
+        if any(written.values()):
+            logger.info(f"📦 Exported {written['metrics']} metric rows and "
+                        f"{written['healing']} healing rows to {self.export_dir}")
+        return written
+
+    def export_stream(self, store: MetricsStore, stream: str, sql: str, prefix: tuple,
+                      end: int) -> int:
+        state = self.stream_state(stream)
+        total = 0
+        while True:
+            columns, cursor = self.read_shard(store, sql, prefix, tuple(state['cursor']), end)
+            if not columns['timestamp']:
+                return total
+            seq = len(state['shards'])
+            path = write_archive(self.export_dir / stream / f"part-{seq:06d}",
+                                 [{k: v for k, v in columns.items() if k != 'id'}])
+            rows = len(columns['timestamp'])
+            state['shards'].append({'file': str(path.relative_to(self.export_dir)), 'rows': rows,
+                                    'first_ts': columns['timestamp'][0],
+                                    'last_ts': columns['timestamp'][-1]})
+            state['cursor'] = list(cursor)
+            self.save_manifest()
+            total += rows
+            if rows < self.shard_rows:
+                return total
+
+    def read_shard(self, store: MetricsStore, sql: str, prefix: tuple, after: tuple, end: int):
+        """Up to shard_rows rows after the cursor, as training-schema column lists"""
+        columns: Dict[str, List] = {name: [] for name in ['id'] + LABEL_COLUMNS
+                                    + list(DATASET_COLUMNS.values())}
+        cursor = after
+        while len(columns['timestamp']) < self.shard_rows:
+            limit = min(self.batch_size, self.shard_rows - len(columns['timestamp']))
+            rows = store.db.execute(sql, prefix + (cursor[0], cursor[1], end, limit)).fetchall()
+            present = [name for name in DATASET_COLUMNS if rows and name in rows[0].keys()]
+            missing = [DATASET_COLUMNS[name] for name in DATASET_COLUMNS if name not in present]
+            for row in rows:
+                columns['id'].append(row['id'])
+                columns['service_name'].append(row['service_name'] or '')
+                columns['timestamp'].append(row['timestamp'])
+                healed = row['predicted_cluster'] is not None
+                columns['healed'].append(int(healed))
+                columns['Cluster_Label'].append(row['predicted_cluster'] if healed else -1)
+                columns['action_taken'].append(row['action_taken'] or '')
+                for name in present:
+                    value = row[name]
+                    columns[DATASET_COLUMNS[name]].append(np.nan if value is None else value)
+                for column in missing:
+                    columns[column].append(np.nan)
+            if rows:
+                cursor = (rows[-1]['timestamp'], rows[-1]['id'])
+            if len(rows) < limit:
+                break
+        return columns, cursor
+
+
+def iter_shards(export_dir: str = DEFAULT_EXPORT_DIR, stream: str = 'healing',
+                after_seq: int = 0) -> Iterator[Dict[str, np.ndarray]]:
+    """Columns of each shard numbered >= after_seq, so retraining can read only new data"""
+    manifest_path = Path(export_dir) / "manifest.json"
+    if not manifest_path.exists():
+        return
+    with open(manifest_path) as f:
+        shards = json.load(f)['streams'].get(stream, {}).get('shards', [])
+    for shard in shards[after_seq:]:
+        yield read_archive(str(Path(export_dir) / shard['file']))
+
+
+def load_frame(export_dir: str = DEFAULT_EXPORT_DIR, stream: str = 'healing',
+               after_seq: int = 0, complete_only: bool = True):
+    """Exported shards as one DataFrame in the training CSV layout"""
+    import pandas as pd
+
+    frames = [pd.DataFrame(columns) for columns in iter_shards(export_dir, stream, after_seq)]
+    if not frames:
+        return pd.DataFrame(columns=LABEL_COLUMNS + list(DATASET_COLUMNS.values()))
+    frame = pd.concat(frames, ignore_index=True)
+    return frame.dropna(subset=list(DATASET_COLUMNS.values())) if complete_only else frame
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incremental training data export")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    parser.add_argument('--out', default=DEFAULT_EXPORT_DIR)
+    parser.add_argument('--horizon-seconds', type=int, default=600)
+    parser.add_argument('--shard-rows', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    exporter = TrainingExporter(args.db, args.out, args.horizon_seconds,
+                                shard_rows=args.shard_rows)
+    for stream, rows in exporter.export().items():
+        state = exporter.stream_state(stream)
+        print(f"{stream}: +{rows} rows, {len(state['shards'])} shards total")
+
+
+if __name__ == "__main__":
+    main()
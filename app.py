@@ -1,15 +1,13 @@
+import argparse
+
 from flask import Flask, request, jsonify
-import pickle
-import pandas as pd
+
+from predictor.model_artifacts import ModelArtifacts, artifact_paths
 
 app = Flask(__name__)
 
-# Load model (adjust path as needed)
-try:
-    with open('trained_cluster_model.pld', 'rb') as f:
-        model = pickle.load(f)
-except:
-    model = None
+# Load model (config.yaml ai_model.model_path, or MODEL_PATH) on first use
+artifacts = ModelArtifacts({'model': artifact_paths()['model']})
 
 @app.route("/")
 def home():
@@ -21,6 +19,7 @@ def home():
 
 @app.route("/predict", methods=["POST"])
 def predict():
+    model = artifacts.get('model')
     if model is None:
         return jsonify({"error": "Model not loaded"}), 500
     
@@ -31,6 +30,8 @@ def predict():
     try:
         # Process data and make prediction
         # Adjust this based on your model's requirements
+        import pandas as pd
+
         features = pd.DataFrame([data])
         prediction = model.predict(features)
         
@@ -42,4 +43,8 @@ def predict():
         return jsonify({"error": str(e)}), 500
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--warmup', action='store_true', help="load the model before serving")
+    if parser.parse_args().warmup:
+        artifacts.warmup()
     app.run(host='0.0.0.0', port=5005, debug=True)
\ No newline at end of file
@@ -12,18 +12,29 @@ root_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(root_dir))
 # --------------------------------------
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
-import uvicorn
+import argparse
 import asyncio
 import random
+import time
 from datetime import datetime
 from typing import List, Dict
 import logging
 
 # ----- YOUR ACTUAL HEALING CONTROLLER -----
 from backend.healing_controller import HealingController, HealingStrategy
+from backend.carbon_scheduler import CarbonAwareScheduler
+from backend.green_placement import GreenPlacementEngine
+from backend.recovery_state import RecoveryState, RecoveryStateTable
+from backend.retention import managers_from_config
+from backend.serialization import FastJSONResponse, PayloadCache, dumps, encode_message
+from backend.leader_election import (ControllerStateStore, FileLockBackend, LeaderElector,
+                                     SQLiteLockBackend)
+from agent.energy_model import DEFAULT_REGION, CarbonIntensityTable
+from config.settings import watcher
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -32,18 +43,30 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("🚀 Backend starting – real healing controller active")
+    if os.environ.get("API_WARMUP") == "1":
+        warmup()
+    election_task = asyncio.create_task(leader_elector.run()) if leader_elector else None
     simulation_task = asyncio.create_task(simulate_real_time_updates())
+    settings_task = asyncio.create_task(settings_watcher.watch())
+    # Database retention runs on the leader only, so replicas never delete concurrently
+    retention_tasks = [asyncio.create_task(m.run(retention_interval, should_run=is_healing_leader))
+                       for m in retention_managers]
     yield
     logger.info("🛑 Shutting down...")
-    simulation_task.cancel()
-    try:
-        await simulation_task
-    except asyncio.CancelledError:
-        logger.info("Simulation cancelled")
+    for task in (simulation_task, election_task, settings_task, *retention_tasks):
+        if task is None:
+            continue
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    logger.info("Simulation cancelled")
     logger.info("✅ Shutdown complete")
 
 # ========== FastAPI app ==========
-app = FastAPI(title="Smart Energy-Aware Recovery API", lifespan=lifespan)
+app = FastAPI(title="Smart Energy-Aware Recovery API", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
 
 # CORS for React frontend
 app.add_middleware(
@@ -53,6 +76,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # ========== WebSocket Manager ==========
 class ConnectionManager:
@@ -69,25 +93,98 @@ class ConnectionManager:
         logger.info(f"WebSocket disconnected. Total: {len(self.active_connections)}")
 
     async def broadcast(self, message: dict):
+        await self.broadcast_text(dumps(message).decode("utf-8"))
+
+    async def broadcast_text(self, text: str):
+        """Send an already encoded message to every client (encoded once, not per client)"""
         for conn in self.active_connections:
             try:
-                await conn.send_json(message)
+                await conn.send_text(text)
             except:
                 pass
 
 manager = ConnectionManager()
 
 # ========== Instantiate your HealingController ==========
-healing_controller = HealingController()
+# Deferrable actions (migrate_green, scale_down, optimize) wait for a low-carbon slot
+carbon_table_path = root_dir / "config" / "carbon_intensity.csv"
+# Typed config.yaml; subscribers pick up edits without a restart
+settings_watcher = watcher()
+default_intensity = settings_watcher.current.energy.carbon_intensity
+carbon_table = (CarbonIntensityTable.from_csv(str(carbon_table_path), default_intensity)
+                if carbon_table_path.exists() else CarbonIntensityTable(default_intensity))
+placement_engine = GreenPlacementEngine.from_files(
+    str(root_dir / "config" / "inventory.yaml"),
+    config_path=str(root_dir / "config" / "config.yaml"),
+    carbon_table=carbon_table
+)
+healing_controller = HealingController(scheduler=CarbonAwareScheduler(carbon_table),
+                                       placement=placement_engine,
+                                       settings=settings_watcher.current)
+settings_watcher.subscribe(healing_controller.apply_settings)
+# Dedup, cooldown and flap suppression for every healing trigger
+recovery_states = RecoveryStateTable()
+
+# ----- Leader election: with several replicas only the leader heals -----
+# LEADER_LOCK_BACKEND: sqlite (default), file, or none (single replica, always leads)
+LEADER_LOCK_BACKEND = os.environ.get("LEADER_LOCK_BACKEND", "sqlite")
+data_dir = root_dir / "backend" / "data"
+state_store = ControllerStateStore(os.environ.get("CONTROLLER_STATE_PATH",
+                                                  str(data_dir / "controller_state.db")))
+
+def build_lock_backend():
+    """Lock backend selected by LEADER_LOCK_BACKEND / LEADER_LOCK_PATH"""
+    if LEADER_LOCK_BACKEND == "sqlite":
+        return SQLiteLockBackend(os.environ.get("LEADER_LOCK_PATH", str(data_dir / "leader.db")))
+    if LEADER_LOCK_BACKEND == "file":
+        return FileLockBackend(os.environ.get("LEADER_LOCK_PATH", str(data_dir / "leader.lock")))
+    return None
+
+def save_to_store():
+    """Write the controller and recovery-state snapshots for the standbys"""
+    state_store.save("healing_controller", healing_controller.export_state())
+    state_store.save("recovery_states", recovery_states.export_state())
+
+def warm_from_store():
+    """Load the last controller and recovery-state snapshots written by the leader"""
+    state = state_store.load("healing_controller")
+    if state:
+        healing_controller.restore_state(state)
+    # Cooldowns and dedup, so a new leader does not re-heal services still cooling down;
+    # services whose deferred action came with the controller snapshot stay pending
+    states = state_store.load("recovery_states")
+    if states:
+        recovery_states.restore_state(states, deferred=healing_controller.deferred_services())
+
+lock_backend = build_lock_backend()
+leader_elector = (LeaderElector(lock_backend, on_elected=warm_from_store)
+                  if lock_backend is not None else None)
+
+def is_healing_leader() -> bool:
+    return leader_elector is None or leader_elector.is_leader
+
+# Retention / archiving for the smart_energy.db files (database.maintenance in config.yaml)
+retention_managers, retention_interval = managers_from_config(str(root_dir / "config" / "config.yaml"))
+
+# Encoded /api/services and /api/stats bodies, rebuilt only after a change
+payload_cache = PayloadCache()
+
+def services_changed():
+    """Invalidate cached payloads that are derived from the service list"""
+    payload_cache.invalidate("services", "stats")
+
+# Spare replica slots per node and healing actions allowed per simulation tick
+NODE_CAPACITY = {"node-1": 2, "node-2": 2, "node-3": 1}
+MAX_ACTIONS_PER_CYCLE = 2
 
 # ========== Simulated System Data ==========
 system_data = {
     "services": [
-        {"id": 1, "name": "payment-service-1", "status": "Running", "node": "node-1", "cpu": 45, "memory": 512, "restartCount": 0},
-        {"id": 2, "name": "auth-service-1", "status": "Running", "node": "node-2", "cpu": 32, "memory": 256, "restartCount": 0},
-        {"id": 3, "name": "inventory-service-1", "status": "Warning", "node": "node-3", "cpu": 85, "memory": 1800, "restartCount": 2},
-        {"id": 4, "name": "database-service-1", "status": "Running", "node": "node-1", "cpu": 25, "memory": 2048, "restartCount": 1},
-        {"id": 5, "name": "cache-service-1", "status": "Error", "node": "node-2", "cpu": 95, "memory": 512, "restartCount": 3},
+        {"id": 1, "name": "payment-service-1", "status": "Running", "node": "node-1", "region": "us-west-2", "cpu": 45, "memory": 512, "restartCount": 0},
+        {"id": 2, "name": "auth-service-1", "status": "Running", "node": "node-2", "region": "eu-west-1", "cpu": 32, "memory": 256, "restartCount": 0},
+        {"id": 3, "name": "inventory-service-1", "status": "Warning", "node": "node-3", "region": "us-west-2", "cpu": 85, "memory": 1800, "restartCount": 2},
+        {"id": 4, "name": "database-service-1", "status": "Running", "node": "node-1", "region": "us-west-2", "cpu": 25, "memory": 2048, "restartCount": 1},
+        {"id": 5, "name": "cache-service-1", "status": "Error", "node": "node-2", "region": "eu-west-1", "cpu": 95, "memory": 512, "restartCount": 3},
     ],
     "logs": [],
     "predictions": [],
@@ -110,8 +207,8 @@ async def health():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 @app.get("/api/services")
-async def get_services():
-    return system_data["services"]
+async def get_services(request: Request):
+    return payload_cache.response(request, "services", lambda: system_data["services"])
 
 @app.get("/api/logs")
 async def get_logs(limit: int = 20):
@@ -133,7 +230,10 @@ async def get_metrics():
     return system_data["metrics"]
 
 @app.get("/api/stats")
-async def get_stats():
+async def get_stats(request: Request):
+    return payload_cache.response(request, "stats", build_stats)
+
+def build_stats() -> dict:
     total = len(system_data["services"])
     running = len([s for s in system_data["services"] if s["status"] == "Running"])
     warning = len([s for s in system_data["services"] if s["status"] == "Warning"])
@@ -150,6 +250,34 @@ async def get_stats():
         "network_io": system_data["metrics"]["network_series"][-1],
     }
 
+@app.get("/api/healing/deferred")
+async def get_deferred_healing(limit: int = 50):
+    return healing_controller.scheduler.get_pending(limit)
+
+@app.get("/api/placement/nodes")
+async def get_placement_nodes():
+    placement_engine.refresh()
+    return placement_engine.get_nodes()
+
+@app.get("/api/healing/strategies")
+async def get_strategy_estimates(cluster: int = None):
+    return healing_controller.get_strategy_estimates(cluster)
+
+@app.get("/api/leader")
+async def get_leader():
+    if leader_elector is None:
+        return {"is_leader": True, "backend": "none"}
+    return {**leader_elector.get_status(), "backend": LEADER_LOCK_BACKEND}
+
+@app.get("/api/maintenance")
+async def get_maintenance():
+    return {"interval_seconds": retention_interval,
+            "databases": [{"db": m.db_path, "last_run": m.last_run} for m in retention_managers]}
+
+@app.get("/api/healing/states")
+async def get_recovery_states():
+    return recovery_states.get_summary()
+
 # ========== HEALING ENDPOINT – uses your controller ==========
 @app.post("/api/healing/{service_id}")
 async def trigger_healing(service_id: int):
@@ -157,52 +285,114 @@ async def trigger_healing(service_id: int):
     if not service:
         return {"error": "Service not found"}
 
-    if service.get("healing_in_progress", False):
-        return {"error": "Healing already in progress"}
+    if not is_healing_leader():
+        return {"error": "This replica is a standby; send healing requests to the leader",
+                "leader": leader_elector.backend.leader()}
+
+    refused = request_healing(service)
+    if refused:
+        return {"error": f"Healing not started: {refused}"}
 
     asyncio.create_task(auto_heal_service(service))
     return {"success": True, "message": f"Healing initiated for {service['name']}"}
 
 # ========== AUTO-HEALING – now calls real HealingController ==========
-async def auto_heal_service(service: dict):
-    """Perform healing using your actual HealingController and broadcast results"""
-    service["healing_in_progress"] = True
-
-    # ----- Build a prediction dict that your controller expects -----
+def request_healing(service: dict):
+    """Claim a service for healing; returns the refusal reason or None"""
+    refused = recovery_states.request(str(service["id"]))
+    if refused is None:
+        service["recovery_state"] = RecoveryState.PENDING.name.lower()
+        services_changed()
+    return refused
+
+def awaiting_deferred(service: dict) -> bool:
+    """Pending only because a deferred action waits for its green slot"""
+    service_id = str(service["id"])
+    return (recovery_states.state(service_id) == RecoveryState.PENDING
+            and healing_controller.has_deferred(service_id))
+
+def healing_active(service: dict) -> bool:
+    """True while a healing action is queued or running for the service"""
+    return recovery_states.state(str(service["id"])) in (RecoveryState.PENDING, RecoveryState.HEALING)
+
+def build_prediction(service: dict) -> dict:
+    """Build a prediction dict that your controller expects"""
     # (cluster is derived from CPU/status, probability is simulated)
     cluster = 1 if service["cpu"] > 80 else 2 if service["cpu"] > 60 else 5
-    prediction = {
+    return {
         "cluster": cluster,
         "probability": random.uniform(0.7, 0.95),
-        "will_fail": True
-    }
-
-    # ----- Broadcast HEALING_STARTED -----
-    start_log = {
-        "id": len(system_data["logs"]) + 1,
-        "service_id": service["id"],
-        "service_name": service["name"],
-        "action": "AUTO_HEALING_TRIGGERED",
-        "status": "HEALING",
-        "timestamp": datetime.now().isoformat(),
-        "details": f"Auto-healing started for {service['name']} (CPU: {service['cpu']}%)"
+        "will_fail": True,
+        "node": service.get("node", ""),
+        "region": service.get("region", DEFAULT_REGION),
+        "resources": {"cpu": service["cpu"] / 100, "memory_gb": service["memory"] / 1024}
     }
-    system_data["logs"].append(start_log)
-    await manager.broadcast({"type": "healing_started", "service": service, "log": start_log})
 
-    # ----- CALL YOUR REAL HEALING CONTROLLER -----
-    result = await healing_controller.execute_healing(
-        service_id=str(service["id"]),
-        prediction=prediction
-    )
+async def auto_heal_service(service: dict, prediction: dict = None, strategy: str = None):
+    """Perform healing using your actual HealingController and broadcast results"""
+    service_id = str(service["id"])
+    recovery_states.start(service_id)
+    service["recovery_state"] = RecoveryState.HEALING.name.lower()
+    services_changed()
+    try:
+        if prediction is None:
+            prediction = build_prediction(service)
 
-    if result["success"]:
+        # ----- Broadcast HEALING_STARTED -----
+        start_log = {
+            "id": len(system_data["logs"]) + 1,
+            "service_id": service["id"],
+            "service_name": service["name"],
+            "action": "AUTO_HEALING_TRIGGERED",
+            "status": "HEALING",
+            "timestamp": datetime.now().isoformat(),
+            "details": f"Auto-healing started for {service['name']} (CPU: {service['cpu']}%)"
+        }
+        system_data["logs"].append(start_log)
+        await manager.broadcast({"type": "healing_started", "service": service, "log": start_log})
+
+        # ----- CALL YOUR REAL HEALING CONTROLLER -----
+        result = await healing_controller.execute_healing(
+            service_id=service_id,
+            prediction=prediction,
+            strategy=strategy
+        )
+        await finish_healing(service, result)
+    except Exception as e:
+        logger.error(f"❌ Healing crashed for {service['name']}: {e}")
+        # Never leave the service stuck in HEALING, which would block every future heal
+        if recovery_states.state(service_id) == RecoveryState.HEALING:
+            cooldown = recovery_states.finish(service_id, success=False)
+            service["recovery_state"] = RecoveryState.COOLDOWN.name.lower()
+            services_changed()
+            logger.info(f"⏳ {service['name']} in cooldown for {cooldown:.0f}s")
+
+async def finish_healing(service: dict, result: dict):
+    """Apply a healing result to the service and broadcast it"""
+    services_changed()
+    if result.get("deferred"):
+        # ----- Deferred to a greener slot; stays pending until it runs -----
+        recovery_states.defer(str(service["id"]))
+        service["recovery_state"] = RecoveryState.PENDING.name.lower()
+        deferred_log = {
+            "id": len(system_data["logs"]) + 1,
+            "service_id": service["id"],
+            "service_name": service["name"],
+            "action": "HEALING_DEFERRED",
+            "status": "SCHEDULED",
+            "timestamp": datetime.now().isoformat(),
+            "details": f"{result['strategy']} for {service['name']} scheduled for {result['scheduled_for']}"
+        }
+        system_data["logs"].append(deferred_log)
+        await manager.broadcast({"type": "healing_deferred", "service": service, "log": deferred_log})
+    elif result["success"]:
         # ----- Update service status -----
         service["status"] = "Running"
         service["cpu"] = random.randint(20, 50)
         service["memory"] = random.randint(256, 1024)
         service["restartCount"] += 1
-        service["healing_in_progress"] = False
+        recovery_states.finish(str(service["id"]), success=True)
+        service["recovery_state"] = RecoveryState.COOLDOWN.name.lower()
 
         # ----- Broadcast HEALING_COMPLETED with real energy savings -----
         complete_log = {
@@ -227,8 +417,10 @@ async def auto_heal_service(service: dict):
                     f"Saved {result['energy_saved']:.3f} kWh, "
                     f"Reduced {result['carbon_reduced']:.3f} kg CO2")
     else:
-        # ----- Healing failed -----
-        service["healing_in_progress"] = False
+        # ----- Healing failed: cooldown grows with consecutive failures -----
+        cooldown = recovery_states.finish(str(service["id"]), success=False)
+        service["recovery_state"] = RecoveryState.COOLDOWN.name.lower()
+        logger.info(f"⏳ {service['name']} in cooldown for {cooldown:.0f}s")
         logger.error(f"❌ Healing failed for {service['name']}: {result.get('error')}")
         await manager.broadcast({
             "type": "healing_failed",
@@ -243,25 +435,42 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         while True:
             await asyncio.sleep(10)
-            await websocket.send_json({"type": "ping", "timestamp": datetime.now().isoformat()})
+            await websocket.send_text(encode_message("ping", timestamp=datetime.now().isoformat()))
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
 # ========== Background Simulation (triggers your auto-healing) ==========
+async def run_deferred_healing():
+    """Execute deferred healing actions whose low-carbon slot has arrived"""
+    for action, result in await healing_controller.run_due_actions():
+        service = next((s for s in system_data["services"] if str(s["id"]) == action.service_id), None)
+        if service is not None:
+            await finish_healing(service, result)
+
 async def simulate_real_time_updates():
     """Periodically update metrics and trigger auto-healing for high-risk services"""
     while True:
         await asyncio.sleep(5)
+        leading = is_healing_leader()
+        if leading:
+            asyncio.create_task(run_deferred_healing())
+            if leader_elector is not None:
+                save_to_store()
+        else:
+            # Standby: keep controller state warm for a fast takeover
+            warm_from_store()
 
         # Random status changes
         for service in system_data["services"]:
-            if not service.get("healing_in_progress", False):
+            if not healing_active(service):
                 if random.random() < 0.1:
+                    services_changed()
                     service["status"] = random.choice(["Warning", "Error"])
                     service["cpu"] = random.randint(70, 95)
                     service["memory"] = random.randint(1500, 2000)
 
-        # Update time series
+        # Update time series (stats read the latest points)
+        payload_cache.invalidate("stats")
         new_cpu = max(10, min(100, system_data["metrics"]["cpu_series"][-1] + random.randint(-5, 5)))
         new_mem = max(500, min(2000, system_data["metrics"]["mem_series"][-1] + random.randint(-50, 50)))
         new_net = max(5, min(30, system_data["metrics"]["network_series"][-1] + random.randint(-2, 2)))
@@ -286,11 +495,29 @@ async def simulate_real_time_updates():
                 "action": "⚠️ Immediate action required!",
                 "timestamp": datetime.now().isoformat()
             }
-            # Auto-heal troubled services
+            # Auto-heal troubled services (leader only). A service that degraded to
+            # Error while its deferred action waits may be preempted by an urgent one.
             troubled = [s for s in system_data["services"]
-                        if s["status"] in ["Warning", "Error"] and not s.get("healing_in_progress", False)]
-            for svc in troubled[:2]:
-                asyncio.create_task(auto_heal_service(svc))
+                        if leading and s["status"] in ["Warning", "Error"]
+                        and (not recovery_states.is_busy(str(s["id"]))
+                             or (s["status"] == "Error" and awaiting_deferred(s)))]
+            predictions = {str(s["id"]): build_prediction(s) for s in troubled}
+            plan = healing_controller.plan_cycle(predictions, node_capacity=NODE_CAPACITY,
+                                                 max_actions=MAX_ACTIONS_PER_CYCLE)
+            by_id = {str(s["id"]): s for s in troubled}
+            for action in plan:
+                service_id = action["service_id"]
+                if awaiting_deferred(by_id[service_id]):
+                    # Deferrable plans keep the queued action; urgent ones cancel it
+                    if (healing_controller.scheduler.is_deferrable(action["strategy"])
+                            or recovery_states.preempt(service_id)):
+                        continue
+                    healing_controller.preempt_deferred(service_id, action["strategy"])
+                elif request_healing(by_id[service_id]):
+                    continue
+                asyncio.create_task(auto_heal_service(
+                    by_id[action["service_id"]], predictions[action["service_id"]], action["strategy"]
+                ))
         elif avg_cpu > 50:
             prediction = {
                 "prediction": "Medium Risk",
@@ -310,11 +537,27 @@ async def simulate_real_time_updates():
             system_data["predictions"] = system_data["predictions"][-10:]
 
         # Broadcast metrics
-        await manager.broadcast({
-            "type": "metrics_update",
-            "metrics": system_data["metrics"],
-            "prediction": prediction
-        })
+        await manager.broadcast_text(encode_message(
+            "metrics_update", metrics=system_data["metrics"], prediction=prediction
+        ))
+
+def warmup():
+    """Build the lazily created OpenAPI schema and cached payloads before the first request"""
+    start = time.perf_counter()
+    app.openapi()
+    payload_cache.get("services", lambda: system_data["services"])
+    payload_cache.get("stats", build_stats)
+    logger.info(f"🔥 Warmup done in {(time.perf_counter() - start) * 1000:.0f} ms")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Smart Energy-Aware Recovery API")
+    parser.add_argument('--warmup', action='store_true',
+                        help="build schemas and cached payloads at startup instead of on first request")
+    args = parser.parse_args()
+    if args.warmup:
+        # Read by the reloader's worker process, which re-imports this module
+        os.environ["API_WARMUP"] = "1"
+
+    import uvicorn  # Only the server entry point needs it; importing the app stays lighter
+
     uvicorn.run("backend.api_server:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
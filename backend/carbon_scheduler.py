@@ -0,0 +1,172 @@
+"""
+Carbon-Aware Scheduler - Defers non-urgent healing actions into low-carbon time slots
+"""
+import heapq
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from agent.energy_model import DEFAULT_REGION, CarbonIntensityTable
+
+logger = logging.getLogger(__name__)
+
+# Actions that restore availability must run now; the rest only save energy
+URGENT_STRATEGIES = {'scale_up', 'restart', 'throttle'}
+
+# Latest acceptable delay (seconds) for each deferrable strategy
+DEFERRAL_DEADLINES = {
+    'migrate_green': 6 * 3600,
+    'scale_down': 2 * 3600,
+    'optimize': 4 * 3600
+}
+
+
+class ScheduledAction:
+    """A deferred healing action waiting in the scheduler queue"""
+
+    __slots__ = ('key', 'service_id', 'strategy', 'prediction', 'region',
+                 'requested_at', 'run_at', 'deadline', 'requested_intensity',
+                 'planned_intensity', 'cancelled')
+
+    def __init__(self, service_id: str, strategy: str, prediction: Dict, region: str,
+                 requested_at: float, run_at: float, deadline: float,
+                 requested_intensity: float, planned_intensity: float):
+        self.key = (service_id, strategy)
+        self.service_id = service_id
+        self.strategy = strategy
+        self.prediction = prediction
+        self.region = region
+        self.requested_at = requested_at
+        self.run_at = run_at
+        self.deadline = deadline
+        self.requested_intensity = requested_intensity
+        self.planned_intensity = planned_intensity
+        self.cancelled = False
+
+    def to_dict(self) -> Dict:
+        return {
+            'service_id': self.service_id,
+            'strategy': self.strategy,
+            'region': self.region,
+            'requested_at': self.requested_at,
+            'run_at': self.run_at,
+            'deadline': self.deadline,
+            'requested_intensity': self.requested_intensity,
+            'planned_intensity': self.planned_intensity
+        }
+
+
+class CarbonAwareScheduler:
+    """Places deferrable actions in the lowest-carbon forecast slot before their deadline.
+
+    Pending actions live in a binary heap ordered by run time, with a dict
+    index keyed by (service_id, strategy) so lookups, cancellation and
+    re-scheduling are O(1) (heap entries are invalidated lazily).
+    """
+
+    def __init__(self, carbon_table: CarbonIntensityTable = None, slot_seconds: int = 900,
+                 deadlines: Dict[str, int] = None, clock=time.time):
+        self.carbon_table = carbon_table or CarbonIntensityTable()
+        self.slot_seconds = slot_seconds
+        self.deadlines = dict(DEFERRAL_DEADLINES if deadlines is None else deadlines)
+        self.clock = clock
+        self.queue: List = []
+        self.pending: Dict[tuple, ScheduledAction] = {}
+        self.counter = itertools.count()
+
+    def is_deferrable(self, strategy: str) -> bool:
+        """Whether a strategy may wait for a greener slot"""
+        return strategy not in URGENT_STRATEGIES and strategy in self.deadlines
+
+    def best_slot(self, region: str, now: float, deadline: float):
+        """Start time and intensity of the greenest slot in [now, deadline]"""
+        slots = np.arange(now, deadline + 1, self.slot_seconds, dtype=float)
+        forecast = self.carbon_table.lookup(np.full(slots.shape, region, dtype=object), slots)
+        best = int(np.argmin(forecast))  # Earliest slot wins ties
+        return float(slots[best]), float(forecast[best]), float(forecast[0])
+
+    def schedule(self, service_id: str, strategy: str, prediction: Dict,
+                 region: str = DEFAULT_REGION, now: float = None) -> ScheduledAction:
+        """Queue a deferrable action; re-scheduling the same action replaces it"""
+        now = self.clock() if now is None else now
+        existing = self.pending.get((service_id, strategy))
+        if existing is not None:
+            # Keep the original request time so repeated triggers cannot push it back
+            now = min(now, existing.requested_at)
+            existing.cancelled = True
+
+        deadline = now + self.deadlines.get(strategy, 0)
+        run_at, planned, current = self.best_slot(region, now, deadline)
+        action = ScheduledAction(service_id, strategy, prediction, region, now,
+                                 run_at, deadline, current, planned)
+        self.pending[action.key] = action
+        heapq.heappush(self.queue, (run_at, next(self.counter), action))
+
+        logger.info(f"🕒 Deferred {strategy} for {service_id} by "
+                    f"{(run_at - now) / 60:.0f} min ({current:.3f} → {planned:.3f} kg/kWh)")
+        return action
+
+    def cancel(self, service_id: str, strategy: str = None) -> int:
+        """Cancel pending actions for a service (optionally one strategy); returns count"""
+        keys = ([(service_id, strategy)] if strategy is not None
+                else [k for k in self.pending if k[0] == service_id])
+        cancelled = 0
+        for key in keys:
+            action = self.pending.pop(key, None)
+            if action is not None:
+                action.cancelled = True
+                cancelled += 1
+        return cancelled
+
+    def get(self, service_id: str, strategy: str) -> Optional[ScheduledAction]:
+        return self.pending.get((service_id, strategy))
+
+    def pending_for(self, service_id: str) -> List[ScheduledAction]:
+        """Every pending action of one service"""
+        return [action for key, action in self.pending.items() if key[0] == service_id]
+
+    def pop_due(self, now: float = None) -> List[ScheduledAction]:
+        """Remove and return every live action whose slot has started"""
+        now = self.clock() if now is None else now
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            _, _, action = heapq.heappop(self.queue)
+            if action.cancelled:
+                continue
+            self.pending.pop(action.key, None)
+            due.append(action)
+        self.compact()
+        return due
+
+    def compact(self):
+        """Rebuild the heap once cancelled entries dominate it"""
+        if len(self.queue) > 64 and len(self.queue) > 2 * len(self.pending):
+            self.queue = [entry for entry in self.queue if not entry[2].cancelled]
+            heapq.heapify(self.queue)
+
+    def __len__(self):
+        return len(self.pending)
+
+    def export(self) -> List[Dict]:
+        """Pending actions with their predictions, for persisting scheduler state"""
+        return [{**a.to_dict(), 'prediction': a.prediction} for a in self.pending.values()]
+
+    def restore(self, entries: List[Dict]):
+        """Replace the queue with previously exported actions (slots are kept, not re-planned)"""
+        self.queue.clear()
+        self.pending.clear()
+        for e in entries:
+            action = ScheduledAction(e['service_id'], e['strategy'], e.get('prediction', {}),
+                                     e['region'], e['requested_at'], e['run_at'], e['deadline'],
+                                     e['requested_intensity'], e['planned_intensity'])
+            self.pending[action.key] = action
+            self.queue.append((action.run_at, next(self.counter), action))
+        heapq.heapify(self.queue)
+
+    def get_pending(self, limit: int = 50) -> List[Dict]:
+        """Pending actions ordered by run time"""
+        ordered = sorted(self.pending.values(), key=lambda a: a.run_at)
+        return [a.to_dict() for a in ordered[:limit]]
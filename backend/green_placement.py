@@ -0,0 +1,212 @@
+"""
+Green Placement Engine - Picks migration targets for migrate_green from a local node inventory
+"""
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import yaml
+
+from agent.energy_model import CarbonIntensityTable
+from config.settings import YAML_LOADER, get_settings
+
+logger = logging.getLogger(__name__)
+
+RESOURCES = ['cpu', 'memory_gb']
+DEFAULT_DEMAND = {'cpu': 1.0, 'memory_gb': 1.0}
+
+
+class GreenPlacementEngine:
+    """Bin-packs migrating services onto nodes by a vectorized score.
+
+    For each candidate node the score rewards capacity headroom left after
+    placement and green zones, and penalises grid carbon intensity and
+    migration cost (including a cross-region penalty). The demand-independent
+    part of the score is memoized per (inventory version, carbon slot, source
+    region) and is only recomputed when the inventory file changes or the
+    forecast moves to a new slot. Reservations are applied immediately, so a
+    batch of migrations can never overcommit a node.
+    """
+
+    def __init__(self, nodes: List[Dict], green_zones: List[str] = (),
+                 carbon_table: CarbonIntensityTable = None,
+                 headroom_weight: float = 1.0, carbon_weight: float = 2.0,
+                 migration_weight: float = 1.0, green_bonus: float = 0.5,
+                 cross_region_cost: float = 0.3, slot_seconds: int = 900):
+        self.carbon_table = carbon_table or CarbonIntensityTable()
+        self.green_zones = set(green_zones)
+        self.headroom_weight = headroom_weight
+        self.carbon_weight = carbon_weight
+        self.migration_weight = migration_weight
+        self.green_bonus = green_bonus
+        self.cross_region_cost = cross_region_cost
+        self.slot_seconds = slot_seconds
+        self.inventory_path = None
+        self.inventory_mtime = None
+        self.version = 0
+        self.score_cache: Dict[tuple, np.ndarray] = {}
+        self.assignments: Dict[str, tuple] = {}  # service_id -> (node index, demand)
+        self.load_nodes(nodes)
+
+    @classmethod
+    def from_files(cls, inventory_path: str, config_path: str = "config/config.yaml",
+                   carbon_table: CarbonIntensityTable = None, **kwargs):
+        """Build the engine from the inventory file and cloud.green_zones in config"""
+        green_zones = list(get_settings(config_path).energy.green_zones)
+        engine = cls(read_inventory(inventory_path), green_zones, carbon_table, **kwargs)
+        engine.inventory_path = inventory_path
+        engine.inventory_mtime = os.path.getmtime(inventory_path)
+        return engine
+
+    def load_nodes(self, nodes: List[Dict]):
+        """Replace the inventory; invalidates memoized scores.
+
+        Live reservations move to the reloaded node of the same name; those on
+        nodes that left the inventory are dropped.
+        """
+        held = {sid: (self.node_names[i], need) for sid, (i, need) in self.assignments.items()}
+        self.node_names = [n['name'] for n in nodes]
+        self.node_index = {name: i for i, name in enumerate(self.node_names)}
+        self.regions = np.array([n['region'] for n in nodes], dtype=object)
+        # Resource arrays are (resource, node) so per-node reductions stay elementwise
+        self.capacity = np.array([[float(n.get(r, 0.0)) for n in nodes] for r in RESOURCES])
+        self.used = np.array([[float(n.get(f"{r}_used", 0.0)) for n in nodes] for r in RESOURCES])
+        self.free = self.capacity - self.used
+        self.inv_capacity = 1.0 / np.maximum(self.capacity, 1e-9)
+        self.migration_cost = np.array([float(n.get('migration_cost', 0.0)) for n in nodes])
+        self.green = np.array([n['region'] in self.green_zones for n in nodes], dtype=bool)
+        self.version += 1
+        self.score_cache.clear()
+        self.assignments.clear()
+        for service_id, (name, need) in held.items():
+            index = self.node_index.get(name)
+            if index is None:
+                logger.warning(f"⚠️ Node {name} left the inventory; dropped reservation of {service_id}")
+                continue
+            self.used[:, index] += need
+            self.free[:, index] -= need
+            self.assignments[service_id] = (index, need)
+        logger.info(f"🗺️ Placement inventory loaded: {len(nodes)} nodes, "
+                    f"{int(self.green.sum())} in green zones")
+
+    def refresh(self) -> bool:
+        """Reload the inventory file if it changed on disk (one stat when it did not)"""
+        if self.inventory_path is None:
+            return False
+        try:
+            mtime = os.path.getmtime(self.inventory_path)
+            if mtime == self.inventory_mtime:
+                return False
+            nodes = read_inventory(self.inventory_path)
+        except (OSError, yaml.YAMLError) as e:
+            logger.error(f"❌ Keeping current placement inventory, cannot read "
+                         f"{self.inventory_path}: {e}")
+            return False
+        self.inventory_mtime = mtime
+        self.load_nodes(nodes)
+        return True
+
+    def static_scores(self, source_region: str, now: float) -> np.ndarray:
+        """Demand-independent part of the score (green, carbon, migration cost)"""
+        key = (self.version, int(now // self.slot_seconds), source_region)
+        cached = self.score_cache.get(key)
+        if cached is not None:
+            return cached
+
+        intensity = self.carbon_table.lookup(self.regions, now)
+        peak = intensity.max() if len(intensity) and intensity.max() > 0 else 1.0
+        cost = self.migration_cost + self.cross_region_cost * (self.regions != source_region)
+        scores = (self.green_bonus * self.green
+                  - self.carbon_weight * intensity / peak
+                  - self.migration_weight * cost)
+        if len(self.score_cache) > 256:
+            self.score_cache.clear()
+        self.score_cache[key] = scores
+        return scores
+
+    def score(self, demand: Dict[str, float], source_region: str = None,
+              now: float = None) -> np.ndarray:
+        """Score every node for a demand vector; infeasible nodes score -inf"""
+        now = time.time() if now is None else now
+        free_after = self.free - demand_vector(demand)[:, None]
+        headroom = np.minimum.reduce(free_after * self.inv_capacity)
+        scores = self.static_scores(source_region, now) + self.headroom_weight * headroom
+        scores[np.minimum.reduce(free_after) < 0] = -np.inf
+        return scores
+
+    def place(self, service_id: str, demand: Dict[str, float] = None,
+              source_region: str = None, now: float = None) -> Optional[Dict]:
+        """Pick and reserve a target node; returns None when nothing fits"""
+        # Inventory edits apply to the healing path, not only to the nodes endpoint
+        self.refresh()
+        return self.assign(service_id, demand, source_region, now)
+
+    def assign(self, service_id: str, demand: Dict[str, float] = None,
+               source_region: str = None, now: float = None) -> Optional[Dict]:
+        """Reserve the best node against the inventory as loaded"""
+        demand = demand or DEFAULT_DEMAND
+        self.release(service_id)
+        scores = self.score(demand, source_region, now)
+        if not len(scores):
+            return None
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            logger.warning(f"🚫 No node can host {service_id} ({demand})")
+            return None
+
+        need = demand_vector(demand)
+        self.used[:, best] += need
+        self.free[:, best] -= need
+        self.assignments[service_id] = (best, need)
+        return {
+            'service_id': service_id,
+            'node': self.node_names[best],
+            'region': self.regions[best],
+            'green_zone': bool(self.green[best]),
+            'score': float(scores[best])
+        }
+
+    def place_batch(self, requests: List[Dict], now: float = None) -> List[Optional[Dict]]:
+        """Place many migrations, largest demand first; results follow input order"""
+        now = time.time() if now is None else now
+        # One inventory check per batch, so a reload cannot drop reservations made mid-batch
+        self.refresh()
+        size = [sum(r.get('demand', DEFAULT_DEMAND).get(k, DEFAULT_DEMAND[k]) for k in RESOURCES)
+                for r in requests]
+        results: List[Optional[Dict]] = [None] * len(requests)
+        for i in sorted(range(len(requests)), key=lambda i: -size[i]):
+            request = requests[i]
+            results[i] = self.assign(request['service_id'], request.get('demand'),
+                                     request.get('region'), now)
+        return results
+
+    def release(self, service_id: str):
+        """Free the capacity held by a previous placement of this service"""
+        assignment = self.assignments.pop(service_id, None)
+        if assignment is not None:
+            node, need = assignment
+            self.used[:, node] -= need
+            self.free[:, node] += need
+
+    def get_nodes(self) -> List[Dict]:
+        """Current inventory with live utilisation"""
+        return [{
+            'name': name,
+            'region': self.regions[i],
+            'green_zone': bool(self.green[i]),
+            **{r: float(self.capacity[j, i]) for j, r in enumerate(RESOURCES)},
+            **{f"{r}_used": float(self.used[j, i]) for j, r in enumerate(RESOURCES)}
+        } for i, name in enumerate(self.node_names)]
+
+
+def demand_vector(demand: Dict[str, float]) -> np.ndarray:
+    """Resource demand as an array in RESOURCES order"""
+    return np.array([float(demand.get(r, DEFAULT_DEMAND[r])) for r in RESOURCES])
+
+
+def read_inventory(path: str) -> List[Dict]:
+    """Read the node list from an inventory YAML file"""
+    with open(path) as f:
+        return (yaml.load(f, Loader=YAML_LOADER) or {}).get('nodes', [])
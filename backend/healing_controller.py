@@ -4,11 +4,23 @@ Healing Controller - Executes energy-aware recovery actions
 import asyncio
 import random
 import json
+import time
 from datetime import datetime
 from typing import Dict, List
 import logging
 from enum import Enum
 
+import numpy as np
+
+from agent.energy_model import DEFAULT_REGION, CarbonIntensityTable
+from agent.records import HealingEvent
+from backend.carbon_scheduler import CarbonAwareScheduler
+from backend.green_placement import GreenPlacementEngine
+from backend.orchestrator import Orchestrator
+from backend.strategy_learning import StrategyLearner
+from backend.strategy_optimizer import RECOVERY_PRIORS, STRATEGY_ORDER, StrategyOptimizer
+from config.settings import Settings, get_settings
+
 logger = logging.getLogger(__name__)
 
 class HealingStrategy(Enum):
@@ -21,21 +33,41 @@ class HealingStrategy(Enum):
     DO_NOTHING = "do_nothing"
 
 class HealingController:
-    def __init__(self):
+    def __init__(self, scheduler: CarbonAwareScheduler = None,
+                 carbon_table: CarbonIntensityTable = None,
+                 placement: GreenPlacementEngine = None,
+                 orchestrator: Orchestrator = None, settings: Settings = None):
         self.strategies = [s.value for s in HealingStrategy]
         self.healing_history = []
         self.energy_savings_total = 0.0
+        self.carbon_reduced_total = 0.0
         
-        # Energy impact of each strategy (kWh saved)
-        self.energy_impact = {
-            'scale_up': -0.3,      # Uses more energy
-            'scale_down': 0.25,    # Saves energy
-            'migrate_green': 0.4,  # Significant savings
-            'restart': 0.1,        # Small saving
-            'throttle': 0.35,      # Good saving
-            'optimize': 0.2,       # Moderate saving
-            'do_nothing': 0.0      # No change
-        }
+        # Deferrable actions go through the scheduler when one is configured
+        self.scheduler = scheduler
+        if carbon_table is None:
+            carbon_table = (scheduler.carbon_table if scheduler is not None
+                            else CarbonIntensityTable())
+        self.carbon_table = carbon_table
+        
+        # Picks target nodes for migrate_green when an inventory is configured
+        self.placement = placement
+        
+        # Applies actions to a real or fake cluster; None keeps the built-in simulation
+        self.orchestrator = orchestrator
+        
+        # Cluster mapping, energy impact (kWh saved) and typical execution time (s)
+        # of each strategy come from healing.* in config.yaml
+        self.settings = settings or get_settings()
+        healing = self.settings.healing
+        self.energy_impact = dict(healing.energy_impact)
+        self.execution_times = dict(healing.execution_times)
+        
+        # Chooses actions across all at-risk services each cycle
+        self.optimizer = StrategyOptimizer(healing.energy_by_strategy, healing.time_by_strategy)
+        
+        # Learns per-(cluster, strategy) outcomes and feeds them back into selection
+        self.learner = StrategyLearner(STRATEGY_ORDER, RECOVERY_PRIORS,
+                                       self.execution_times, self.energy_impact)
     
     async def initialize(self):
         """Initialize healing controller"""
@@ -43,45 +75,174 @@ class HealingController:
         logger.info(f"Available strategies: {', '.join(self.strategies)}")
         return True
     
-    async def execute_healing(self, service_id: str, prediction: Dict) -> Dict:
-        """Execute healing action for a service"""
+    def apply_settings(self, settings: Settings):
+        """Switch to reloaded healing settings (subscribed to the config watcher)"""
+        self.settings = settings
+        self.energy_impact = dict(settings.healing.energy_impact)
+        self.execution_times = dict(settings.healing.execution_times)
+        # New priors only replace estimates that have no observed outcomes yet
+        self.learner.set_priors(self.execution_times, self.energy_impact)
+        self.optimizer.set_costs(settings.healing.energy_by_strategy, settings.healing.time_by_strategy)
+        self.optimizer.set_recovery(self.learner.success, self.learner.execution_time)
+        logger.info("⚙️ Healing settings updated")
+    
+    def plan_cycle(self, predictions: Dict[str, Dict], node_capacity: Dict[str, float] = None,
+                   energy_budget: float = None, max_actions: int = None) -> List[Dict]:
+        """Choose one action per at-risk service under node capacity and energy budget"""
+        at_risk = {sid: p for sid, p in predictions.items() if p.get('will_fail', True)}
+        self.optimizer.update(at_risk)
+        plan = self.optimizer.solve(node_capacity=node_capacity, energy_budget=energy_budget,
+                                    max_actions=max_actions)
+        if plan:
+            logger.info(f"🧮 Planned {len(plan)} healing actions for {len(at_risk)} at-risk services")
+        return plan
+    
+    async def execute_healing(self, service_id: str, prediction: Dict, defer: bool = True,
+                              strategy: str = None) -> Dict:
+        """Execute healing action for a service (strategy from plan_cycle, or by cluster)"""
         logger.info(f"🚀 Executing healing for service: {service_id}")
         
         # Determine optimal strategy based on prediction cluster
-        strategy = self.determine_strategy(prediction)
+        if strategy is None:
+            strategy = self.determine_strategy(prediction)
+        region = prediction.get('region', DEFAULT_REGION)
         
+        # Energy-only actions wait for a greener slot when one is forecast
+        if defer and self.scheduler is not None and self.scheduler.is_deferrable(strategy):
+            action = self.scheduler.schedule(service_id, strategy, prediction, region)
+            if action.run_at > action.requested_at:
+                return {
+                    'success': True,
+                    'deferred': True,
+                    'strategy': strategy,
+                    'energy_saved': 0.0,
+                    'carbon_reduced': 0.0,
+                    'scheduled_for': datetime.fromtimestamp(action.run_at).isoformat(),
+                    'message': f"Healing action '{strategy}' deferred to a lower-carbon slot"
+                }
+            # The greenest slot is now: run immediately
+            self.scheduler.cancel(service_id, strategy)
+        
+        return await self.run_strategy(service_id, prediction, strategy, region)
+    
+    def has_deferred(self, service_id: str) -> bool:
+        """Whether the service has an action waiting in the scheduler"""
+        return self.scheduler is not None and bool(self.scheduler.pending_for(service_id))
+    
+    def deferred_services(self) -> List[str]:
+        """Services with an action waiting in the scheduler"""
+        if self.scheduler is None:
+            return []
+        return list({service_id for service_id, _ in self.scheduler.pending})
+    
+    def preempt_deferred(self, service_id: str, strategy: str) -> bool:
+        """Cancel a service's deferred actions so an urgent strategy can run now.
+
+        Returns False (nothing cancelled) when the strategy is itself deferrable.
+        """
+        if self.scheduler is None or self.scheduler.is_deferrable(strategy):
+            return False
+        cancelled = self.scheduler.cancel(service_id)
+        if cancelled:
+            logger.info(f"⏩ {strategy} for {service_id} preempts {cancelled} deferred action(s)")
+        return cancelled > 0
+    
+    async def run_due_actions(self) -> List:
+        """Execute deferred actions whose slot has started; returns (action, result) pairs"""
+        if self.scheduler is None:
+            return []
+        due = self.scheduler.pop_due()
+        results = await asyncio.gather(*(
+            self.run_strategy(a.service_id, a.prediction, a.strategy, a.region,
+                              requested_at=a.requested_at,
+                              requested_intensity=a.requested_intensity)
+            for a in due
+        ))
+        return list(zip(due, results))
+    
+    async def run_strategy(self, service_id: str, prediction: Dict, strategy: str,
+                           region: str = DEFAULT_REGION, requested_at: float = None,
+                           requested_intensity: float = None) -> Dict:
+        """Run a chosen strategy now and record its outcome"""
         # Calculate expected energy savings
         expected_saving = self.energy_impact.get(strategy, 0.0)
         
         try:
-            # Simulate healing action execution
-            success, execution_time = await self.simulate_healing_action(strategy)
+            # Green migrations need a target node with headroom
+            target = None
+            if strategy == HealingStrategy.MIGRATE_GREEN.value and self.placement is not None:
+                target = self.placement.place(service_id, prediction.get('resources'), region)
+                if target is None:
+                    raise RuntimeError("no node has capacity for the migration")
+            
+            # Apply the action through the orchestrator, or simulate it
+            if self.orchestrator is not None:
+                success, execution_time = await self.orchestrator.execute(
+                    strategy, service_id, target_node=target['node'] if target else None
+                )
+            else:
+                success, execution_time = await self.simulate_healing_action(strategy)
+            cluster = prediction.get('cluster', 0)
+            
+            if not success:
+                if target is not None:
+                    self.placement.release(service_id)
+                self.record_outcome(cluster, strategy, False, execution_time, 0.0)
+                self.healing_history.append(HealingEvent(
+                    timestamp=time.time(),
+                    service_id=service_id,
+                    strategy=strategy,
+                    prediction_cluster=cluster,
+                    prediction_probability=prediction.get('probability', 0),
+                    expected_energy_saving=expected_saving,
+                    actual_energy_saving=0.0,
+                    execution_time_seconds=execution_time,
+                    status='failed',
+                    region=region,
+                    carbon_reduction_kg=0.0
+                ))
+                logger.warning(f"⚠️ Healing action {strategy} did not recover {service_id}")
             
             if success:
                 # Calculate actual savings (with some randomness)
                 actual_saving = expected_saving * random.uniform(0.8, 1.2)
                 self.energy_savings_total += max(actual_saving, 0)
+                self.record_outcome(cluster, strategy, True, execution_time, actual_saving)
+                
+                # Carbon follows the grid intensity where and when the action actually ran
+                if target is not None:
+                    region = target['region']
+                executed_at = time.time()
+                intensity = self.carbon_table.intensity_at(region, executed_at)
+                carbon_reduction = actual_saving * intensity
+                self.carbon_reduced_total += max(carbon_reduction, 0)
                 
                 # Log the action
-                healing_record = {
-                    'timestamp': datetime.now().isoformat(),
-                    'service_id': service_id,
-                    'strategy': strategy,
-                    'prediction_cluster': prediction.get('cluster', 0),
-                    'prediction_probability': prediction.get('probability', 0),
-                    'expected_energy_saving': expected_saving,
-                    'actual_energy_saving': actual_saving,
-                    'execution_time_seconds': execution_time,
-                    'status': 'success',
-                    'carbon_reduction_kg': actual_saving * 0.233  # kg CO2 per kWh
-                }
+                healing_record = HealingEvent(
+                    timestamp=executed_at,
+                    service_id=service_id,
+                    strategy=strategy,
+                    prediction_cluster=cluster,
+                    prediction_probability=prediction.get('probability', 0),
+                    expected_energy_saving=expected_saving,
+                    actual_energy_saving=actual_saving,
+                    execution_time_seconds=execution_time,
+                    status='success',
+                    region=region,
+                    target_node=target['node'] if target else None,
+                    carbon_intensity=intensity,
+                    requested_carbon_intensity=(intensity if requested_intensity is None
+                                                else requested_intensity),
+                    deferred_seconds=0.0 if requested_at is None else executed_at - requested_at,
+                    carbon_reduction_kg=carbon_reduction
+                )
                 
                 self.healing_history.append(healing_record)
                 
                 logger.info(
                     f"✅ Healing successful for {service_id}: {strategy} "
                     f"(Saved {actual_saving:.2f} kWh, "
-                    f"Reduced {healing_record['carbon_reduction_kg']:.2f} kg CO2)"
+                    f"Reduced {healing_record.carbon_reduction_kg:.2f} kg CO2)"
                 )
                 
                 return {
@@ -89,7 +250,8 @@ class HealingController:
                     'strategy': strategy,
                     'energy_saved': actual_saving,
                     'execution_time': execution_time,
-                    'carbon_reduced': healing_record['carbon_reduction_kg'],
+                    'carbon_reduced': healing_record.carbon_reduction_kg,
+                    'target_node': healing_record.target_node,
                     'message': f"Healing action '{strategy}' executed successfully"
                 }
             
@@ -108,37 +270,60 @@ class HealingController:
         """Determine the best healing strategy based on prediction"""
         cluster = prediction.get('cluster', 0)
         
-        # Map clusters to strategies
-        cluster_strategy_map = {
-            1: HealingStrategy.SCALE_UP,      # Resource exhaustion
-            2: HealingStrategy.MIGRATE_GREEN, # Energy spike
-            3: HealingStrategy.OPTIMIZE,      # Network issues
-            4: HealingStrategy.RESTART,       # High error rate
-            5: HealingStrategy.THROTTLE       # General degradation
-        }
+        # Map clusters to strategies (healing.cluster_mapping, precomputed as a tuple)
+        healing = self.settings.healing
         
-        strategy = cluster_strategy_map.get(cluster, HealingStrategy.DO_NOTHING)
+        # Once outcomes have been observed for a cluster, learned estimates take over
+        if (cluster in healing.cluster_mapping and cluster < len(self.learner.cluster_totals)
+                and self.learner.cluster_totals[cluster] > 0):
+            return self.learner.best_strategy(cluster, exclude=[HealingStrategy.DO_NOTHING.value])
         
-        # For energy spikes (cluster 2), prioritize green migration
-        if cluster == 2:
-            return HealingStrategy.MIGRATE_GREEN.value
-        
-        return strategy.value
+        return healing.strategy_for(cluster)
+    
+    def record_outcome(self, cluster: int, strategy: str, success: bool,
+                       execution_time: float, energy_saving: float):
+        """Update learned strategy estimates and push them to the optimizer"""
+        self.learner.record(cluster, strategy, success, execution_time, energy_saving)
+        self.optimizer.set_recovery(self.learner.success, self.learner.execution_time)
+    
+    def get_strategy_estimates(self, cluster: int = None) -> List[Dict]:
+        """Learned success rate, execution time and energy saving per (cluster, strategy)"""
+        return self.learner.get_estimates(cluster)
+    
+    def export_state(self, history_limit: int = 500) -> Dict:
+        """Snapshot of everything a standby needs to take over without a cold start"""
+        learner = self.learner
+        return {
+            'healing_history': [h.to_dict() for h in self.healing_history[-history_limit:]],
+            'energy_savings_total': self.energy_savings_total,
+            'carbon_reduced_total': self.carbon_reduced_total,
+            'learner': {
+                'success': learner.success.tolist(),
+                'execution_time': learner.execution_time.tolist(),
+                'energy_saving': learner.energy_saving.tolist(),
+                'counts': learner.counts.tolist(),
+                'cluster_totals': learner.cluster_totals.tolist()
+            },
+            'deferred': self.scheduler.export() if self.scheduler is not None else []
+        }
+    
+    def restore_state(self, state: Dict):
+        """Load a snapshot written by export_state (e.g. by the previous leader)"""
+        self.healing_history = [HealingEvent.from_dict(h) for h in state.get('healing_history', [])]
+        self.energy_savings_total = state.get('energy_savings_total', 0.0)
+        self.carbon_reduced_total = state.get('carbon_reduced_total', 0.0)
+        learned = state.get('learner')
+        if learned:
+            for name, values in learned.items():
+                current = getattr(self.learner, name)
+                current[...] = np.asarray(values, dtype=current.dtype).reshape(current.shape)
+            self.optimizer.set_recovery(self.learner.success, self.learner.execution_time)
+        if self.scheduler is not None:
+            self.scheduler.restore(state.get('deferred', []))
     
     async def simulate_healing_action(self, strategy: str):
         """Simulate healing action execution"""
-        # Simulate different execution times
-        execution_times = {
-            'scale_up': 2.5,
-            'scale_down': 1.5,
-            'migrate_green': 5.0,
-            'restart': 3.0,
-            'throttle': 1.0,
-            'optimize': 4.0,
-            'do_nothing': 0.1
-        }
-        
-        execution_time = execution_times.get(strategy, 2.0)
+        execution_time = self.execution_times.get(strategy, 2.0)
         
         # Simulate execution with 90% success rate
         await asyncio.sleep(execution_time)
@@ -146,29 +331,29 @@ class HealingController:
         
         return success, execution_time
     
-    def get_healing_history(self, service_id: str = None, limit: int = 50):
-        """Get healing history"""
+    def get_healing_history(self, service_id: str = None, limit: int = 50) -> List[Dict]:
+        """Get healing history, as dicts"""
         if service_id:
-            history = [h for h in self.healing_history if h['service_id'] == service_id]
+            history = [h for h in self.healing_history if h.service_id == service_id]
         else:
             history = self.healing_history
         
-        return history[-limit:]
+        return [h.to_dict() for h in history[-limit:]]
     
     def get_statistics(self) -> Dict:
         """Get healing controller statistics"""
         if not self.healing_history:
             return {}
         
-        successful_actions = [h for h in self.healing_history if h['status'] == 'success']
+        successful_actions = [h for h in self.healing_history if h.status == 'success']
         
         return {
             'total_actions': len(self.healing_history),
             'successful_actions': len(successful_actions),
             'success_rate': len(successful_actions) / max(1, len(self.healing_history)),
             'total_energy_saved_kwh': self.energy_savings_total,
-            'total_carbon_reduced_kg': self.energy_savings_total * 0.233,
-            'average_execution_time': sum(h['execution_time_seconds'] 
+            'total_carbon_reduced_kg': self.carbon_reduced_total,
+            'average_execution_time': sum(h.execution_time_seconds 
                                          for h in self.healing_history) / len(self.healing_history),
             'most_used_strategy': self.get_most_used_strategy()
         }
@@ -178,5 +363,5 @@ class HealingController:
         if not self.healing_history:
             return 'none'
         
-        strategies = [h['strategy'] for h in self.healing_history]
+        strategies = [h.strategy for h in self.healing_history]
         return max(set(strategies), key=strategies.count)
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""
+Leader Election - Single active healing controller across replicas, with warm standbys
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional
+
+from backend.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class LeaseUnavailable(Exception):
+    """The lease store could not be read or written (e.g. busy); leadership is unknown"""
+
+
+class LockBackend(ABC):
+    """Leadership lease storage. acquire() must be atomic across processes"""
+
+    @abstractmethod
+    def acquire(self, holder: str, ttl: float) -> Optional[int]:
+        """Take or renew the lease; returns a fencing token, or None if someone else holds it.
+
+        Raises LeaseUnavailable when the store cannot be reached, which is not
+        the same as losing the lease.
+        """
+
+    @abstractmethod
+    def release(self, holder: str):
+        """Give up the lease if held by `holder`"""
+
+    @abstractmethod
+    def leader(self) -> Optional[str]:
+        """Current lease holder, if any"""
+
+
+class SQLiteLockBackend(LockBackend):
+    """Lease row in a SQLite database; expired leases can be taken over"""
+
+    def __init__(self, path: str, name: str = "healing-controller", clock=time.time):
+        self.path = path
+        self.name = name
+        self.clock = clock
+        self.ready = False  # The database file is created on first use, not at construction
+
+    def connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        if not self.ready:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""CREATE TABLE IF NOT EXISTS leader_leases (
+                name TEXT PRIMARY KEY, holder TEXT NOT NULL,
+                expires_at REAL NOT NULL, token INTEGER NOT NULL)""")
+            self.ready = True
+        return db
+
+    def acquire(self, holder: str, ttl: float) -> Optional[int]:
+        now = self.clock()
+        try:
+            db = self.connect()
+        except sqlite3.OperationalError as e:
+            raise LeaseUnavailable(str(e)) from e
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT holder, expires_at, token FROM leader_leases WHERE name = ?",
+                             (self.name,)).fetchone()
+            if row is not None and row[0] != holder and row[1] > now:
+                db.execute("ROLLBACK")
+                return None
+            # A new holder bumps the fencing token; renewals keep it
+            token = 1 if row is None else row[2] + (row[0] != holder)
+            db.execute("INSERT OR REPLACE INTO leader_leases VALUES (?, ?, ?, ?)",
+                       (self.name, holder, now + ttl, token))
+            db.execute("COMMIT")
+            return token
+        except sqlite3.OperationalError as e:
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise LeaseUnavailable(str(e)) from e
+        finally:
+            db.close()
+
+    def release(self, holder: str):
+        with self.connect() as db:
+            db.execute("DELETE FROM leader_leases WHERE name = ? AND holder = ?", (self.name, holder))
+
+    def leader(self) -> Optional[str]:
+        if not self.ready and not os.path.exists(self.path):
+            return None
+        with self.connect() as db:
+            row = db.execute("SELECT holder, expires_at FROM leader_leases WHERE name = ?",
+                             (self.name,)).fetchone()
+        return row[0] if row is not None and row[1] > self.clock() else None
+
+
+class FileLockBackend(LockBackend):
+    """OS advisory lock on a local file; released automatically if the process dies"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.handle = None
+        self.token = None
+
+    def acquire(self, holder: str, ttl: float) -> Optional[int]:
+        if self.handle is not None:
+            return self.token
+        handle = open(self.path, 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            handle.close()
+            return None
+        handle.seek(0)
+        previous = handle.read().split()
+        self.token = (int(previous[1]) if len(previous) > 1 else 0) + 1
+        handle.seek(0)
+        handle.truncate()
+        handle.write(f"{holder} {self.token}\n")
+        handle.flush()
+        self.handle = handle
+        return self.token
+
+    def release(self, holder: str):
+        if self.handle is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+        else:
+            self.handle.seek(0)
+            msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+        self.handle.close()
+        self.handle = None
+
+    def leader(self) -> Optional[str]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            content = f.read().split()
+        return content[0] if content else None
+
+
+class ControllerStateStore:
+    """Latest controller snapshot in SQLite, written by the leader and read by standbys"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ready = False  # The database file is created by the first save, not at construction
+
+    def connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=5.0)
+        if not self.ready:
+            db.execute("""CREATE TABLE IF NOT EXISTS controller_state (
+                name TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)""")
+            self.ready = True
+        return db
+
+    def save(self, name: str, state: Dict):
+        with self.connect() as db:
+            db.execute("INSERT OR REPLACE INTO controller_state VALUES (?, ?, ?)",
+                       (name, dumps(state).decode('utf-8'), time.time()))
+        db.close()
+
+    def load(self, name: str) -> Optional[Dict]:
+        if not self.ready and not os.path.exists(self.path):
+            return None
+        with self.connect() as db:
+            row = db.execute("SELECT state FROM controller_state WHERE name = ?", (name,)).fetchone()
+        db.close()
+        return json.loads(row[0]) if row else None
+
+
+class LeaderElector:
+    """Keeps trying to hold the lease; fires callbacks on gaining and losing leadership.
+
+    If the lease store is briefly unavailable, the leader keeps leading until
+    its last successful lease would have expired; nobody else can take the
+    lease before then. on_elected (restoring the previous leader's snapshot)
+    only fires when the lease changed hands, not when this replica takes back
+    its own lease after a lapse.
+    """
+
+    def __init__(self, backend: LockBackend, holder: str = None, ttl: float = 15.0,
+                 renew_interval: float = 5.0, on_elected: Callable = None,
+                 on_demoted: Callable = None, clock=time.time):
+        self.backend = backend
+        self.holder = holder or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.clock = clock
+        self.token: Optional[int] = None
+        self.last_token: Optional[int] = None  # Token of the last lease this replica held
+        self.lease_expires = 0.0
+
+    @property
+    def is_leader(self) -> bool:
+        return self.token is not None
+
+    def step(self) -> bool:
+        """One acquire/renew attempt; returns whether this replica leads"""
+        was_leader = self.is_leader
+        attempted = self.clock()
+        try:
+            self.token = self.backend.acquire(self.holder, self.ttl)
+        except LeaseUnavailable as e:
+            if was_leader and attempted < self.lease_expires:
+                logger.warning(f"⚠️ Lease renewal failed ({e}); still leading for "
+                               f"{self.lease_expires - attempted:.1f}s")
+                return True
+            logger.warning(f"⚠️ Lease update failed: {e}")
+            self.token = None
+        if self.is_leader:
+            # The store sets expiry from its own clock, no earlier than this
+            self.lease_expires = attempted + self.ttl
+            if not was_leader:
+                reacquired = self.token == self.last_token
+                logger.info(f"👑 {self.holder} elected healing leader (token {self.token}"
+                            f"{', own lease re-acquired' if reacquired else ''})")
+                # Nobody else led in between, so the live state is newer than any snapshot
+                if self.on_elected and not reacquired:
+                    self.on_elected()
+            self.last_token = self.token
+        elif was_leader:
+            logger.warning(f"⚠️ {self.holder} lost healing leadership")
+            if self.on_demoted:
+                self.on_demoted()
+        return self.is_leader
+
+    async def run(self):
+        """Renew every renew_interval until cancelled, then release the lease"""
+        try:
+            while True:
+                self.step()
+                await asyncio.sleep(self.renew_interval)
+        finally:
+            if self.is_leader:
+                self.backend.release(self.holder)
+                self.token = None
+
+    def get_status(self) -> Dict:
+        return {
+            'holder': self.holder,
+            'is_leader': self.is_leader,
+            'token': self.token,
+            'leader': self.backend.leader()
+        }
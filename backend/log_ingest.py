@@ -0,0 +1,320 @@
+"""
+Log Ingest - Streaming parser, byte-offset index and event extraction for the Spring backend logs
+
+Usage:
+    python backend/log_ingest.py ingest --workers 4
+    python backend/log_ingest.py search --start 2025-12-30T16:00+05:30 --end 2025-12-30T18:00+05:30 --level WARN
+"""
+import argparse
+import codecs
+import gzip
+import io
+import logging
+import os
+import re
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# ---------- FIX PYTHON PATH ----------
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+# --------------------------------------
+
+from backend.metrics_store import DEFAULT_DB_PATH, MetricsStore, migrate, to_millis
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_PATHS = [
+    str(root_dir / "backend" / "logs"),
+    str(root_dir / "backend" / "log.txt"),
+    str(root_dir / "backend" / "errorlog.txt")
+]
+DEFAULT_INDEX_PATH = str(root_dir / "backend" / "data" / "log_index.db")
+
+# 2025-12-30T16:36:03.982+05:30  WARN 13388 --- [energy-recovery-backend] [main] c.s.e.Logger : message
+# (older Spring Boot versions omit the [application] block and pad the thread name)
+# Literal spaces and a greedy [^\r\n]* tail keep matching at ~2 us/line (no backtracking at $)
+LINE_RE = re.compile(
+    rb"(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d+)?(?:[+-]\d\d:\d\d|Z)?) +"
+    rb"(TRACE|DEBUG|INFO|WARN|ERROR|FATAL) +(\d+) --- "
+    rb"(?:\[[^\]]*\] +)?\[ *([^\]]*)\] +(\S+) *: ([^\r\n]*)"
+)
+
+# HealingService.executeAction console output -> action names used by the Spring API
+HEALING_RE = re.compile(
+    r"(Restarting service|Scaling DOWN for energy saving|Pre-scaling for predicted load|"
+    r"Energy stable — no change for): *(\S+)"
+)
+HEALING_ACTIONS = {
+    "Restarting service": "RESTART_SERVICE",
+    "Scaling DOWN for energy saving": "ENERGY_SCALE_DOWN",
+    "Pre-scaling for predicted load": "ENERGY_SCALE_UP",
+    "Energy stable — no change for": "ENERGY_STABLE"
+}
+ALERT_LEVELS = {b"WARN", b"ERROR", b"FATAL"}
+HEALING_MARKERS = tuple(action.encode() for action in HEALING_ACTIONS)
+
+INDEX_STRIDE = 64 * 1024   # one (timestamp, offset) index entry per 64 KiB of log
+EVENT_BATCH = 5000
+
+Record = Tuple[int, int, str, int, str, str, str]  # offset, ts ms, level, pid, thread, logger, msg
+
+
+def parse_timestamp(raw: bytes) -> int:
+    """Epoch ms of a Spring ISO-8601 timestamp (naive timestamps are read as local time)"""
+    return to_millis(datetime.fromisoformat(raw.decode().replace("Z", "+00:00")))
+
+
+def is_utf16(path: str) -> bool:
+    """Maven console captures on Windows (log.txt, errorlog.txt) are UTF-16 with a BOM"""
+    with open(path, "rb") as f:
+        return f.read(2) in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+
+def iter_lines(path: str, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """(offset, line) pairs from `start`, one line in memory at a time.
+
+    Offsets are positions in the decoded stream: file bytes for plain
+    logs, decompressed bytes for .gz (seek decompresses forward without
+    buffering), and UTF-8 re-encoded bytes for UTF-16 captures.
+    """
+    if path.endswith(".gz"):
+        stream = gzip.open(path, "rb")
+    elif is_utf16(path):
+        stream = None
+    else:
+        stream = open(path, "rb")
+
+    if stream is None:
+        offset = 0
+        with io.open(path, encoding="utf-16", errors="replace", newline="") as text:
+            for line in text:
+                data = line.encode("utf-8")
+                if offset >= start:
+                    yield offset, data
+                offset += len(data)
+        return
+
+    with stream:
+        stream.seek(start)
+        offset = start
+        for line in stream:
+            yield offset, line
+            offset += len(line)
+
+
+class LogIndex:
+    """Per-file progress and sparse (timestamp, byte offset) index in SQLite"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        with self.connect() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS log_files (
+                path TEXT PRIMARY KEY, size INTEGER, mtime REAL, indexed_offset INTEGER,
+                lines INTEGER, events INTEGER, first_ts INTEGER, last_ts INTEGER, last_pid INTEGER)""")
+            # Index files written before last_pid was tracked
+            columns = {row[1] for row in db.execute("PRAGMA table_info(log_files)")}
+            if 'last_pid' not in columns:
+                db.execute("ALTER TABLE log_files ADD COLUMN last_pid INTEGER")
+            db.execute("""CREATE TABLE IF NOT EXISTS log_offsets (
+                path TEXT NOT NULL, timestamp INTEGER NOT NULL, offset INTEGER NOT NULL,
+                PRIMARY KEY (path, offset)) WITHOUT ROWID""")
+            db.execute("CREATE INDEX IF NOT EXISTS idx_log_offsets_ts ON log_offsets (path, timestamp)")
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30.0)
+
+    def file_state(self, path: str) -> Optional[Dict]:
+        with self.connect() as db:
+            db.row_factory = sqlite3.Row
+            row = db.execute("SELECT * FROM log_files WHERE path = ?", (path,)).fetchone()
+        return dict(row) if row else None
+
+    def files(self) -> List[Dict]:
+        with self.connect() as db:
+            db.row_factory = sqlite3.Row
+            return [dict(r) for r in db.execute("SELECT * FROM log_files ORDER BY first_ts")]
+
+    def seek_offset(self, path: str, start_ms: int) -> int:
+        """Offset of the last indexed line before start_ms (0 if none)"""
+        with self.connect() as db:
+            row = db.execute("SELECT MAX(offset) FROM log_offsets WHERE path = ? AND timestamp < ?",
+                             (path, start_ms)).fetchone()
+        return row[0] or 0
+
+    def search(self, start=None, end=None, level: str = None,
+               contains: str = None) -> Iterator[Record]:
+        """Parsed lines in [start, end) across indexed files, seeking past earlier data"""
+        start_ms = to_millis(start) if start is not None else -2 ** 62
+        end_ms = to_millis(end) if end is not None else 2 ** 62
+        wanted_level = level.encode() if level else None
+        needle = contains.encode() if contains else None
+        for state in self.files():
+            if state['first_ts'] is None or state['last_ts'] < start_ms or state['first_ts'] >= end_ms:
+                continue
+            for offset, line in iter_lines(state['path'], self.seek_offset(state['path'], start_ms)):
+                match = LINE_RE.match(line)
+                if match is None:
+                    continue
+                timestamp = parse_timestamp(match.group(1))
+                if timestamp >= end_ms:
+                    break
+                if timestamp < start_ms or (wanted_level and match.group(2) != wanted_level):
+                    continue
+                if needle and needle not in line:
+                    continue
+                yield (offset, timestamp, match.group(2).decode(), int(match.group(3)),
+                       match.group(4).decode(errors="replace").strip(),
+                       match.group(5).decode(errors="replace"),
+                       match.group(6).decode(errors="replace"))
+
+
+def ingest_file(path: str, index_path: str = DEFAULT_INDEX_PATH,
+                db_path: str = DEFAULT_DB_PATH) -> Dict:
+    """Index one log file and store its healing/alert events (runs in a worker process).
+
+    Rotated .gz files are immutable and skipped once indexed; an
+    append-only active log resumes from its last indexed offset unless it
+    shrank (rotation), in which case it is re-indexed from the start. A
+    trailing line of an active log without its newline may still be being
+    written, so it is left for the next run.
+    """
+    index = LogIndex(index_path)
+    store = MetricsStore(db_path, auto_migrate=False)
+    stat = os.stat(path)
+    state = index.file_state(path)
+    start = 0
+    if state is not None:
+        if state['size'] == stat.st_size and state['mtime'] == stat.st_mtime:
+            store.close()
+            return {'path': path, 'lines': 0, 'events': 0, 'skipped': True}
+        if not path.endswith(".gz") and stat.st_size > state['size']:
+            start = state['indexed_offset']
+    source = os.path.basename(path)
+
+    lines = events_added = 0
+    first_ts = state['first_ts'] if start and state else None
+    last_ts = state['last_ts'] if start and state else None
+    # Timestamps are only parsed for index entries and events, not for every line
+    last_match = None
+    # Timestamp and pid of the last line before the resume point, for healing lines right after it
+    resumed = (state['last_ts'], state['last_pid']) if start and state else (None, None)
+    complete = path.endswith(".gz")
+    end_offset = start
+    next_index_at = start
+    offsets: List[Tuple[str, int, int]] = []
+    events: List[Tuple] = []
+
+    for offset, line in iter_lines(path, start):
+        if not complete and not line.endswith(b"\n"):
+            break
+        lines += 1
+        end_offset = offset + len(line)
+        match = LINE_RE.match(line)
+        if match is None:
+            # HealingService prints to stdout, so its lines carry no timestamp of their own
+            if any(marker in line for marker in HEALING_MARKERS):
+                timestamp, pid = ((parse_timestamp(last_match.group(1)), int(last_match.group(3)))
+                                  if last_match is not None else resumed)
+                message = line.decode("utf-8", errors="replace").strip()
+                healing = HEALING_RE.search(message)
+                if healing and timestamp is not None and pid is not None:
+                    events.append((timestamp, 'healing', None, pid, healing.group(2),
+                                   HEALING_ACTIONS[healing.group(1)], None, message, source))
+            continue
+        last_match = match
+        if first_ts is None:
+            first_ts = parse_timestamp(match.group(1))
+        if offset >= next_index_at:
+            offsets.append((path, parse_timestamp(match.group(1)), offset))
+            next_index_at = offset + INDEX_STRIDE
+        level = match.group(2)
+        if level in ALERT_LEVELS:
+            events.append((parse_timestamp(match.group(1)), 'alert', level.decode(),
+                           int(match.group(3)), None, None, match.group(5).decode(errors="replace"),
+                           match.group(6).decode("utf-8", errors="replace"), source))
+        if len(events) >= EVENT_BATCH:
+            events_added += store.insert_log_events(events)
+            events.clear()
+    if events:
+        events_added += store.insert_log_events(events)
+    store.close()
+    last_pid = resumed[1]
+    if last_match is not None:
+        last_ts = parse_timestamp(last_match.group(1))
+        last_pid = int(last_match.group(3))
+
+    with index.connect() as db:
+        if start == 0:
+            db.execute("DELETE FROM log_offsets WHERE path = ?", (path,))
+        db.executemany("INSERT OR REPLACE INTO log_offsets VALUES (?, ?, ?)", offsets)
+        db.execute("INSERT OR REPLACE INTO log_files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                   (path, stat.st_size, stat.st_mtime, end_offset,
+                    lines + (state['lines'] if start and state else 0),
+                    events_added + (state['events'] if start and state else 0), first_ts, last_ts,
+                    last_pid))
+    return {'path': path, 'lines': lines, 'events': events_added, 'skipped': False}
+
+
+def discover(paths: List[str]) -> List[str]:
+    """Log files under the given files/directories, largest first for better load balance"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in os.listdir(path)
+                         if ".log" in name or name.endswith((".txt", ".gz")))
+        elif os.path.exists(path):
+            files.append(path)
+    return sorted(files, key=os.path.getsize, reverse=True)
+
+
+def ingest(paths: List[str] = None, workers: int = None, index_path: str = DEFAULT_INDEX_PATH,
+           db_path: str = DEFAULT_DB_PATH) -> List[Dict]:
+    """Ingest every log file, one file per worker process"""
+    files = discover(paths or DEFAULT_LOG_PATHS)
+    migrate(db_path)
+    LogIndex(index_path)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+    if workers == 1:
+        results = [ingest_file(f, index_path, db_path) for f in files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(ingest_file, files, [index_path] * len(files),
+                                    [db_path] * len(files)))
+    logger.info(f"📜 Ingested {sum(r['lines'] for r in results)} log lines from {len(files)} files, "
+                f"{sum(r['events'] for r in results)} new events")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Spring backend log ingest and search")
+    parser.add_argument('command', choices=['ingest', 'search'])
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH)
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    parser.add_argument('--start', type=datetime.fromisoformat)
+    parser.add_argument('--end', type=datetime.fromisoformat)
+    parser.add_argument('--level')
+    parser.add_argument('--contains')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'ingest':
+        for result in ingest(args.paths, args.workers, args.index, args.db):
+            print(f"{result['path']}: {result['lines']} lines, {result['events']} events"
+                  f"{' (unchanged)' if result['skipped'] else ''}")
+        return
+    index = LogIndex(args.index)
+    for _, timestamp, level, pid, thread, name, message in index.search(
+            args.start, args.end, args.level, args.contains):
+        print(f"{datetime.fromtimestamp(timestamp / 1000).isoformat(timespec='milliseconds')} "
+              f"{level:>5} {pid} [{thread}] {name}: {message}")
+
+
+if __name__ == "__main__":
+    main()
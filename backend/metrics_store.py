@@ -0,0 +1,386 @@
+"""
+Metrics Store - Indexed, streaming read/write access to the smart_energy.db metrics and healing_log tables
+
+Usage:
+    python backend/metrics_store.py migrate --db backend/smart_energy.db
+    python backend/metrics_store.py backfill --db backend/smart_energy.db
+"""
+import argparse
+import json
+import logging
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# ---------- FIX PYTHON PATH ----------
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+# --------------------------------------
+
+from predictor.feature_schema import aliases
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = str(root_dir / "backend" / "smart_energy.db")
+
+# Bumped whenever migrate() gains a step; stored in PRAGMA user_version
+SCHEMA_VERSION = 5
+
+METRIC_COLUMNS = ['id', 'service_name', 'timestamp', 'cpu', 'memory', 'energy',
+                  'diskio', 'network', 'latency_ms']
+HEALING_COLUMNS = ['id', 'service_name', 'timestamp', 'predicted_cluster', 'action_taken',
+                   'metrics_json']
+LOG_EVENT_COLUMNS = ['timestamp', 'kind', 'level', 'pid', 'service_name', 'action_taken',
+                     'logger', 'message', 'source']
+
+# Typed columns for the metrics that triggered a healing action, and the keys they
+# come from (training-dataset names written by the Spring backend, then MetricsAgent names).
+# Some Spring builds log the label-encoded workload type under its own key.
+HEALING_METRIC_FIELDS = {
+    column: keys + (['Workload_Type_encoded'] if column == 'workload_type' else [])
+    for column, keys in aliases('store', ['dataset', 'agent']).items()
+}
+
+
+def json_path_sql(keys: List[str]) -> str:
+    """SQL expression reading the first present key of metrics_json"""
+    paths = [f"json_extract(metrics_json, '$.\"{key}\"')" for key in keys]
+    return paths[0] if len(paths) == 1 else f"COALESCE({', '.join(paths)})"
+
+
+def healing_metrics_select(where: str) -> str:
+    """(id, HEALING_METRIC_FIELDS...) of the healing_log rows h matching `where`.
+
+    JSON is unpacked inside SQLite; rows with invalid JSON read as all NULL.
+    """
+    extract = ", ".join(f"{json_path_sql(keys)} AS {column}"
+                        for column, keys in HEALING_METRIC_FIELDS.items())
+    return (f"SELECT id, {extract} FROM (SELECT h.id, CASE WHEN json_valid(h.metrics_json) "
+            f"THEN h.metrics_json END AS metrics_json FROM healing_log h WHERE {where})")
+
+
+# Raw metrics columns kept as avg/max in metrics_hourly
+ROLLUP_COLUMNS = ['cpu', 'memory', 'energy', 'diskio', 'network', 'latency_ms']
+
+# Each step is (table it depends on or None, statement); steps for missing tables are skipped.
+# SQLite has no INCLUDE, so covered columns trail the key. id is spelled out so the
+# index order is exactly the (timestamp, id) keyset order; single-column indexes
+# get it implicitly from the trailing rowid.
+MIGRATIONS = {
+    1: [
+        ('metrics', "CREATE INDEX IF NOT EXISTS idx_metrics_service_ts "
+                    "ON metrics (service_name, timestamp, id, cpu, memory, energy)"),
+        ('metrics', "CREATE INDEX IF NOT EXISTS idx_metrics_ts ON metrics (timestamp)"),
+        ('healing_log', "CREATE INDEX IF NOT EXISTS idx_healing_log_service_ts "
+                        "ON healing_log (service_name, timestamp, id, predicted_cluster)"),
+        ('healing_log', "CREATE INDEX IF NOT EXISTS idx_healing_log_ts ON healing_log (timestamp)"),
+    ],
+    # Side table keyed by healing id, so the Spring-owned healing_log schema is unchanged
+    2: [
+        ('healing_log', "CREATE TABLE IF NOT EXISTS healing_metrics ("
+                        "healing_id INTEGER PRIMARY KEY REFERENCES healing_log (id), cpu REAL, "
+                        "memory REAL, network REAL, diskio REAL, energy REAL, latency_ms REAL, "
+                        "predicted_workload REAL, task_priority REAL, workload_type REAL)"),
+    ],
+    # Hourly rollups that outlive raw samples, and per-table retention progress
+    3: [
+        ('metrics', "CREATE TABLE IF NOT EXISTS metrics_hourly ("
+                    "service_name TEXT NOT NULL, bucket INTEGER NOT NULL, samples INTEGER NOT NULL, "
+                    + ", ".join(f"avg_{c} REAL, max_{c} REAL" for c in ROLLUP_COLUMNS)
+                    + ", PRIMARY KEY (service_name, bucket)) WITHOUT ROWID"),
+        ('metrics', "CREATE INDEX IF NOT EXISTS idx_metrics_hourly_bucket ON metrics_hourly (bucket)"),
+        (None, "CREATE TABLE IF NOT EXISTS retention_state ("
+                "name TEXT PRIMARY KEY, archived_through INTEGER NOT NULL)"),
+    ],
+    # Healing and alert events parsed from the Spring logs (backend/log_ingest.py)
+    4: [
+        (None, "CREATE TABLE IF NOT EXISTS log_events ("
+               "id INTEGER PRIMARY KEY, timestamp INTEGER NOT NULL, kind TEXT NOT NULL, "
+               "level TEXT, pid INTEGER, service_name TEXT, action_taken TEXT, logger TEXT, "
+               "message TEXT NOT NULL, source TEXT, UNIQUE (timestamp, pid, message))"),
+        (None, "CREATE INDEX IF NOT EXISTS idx_log_events_kind_ts ON log_events (kind, timestamp)"),
+    ],
+    # Agent disk busy % and network latency get their own columns instead of sharing
+    # diskio (MBps) and latency_ms (service latency); converted rows are re-extracted
+    5: [
+        ('healing_metrics', "ALTER TABLE healing_metrics ADD COLUMN diskio_percent REAL"),
+        ('healing_metrics', "ALTER TABLE healing_metrics ADD COLUMN network_latency_ms REAL"),
+        ('healing_metrics', f"UPDATE healing_metrics SET ({', '.join(HEALING_METRIC_FIELDS)}) = ("
+                            f"SELECT {', '.join(HEALING_METRIC_FIELDS)} FROM ("
+                            f"{healing_metrics_select('h.id = healing_metrics.healing_id')}))"),
+    ]
+}
+
+Timestamp = Union[int, float, datetime, None]
+Cursor = Tuple[int, int]  # (timestamp, id) of the last row returned
+
+
+def to_millis(value: Timestamp) -> Optional[int]:
+    """Epoch milliseconds (the tables' timestamp unit) from a datetime or number"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+
+def table_exists(db: sqlite3.Connection, table: str) -> bool:
+    return db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                      (table,)).fetchone() is not None
+
+
+def apply_step(db: sqlite3.Connection, table: Optional[str], statement: str) -> bool:
+    """Run one migration step; False when skipped because its table does not exist yet"""
+    if table is not None and not table_exists(db, table):
+        return False
+    try:
+        db.execute(statement)
+    except sqlite3.OperationalError as e:
+        # Steps of an unfinished version re-run on every migrate(); the column is already there
+        if not str(e).startswith('duplicate column name'):
+            raise
+    return True
+
+
+def migrate(db_path: str) -> int:
+    """Apply pending migrations in place; returns the resulting schema version.
+
+    user_version only advances through versions whose every step applied, so
+    steps skipped for a missing table are retried once the table exists.
+    """
+    db = sqlite3.connect(db_path)
+    try:
+        version = db.execute("PRAGMA user_version").fetchone()[0]
+        complete = True
+        for target in sorted(v for v in MIGRATIONS if v > version):
+            missing = {table for table, statement in MIGRATIONS[target]
+                       if not apply_step(db, table, statement)}
+            if missing:
+                logger.info(f"🗄️ {db_path} schema v{target} waits for tables {sorted(missing)}")
+            complete = complete and not missing
+            if complete:
+                db.execute(f"PRAGMA user_version = {target}")
+                version = target
+                logger.info(f"🗄️ {db_path} migrated to schema v{version}")
+            db.commit()
+        db.execute("ANALYZE")
+        db.commit()
+        return version
+    finally:
+        db.close()
+
+
+class MetricsStore:
+    """Parameterized range queries with keyset pagination over metrics and healing_log.
+
+    Every query is a fixed SQL string with bound parameters, so sqlite3's
+    statement cache reuses the prepared plan. Range scans walk the
+    (service_name, timestamp) indexes in (timestamp, id) order and resume
+    from the last row seen instead of using OFFSET, so page N costs the
+    same as page 1 and streaming exports hold one batch in memory at a time.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, auto_migrate: bool = True):
+        self.db_path = db_path
+        if auto_migrate:
+            migrate(db_path)
+        self.db = sqlite3.connect(db_path, cached_statements=256, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+
+    def close(self):
+        self.db.close()
+
+    # ---------- queries ----------
+    def range_sql(self, table: str, columns: Sequence[str], by_service: bool) -> str:
+        """Keyset range query over (timestamp, id), optionally for one service"""
+        where = "service_name = ? AND " if by_service else ""
+        return (f"SELECT {', '.join(columns)} FROM {table} "
+                f"WHERE {where}(timestamp, id) > (?, ?) AND timestamp < ? "
+                f"ORDER BY timestamp, id LIMIT ?")
+
+    def page(self, table: str, columns: Sequence[str], service_name: str = None,
+             start: Timestamp = None, end: Timestamp = None, after: Cursor = None,
+             limit: int = 100) -> Tuple[List[sqlite3.Row], Optional[Cursor]]:
+        """One page of rows plus the cursor for the next page (None when exhausted)"""
+        if after is None:
+            # Start just before `start` so rows at exactly `start` are included
+            after = ((to_millis(start) if start is not None else -2 ** 62) - 1, 2 ** 62)
+        end = to_millis(end) if end is not None else 2 ** 62
+        params = ((service_name,) if service_name else ()) + (after[0], after[1], end, limit)
+        rows = self.db.execute(self.range_sql(table, columns, bool(service_name)), params).fetchall()
+        cursor = (rows[-1]['timestamp'], rows[-1]['id']) if len(rows) == limit else None
+        return rows, cursor
+
+    def iterate(self, table: str, columns: Sequence[str], service_name: str = None,
+                start: Timestamp = None, end: Timestamp = None,
+                batch_size: int = 5000) -> Iterator[sqlite3.Row]:
+        """Stream every row in range, one keyset batch at a time"""
+        after = None
+        while True:
+            rows, after = self.page(table, columns, service_name, start, end, after, batch_size)
+            yield from rows
+            if after is None:
+                return
+
+    def page_metrics(self, service_name: str = None, start: Timestamp = None,
+                     end: Timestamp = None, after: Cursor = None, limit: int = 100,
+                     columns: Sequence[str] = METRIC_COLUMNS):
+        return self.page('metrics', columns, service_name, start, end, after, limit)
+
+    def iter_metrics(self, service_name: str = None, start: Timestamp = None,
+                     end: Timestamp = None, columns: Sequence[str] = METRIC_COLUMNS,
+                     batch_size: int = 5000) -> Iterator[sqlite3.Row]:
+        return self.iterate('metrics', columns, service_name, start, end, batch_size)
+
+    def page_healing_log(self, service_name: str = None, start: Timestamp = None,
+                         end: Timestamp = None, after: Cursor = None, limit: int = 100,
+                         columns: Sequence[str] = HEALING_COLUMNS):
+        return self.page('healing_log', columns, service_name, start, end, after, limit)
+
+    def iter_healing_log(self, service_name: str = None, start: Timestamp = None,
+                         end: Timestamp = None, columns: Sequence[str] = HEALING_COLUMNS,
+                         batch_size: int = 5000) -> Iterator[sqlite3.Row]:
+        return self.iterate('healing_log', columns, service_name, start, end, batch_size)
+
+    def latest_metrics(self, service_name: str, limit: int = 100) -> List[sqlite3.Row]:
+        """Newest samples for a service (reverse index walk)"""
+        return self.db.execute(
+            f"SELECT {', '.join(METRIC_COLUMNS)} FROM metrics WHERE service_name = ? "
+            f"ORDER BY timestamp DESC, id DESC LIMIT ?", (service_name, limit)
+        ).fetchall()
+
+    def services(self) -> List[str]:
+        """Distinct service names with metrics"""
+        return [r[0] for r in self.db.execute(
+            "SELECT DISTINCT service_name FROM metrics WHERE service_name IS NOT NULL")]
+
+    # ---------- writes ----------
+    def insert_metrics(self, rows: Sequence[Dict]):
+        """Bulk insert samples keyed like METRIC_COLUMNS (id optional)"""
+        columns = [c for c in METRIC_COLUMNS if c != 'id']
+        self.db.executemany(
+            f"INSERT INTO metrics ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            ([to_millis(r.get(c)) if c == 'timestamp' else r.get(c) for c in columns] for r in rows)
+        )
+        self.db.commit()
+
+    def insert_healing(self, service_name: str, action_taken: str, predicted_cluster: int,
+                       metrics: Dict, timestamp: Timestamp = None) -> int:
+        """Write a healing_log row and its typed metrics in one transaction; returns the id"""
+        timestamp = to_millis(timestamp if timestamp is not None else datetime.now())
+        with self.db:
+            healing_id = self.db.execute(
+                "INSERT INTO healing_log (action_taken, metrics_json, predicted_cluster, "
+                "service_name, timestamp) VALUES (?, ?, ?, ?, ?)",
+                (action_taken, json.dumps(metrics), predicted_cluster, service_name, timestamp)
+            ).lastrowid
+            self.db.execute(HEALING_METRICS_INSERT, (healing_id, *healing_metric_values(metrics)))
+        return healing_id
+
+    def backfill_healing_metrics(self, batch_size: int = 5000) -> int:
+        """Convert healing_log rows without typed metrics, one short transaction per batch.
+
+        JSON is unpacked inside SQLite (json_extract). Every healing_log row
+        with no healing_metrics row is converted, including ids below rows
+        insert_healing already wrote; rows with invalid JSON get an empty
+        metrics row so they are not revisited. Returns the number of rows added.
+        """
+        pending = ("h.id > ? AND NOT EXISTS "
+                   "(SELECT 1 FROM healing_metrics WHERE healing_id = h.id)")
+        sql = (f"INSERT OR IGNORE INTO healing_metrics (healing_id, {', '.join(HEALING_METRIC_FIELDS)}) "
+               f"{healing_metrics_select(pending + ' AND h.id <= ?')}")
+        total, cursor = 0, 0
+        while True:
+            last_id = self.db.execute(
+                f"SELECT MAX(id) FROM (SELECT h.id FROM healing_log h WHERE {pending} "
+                f"ORDER BY h.id LIMIT ?)", (cursor, batch_size)).fetchone()[0]
+            if last_id is None:
+                break
+            with self.db:
+                total += self.db.execute(sql, (cursor, last_id)).rowcount
+            cursor = last_id
+        if total:
+            logger.info(f"🗄️ Backfilled typed metrics for {total} healing actions")
+        return total
+
+    def healing_aggregates(self, group_by: str = 'service_name', start: Timestamp = None,
+                           end: Timestamp = None) -> List[Dict]:
+        """Per-group action counts and metric aggregates at heal time, computed in SQL"""
+        if group_by not in ('service_name', 'predicted_cluster', 'action_taken'):
+            raise ValueError(f"Unsupported grouping: {group_by}")
+        start = to_millis(start) if start is not None else -2 ** 62
+        end = to_millis(end) if end is not None else 2 ** 62
+        rows = self.db.execute(
+            f"SELECT h.{group_by}, COUNT(*) AS actions, "
+            f"AVG(m.cpu) AS avg_cpu, MAX(m.cpu) AS max_cpu, "
+            f"AVG(m.memory) AS avg_memory, AVG(m.energy) AS avg_energy, "
+            f"MAX(m.energy) AS max_energy, SUM(m.energy) AS total_energy, "
+            f"AVG(m.latency_ms) AS avg_latency_ms "
+            f"FROM healing_log h JOIN healing_metrics m ON m.healing_id = h.id "
+            f"WHERE h.timestamp >= ? AND h.timestamp < ? GROUP BY h.{group_by} ORDER BY actions DESC",
+            (start, end)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def insert_log_events(self, rows: Sequence[Tuple]) -> int:
+        """Bulk insert LOG_EVENT_COLUMNS tuples; already-ingested events are ignored"""
+        with self.db:
+            before = self.db.total_changes
+            self.db.executemany(
+                f"INSERT OR IGNORE INTO log_events ({', '.join(LOG_EVENT_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(LOG_EVENT_COLUMNS))})", rows)
+            return self.db.total_changes - before
+
+    def log_events(self, kind: str = None, start: Timestamp = None, end: Timestamp = None,
+                   limit: int = 100) -> List[sqlite3.Row]:
+        """Newest log events of a kind ('healing', 'alert') in [start, end)"""
+        start = to_millis(start) if start is not None else -2 ** 62
+        end = to_millis(end) if end is not None else 2 ** 62
+        if kind is None:
+            return self.db.execute(
+                f"SELECT id, {', '.join(LOG_EVENT_COLUMNS)} FROM log_events "
+                f"WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp DESC LIMIT ?",
+                (start, end, limit)).fetchall()
+        return self.db.execute(
+            f"SELECT id, {', '.join(LOG_EVENT_COLUMNS)} FROM log_events "
+            f"WHERE kind = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp DESC LIMIT ?",
+            (kind, start, end, limit)).fetchall()
+
+    def explain(self, sql: str, params: Sequence = ()) -> List[str]:
+        """Query plan details, e.g. to confirm an index is used"""
+        return [row[3] for row in self.db.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+HEALING_METRICS_INSERT = (f"INSERT OR REPLACE INTO healing_metrics (healing_id, "
+                          f"{', '.join(HEALING_METRIC_FIELDS)}) "
+                          f"VALUES ({', '.join('?' * (len(HEALING_METRIC_FIELDS) + 1))})")
+
+
+def healing_metric_values(metrics: Dict) -> List[Optional[float]]:
+    """Typed healing_metrics values from a metrics dict, in HEALING_METRIC_FIELDS order"""
+    values = []
+    for keys in HEALING_METRIC_FIELDS.values():
+        value = next((metrics[k] for k in keys if metrics.get(k) is not None), None)
+        values.append(float(value) if value is not None else None)
+    return values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="smart_energy.db maintenance")
+    parser.add_argument('command', choices=['migrate', 'backfill'])
+    parser.add_argument('--db', nargs='+', default=[DEFAULT_DB_PATH])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    for path in args.db:
+        print(f"{path}: schema v{migrate(path)}")
+        if args.command == 'backfill':
+            store = MetricsStore(path, auto_migrate=False)
+            print(f"{path}: {store.backfill_healing_metrics()} healing rows backfilled")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Orchestrator Backends - Where healing actions are actually applied
+
+Orchestrator is the interface HealingController drives. KubernetesOrchestrator
+talks to a real cluster through the async Kubernetes API (optional
+kubernetes_asyncio dependency); FakeCluster is an in-process simulator with
+nodes, pods, capacity and modeled latencies for load-testing recovery.
+"""
+import asyncio
+import itertools
+import logging
+import random
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class Orchestrator(ABC):
+    """Applies healing primitives to a workload"""
+
+    async def execute(self, strategy: str, service_id: str, target_node: str = None):
+        """Run a healing strategy; returns (success, execution_time_seconds)"""
+        handlers = {
+            'scale_up': lambda: self.scale(service_id, +1),
+            'scale_down': lambda: self.scale(service_id, -1),
+            'restart': lambda: self.restart(service_id),
+            'migrate_green': lambda: self.migrate(service_id, target_node),
+            'throttle': lambda: self.throttle(service_id, 0.8),
+            'optimize': lambda: self.optimize(service_id),
+        }
+        handler = handlers.get(strategy)
+        if handler is None:
+            return True, 0.0
+        return await handler()
+
+    @abstractmethod
+    async def scale(self, service_id: str, delta: int):
+        """Change replica count by delta"""
+
+    @abstractmethod
+    async def restart(self, service_id: str):
+        """Rolling restart of every replica"""
+
+    @abstractmethod
+    async def migrate(self, service_id: str, target_node: Optional[str]):
+        """Move replicas to the target node"""
+
+    @abstractmethod
+    async def throttle(self, service_id: str, factor: float):
+        """Scale resource limits by factor"""
+
+    @abstractmethod
+    async def optimize(self, service_id: str):
+        """Right-size requests to observed usage"""
+
+
+class KubernetesOrchestrator(Orchestrator):
+    """Async Kubernetes API backend; each service maps to a Deployment of the same name"""
+
+    def __init__(self, namespace: str = "default", kubeconfig: str = None):
+        try:
+            from kubernetes_asyncio import client, config
+        except ImportError as e:
+            raise ImportError(
+                "KubernetesOrchestrator requires 'kubernetes_asyncio' (pip install kubernetes_asyncio)"
+            ) from e
+        self.client = client
+        self.config = config
+        self.namespace = namespace
+        self.kubeconfig = kubeconfig
+        self.apps = None
+
+    async def connect(self):
+        """Load cluster credentials (in-cluster first, then kubeconfig)"""
+        try:
+            self.config.load_incluster_config()
+        except Exception:
+            await self.config.load_kube_config(config_file=self.kubeconfig)
+        self.apps = self.client.AppsV1Api()
+        logger.info(f"☸️ Connected to Kubernetes namespace {self.namespace}")
+
+    async def timed(self, coro):
+        """Await an API call and report (success, seconds)"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            await coro
+            return True, loop.time() - started
+        except Exception as e:
+            logger.error(f"Kubernetes call failed: {e}")
+            return False, loop.time() - started
+
+    async def patch(self, service_id: str, body: Dict):
+        return await self.apps.patch_namespaced_deployment(service_id, self.namespace, body)
+
+    async def scale(self, service_id: str, delta: int):
+        async def apply():
+            current = await self.apps.read_namespaced_deployment_scale(service_id, self.namespace)
+            replicas = max(0, current.spec.replicas + delta)
+            await self.apps.patch_namespaced_deployment_scale(
+                service_id, self.namespace, {'spec': {'replicas': replicas}}
+            )
+        return await self.timed(apply())
+
+    async def restart(self, service_id: str):
+        stamp = datetime.now(timezone.utc).isoformat()
+        return await self.timed(self.patch(service_id, {'spec': {'template': {'metadata': {
+            'annotations': {'kubectl.kubernetes.io/restartedAt': stamp}
+        }}}}))
+
+    async def migrate(self, service_id: str, target_node: Optional[str]):
+        if target_node is None:
+            return False, 0.0
+        return await self.timed(self.patch(service_id, {'spec': {'template': {'spec': {
+            'nodeSelector': {'kubernetes.io/hostname': target_node}
+        }}}}))
+
+    async def throttle(self, service_id: str, factor: float):
+        async def apply():
+            deployment = await self.apps.read_namespaced_deployment(service_id, self.namespace)
+            containers = []
+            for container in deployment.spec.template.spec.containers:
+                limits = (container.resources.limits or {}) if container.resources else {}
+                if 'cpu' in limits:
+                    millicores = parse_cpu(limits['cpu']) * factor
+                    containers.append({'name': container.name,
+                                       'resources': {'limits': {'cpu': f"{int(millicores)}m"}}})
+            if containers:
+                await self.patch(service_id, {'spec': {'template': {'spec': {'containers': containers}}}})
+        return await self.timed(apply())
+
+    async def optimize(self, service_id: str):
+        # Right-sizing needs usage history the cluster does not expose; restart picks
+        # up any request changes already applied to the template
+        return await self.restart(service_id)
+
+
+def parse_cpu(value: str) -> float:
+    """Kubernetes CPU quantity to millicores"""
+    value = str(value)
+    return float(value[:-1]) if value.endswith('m') else float(value) * 1000
+
+
+class FakePod:
+    __slots__ = ('name', 'service_id', 'node', 'phase', 'cpu', 'memory_gb', 'restarts')
+
+    def __init__(self, name: str, service_id: str, node: int, cpu: float, memory_gb: float):
+        self.name = name
+        self.service_id = service_id
+        self.node = node
+        self.phase = 'Running'
+        self.cpu = cpu
+        self.memory_gb = memory_gb
+        self.restarts = 0
+
+
+class FakeCluster(Orchestrator):
+    """In-process cluster simulator.
+
+    Models nodes with cpu/memory capacity, pods scheduled onto the node with
+    the most free cpu, and latencies for scheduling, container start, restart
+    and termination (log-normal jitter around configured means). With
+    time_scale=0 nothing sleeps and operations report their modeled
+    duration, so thousands of pods can be healed per second in one process.
+    max_concurrent_ops caps in-flight operations like an API server would.
+    """
+
+    def __init__(self, time_scale: float = 1.0, failure_rate: float = 0.0,
+                 max_concurrent_ops: int = 64, seed: int = None,
+                 latencies: Dict[str, float] = None):
+        self.time_scale = time_scale
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.semaphore = asyncio.Semaphore(max_concurrent_ops)
+        self.latencies = {
+            'schedule': 0.5,
+            'container_start': 2.0,
+            'restart': 3.0,
+            'terminate': 1.5,
+            'patch': 1.0,
+            'optimize': 4.0,
+            **(latencies or {})
+        }
+        self.node_names: List[str] = []
+        self.node_index: Dict[str, int] = {}
+        self.capacity = np.zeros((2, 0))   # (cpu, memory_gb) x node
+        self.allocated = np.zeros((2, 0))
+        self.pods: Dict[str, FakePod] = {}
+        self.deployments: Dict[str, Dict] = {}  # service_id -> {'cpu', 'memory_gb', 'pods': set}
+        self.pod_counter = itertools.count()
+        self.operations = 0
+        self.failed_operations = 0
+
+    @classmethod
+    def build(cls, nodes: int, services: int, replicas: int = 2, node_cpu: float = 32.0,
+              node_memory_gb: float = 128.0, pod_cpu: float = 0.5, pod_memory_gb: float = 1.0,
+              **kwargs):
+        """Create a cluster with evenly sized nodes and services of identical replicas"""
+        cluster = cls(**kwargs)
+        for i in range(nodes):
+            cluster.add_node(f"node-{i}", node_cpu, node_memory_gb)
+        for i in range(services):
+            cluster.create_deployment(f"service-{i}", replicas, pod_cpu, pod_memory_gb)
+        return cluster
+
+    def add_node(self, name: str, cpu: float, memory_gb: float):
+        self.node_index[name] = len(self.node_names)
+        self.node_names.append(name)
+        self.capacity = np.hstack([self.capacity, [[cpu], [memory_gb]]])
+        self.allocated = np.hstack([self.allocated, [[0.0], [0.0]]])
+
+    def create_deployment(self, service_id: str, replicas: int, cpu: float, memory_gb: float):
+        self.deployments[service_id] = {'cpu': cpu, 'memory_gb': memory_gb, 'pods': set()}
+        for _ in range(replicas):
+            if self.schedule_pod(service_id) is None:
+                logger.warning(f"Fake cluster full while creating {service_id}")
+                break
+
+    def schedule_pod(self, service_id: str, node: int = None) -> Optional[FakePod]:
+        """Bind a new pod to a node with room (preferring the most free cpu)"""
+        spec = self.deployments[service_id]
+        need = np.array([[spec['cpu']], [spec['memory_gb']]])
+        free = self.capacity - self.allocated
+        fits = (free >= need).all(axis=0)
+        if node is None:
+            if not fits.any():
+                return None
+            node = int(np.argmax(np.where(fits, free[0], -np.inf)))
+        elif not fits[node]:
+            return None
+        pod = FakePod(f"{service_id}-{next(self.pod_counter)}", service_id, node,
+                      spec['cpu'], spec['memory_gb'])
+        self.allocated[:, node] += need[:, 0]
+        self.pods[pod.name] = pod
+        spec['pods'].add(pod.name)
+        return pod
+
+    def delete_pod(self, name: str):
+        pod = self.pods.pop(name)
+        self.allocated[0, pod.node] -= pod.cpu
+        self.allocated[1, pod.node] -= pod.memory_gb
+        self.deployments[pod.service_id]['pods'].discard(name)
+
+    def latency(self, *steps: str) -> float:
+        """Modeled duration of a sequence of steps with log-normal jitter"""
+        return sum(self.latencies[s] * self.rng.lognormvariate(0, 0.2) for s in steps)
+
+    async def run(self, duration: float, apply) -> tuple:
+        """Wait out the modeled latency, then apply the state change"""
+        async with self.semaphore:
+            self.operations += 1
+            if self.time_scale:
+                await asyncio.sleep(duration * self.time_scale)
+            if self.rng.random() < self.failure_rate:
+                self.failed_operations += 1
+                return False, duration
+            ok = apply()
+            if not ok:
+                self.failed_operations += 1
+            return ok, duration
+
+    async def scale(self, service_id: str, delta: int):
+        if service_id not in self.deployments:
+            return False, 0.0
+        if delta > 0:
+            def apply():
+                return all(self.schedule_pod(service_id) is not None for _ in range(delta))
+            return await self.run(self.latency('schedule', 'container_start'), apply)
+
+        def apply():
+            pods = sorted(self.deployments[service_id]['pods'])
+            for name in pods[:min(-delta, max(0, len(pods) - 1))]:
+                self.delete_pod(name)
+            return True
+        return await self.run(self.latency('terminate'), apply)
+
+    async def restart(self, service_id: str):
+        if service_id not in self.deployments:
+            return False, 0.0
+
+        def apply():
+            for name in self.deployments[service_id]['pods']:
+                self.pods[name].restarts += 1
+                self.pods[name].phase = 'Running'
+            return True
+        return await self.run(self.latency('restart'), apply)
+
+    async def migrate(self, service_id: str, target_node: Optional[str]):
+        if service_id not in self.deployments:
+            return False, 0.0
+        if target_node is not None and target_node not in self.node_index:
+            return False, 0.0
+        # Without a placement decision the scheduler picks the node
+        node = self.node_index.get(target_node)
+
+        def apply():
+            # Surge onto the target first, then drain the old replicas
+            old = list(self.deployments[service_id]['pods'])
+            moved = [self.schedule_pod(service_id, node) for _ in old]
+            if any(pod is None for pod in moved):
+                for pod in moved:
+                    if pod is not None:
+                        self.delete_pod(pod.name)
+                return False
+            for name in old:
+                self.delete_pod(name)
+            return True
+        return await self.run(self.latency('schedule', 'container_start', 'terminate'), apply)
+
+    async def throttle(self, service_id: str, factor: float):
+        if service_id not in self.deployments:
+            return False, 0.0
+
+        def apply():
+            spec = self.deployments[service_id]
+            for name in spec['pods']:
+                pod = self.pods[name]
+                self.allocated[0, pod.node] -= pod.cpu * (1 - factor)
+                pod.cpu *= factor
+            spec['cpu'] *= factor
+            return True
+        return await self.run(self.latency('patch'), apply)
+
+    async def optimize(self, service_id: str):
+        if service_id not in self.deployments:
+            return False, 0.0
+        return await self.run(self.latency('optimize'), lambda: True)
+
+    def get_summary(self) -> Dict:
+        """Cluster-wide counts and utilisation"""
+        capacity = self.capacity.sum(axis=1)
+        allocated = self.allocated.sum(axis=1)
+        return {
+            'nodes': len(self.node_names),
+            'pods': len(self.pods),
+            'deployments': len(self.deployments),
+            'cpu_allocated_percent': float(allocated[0] / capacity[0] * 100) if capacity[0] else 0.0,
+            'memory_allocated_percent': float(allocated[1] / capacity[1] * 100) if capacity[1] else 0.0,
+            'operations': self.operations,
+            'failed_operations': self.failed_operations
+        }
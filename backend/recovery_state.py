@@ -0,0 +1,227 @@
+"""
+Recovery State Machine - Per-service healing dedup, cooldowns, flap suppression and rate limiting
+"""
+import logging
+import math
+import time
+from enum import IntEnum
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class RecoveryState(IntEnum):
+    IDLE = 0
+    PENDING = 1   # Accepted, waiting to run (queued or deferred)
+    HEALING = 2   # Action in flight
+    COOLDOWN = 3  # Recently healed; new triggers are ignored until it expires
+
+
+class TokenBucket:
+    """Global healing rate limiter"""
+
+    def __init__(self, rate_per_second: float, burst: int, clock=time.monotonic):
+        self.rate = rate_per_second
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.clock = clock
+        self.updated = clock()
+
+    def try_acquire(self, now: float = None) -> bool:
+        now = self.clock() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class RecoveryStateTable:
+    """idle → pending → healing → cooldown → idle, for every service.
+
+    State lives in parallel NumPy columns addressed by a slot per service, so
+    every transition is an O(1) read/write. Cooldowns grow exponentially with
+    consecutive failures. A decaying heal counter flags services that keep
+    needing recovery (flapping); those get a long suppression cooldown
+    instead of being healed again and again.
+    """
+
+    def __init__(self, base_cooldown: float = 30.0, max_cooldown: float = 1800.0,
+                 flap_window: float = 600.0, flap_threshold: float = 3.0,
+                 flap_cooldown: float = 1800.0, rate_per_second: float = 2.0,
+                 burst: int = 10, clock=time.monotonic, capacity: int = 64):
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.flap_window = flap_window
+        self.flap_threshold = flap_threshold
+        self.flap_cooldown = flap_cooldown
+        self.clock = clock
+        self.limiter = TokenBucket(rate_per_second, burst, clock)
+
+        self.slots: Dict[str, int] = {}
+        self.states = np.zeros(capacity, dtype=np.int8)
+        self.cooldown_until = np.zeros(capacity)
+        self.failures = np.zeros(capacity, dtype=np.int16)
+        self.flap_scores = np.zeros(capacity)
+        self.flap_updated = np.zeros(capacity)
+        self.suppressed = 0
+        self.rate_limited = 0
+
+    def slot(self, service_id: str) -> int:
+        """Slot for a service, growing the columns geometrically when full"""
+        slot = self.slots.get(service_id)
+        if slot is None:
+            slot = self.slots[service_id] = len(self.slots)
+            if slot >= len(self.states):
+                grow = len(self.states)
+                self.states = np.concatenate([self.states, np.zeros(grow, dtype=np.int8)])
+                self.cooldown_until = np.concatenate([self.cooldown_until, np.zeros(grow)])
+                self.failures = np.concatenate([self.failures, np.zeros(grow, dtype=np.int16)])
+                self.flap_scores = np.concatenate([self.flap_scores, np.zeros(grow)])
+                self.flap_updated = np.concatenate([self.flap_updated, np.zeros(grow)])
+        return slot
+
+    def state(self, service_id: str, now: float = None) -> RecoveryState:
+        """Current state; an expired cooldown reads as idle"""
+        slot = self.slots.get(service_id)
+        if slot is None:
+            return RecoveryState.IDLE
+        state = RecoveryState(int(self.states[slot]))
+        if state == RecoveryState.COOLDOWN:
+            now = self.clock() if now is None else now
+            if now >= self.cooldown_until[slot]:
+                self.states[slot] = RecoveryState.IDLE
+                return RecoveryState.IDLE
+        return state
+
+    def is_busy(self, service_id: str, now: float = None) -> bool:
+        """True while a service must not be healed again"""
+        return self.state(service_id, now) != RecoveryState.IDLE
+
+    def request(self, service_id: str, now: float = None) -> Optional[str]:
+        """Try idle → pending. Returns None when accepted, otherwise the reason refused"""
+        now = self.clock() if now is None else now
+        state = self.state(service_id, now)
+        if state != RecoveryState.IDLE:
+            self.suppressed += 1
+            return state.name.lower()
+        if not self.limiter.try_acquire(now):
+            self.rate_limited += 1
+            return 'rate_limited'
+        self.states[self.slot(service_id)] = RecoveryState.PENDING
+        return None
+
+    def preempt(self, service_id: str, now: float = None) -> Optional[str]:
+        """Let an urgent action replace a deferred one (stays pending until start).
+
+        Returns None when accepted, otherwise the reason refused.
+        """
+        now = self.clock() if now is None else now
+        state = self.state(service_id, now)
+        if state != RecoveryState.PENDING:
+            self.suppressed += 1
+            return state.name.lower()
+        if not self.limiter.try_acquire(now):
+            self.rate_limited += 1
+            return 'rate_limited'
+        return None
+
+    def start(self, service_id: str):
+        """pending → healing"""
+        self.states[self.slot(service_id)] = RecoveryState.HEALING
+
+    def defer(self, service_id: str):
+        """healing → pending (the action was scheduled for a later, greener slot)"""
+        self.states[self.slot(service_id)] = RecoveryState.PENDING
+
+    def finish(self, service_id: str, success: bool, now: float = None) -> float:
+        """healing → cooldown; returns the cooldown length in seconds"""
+        now = self.clock() if now is None else now
+        slot = self.slot(service_id)
+
+        # Decaying count of recent heals; crossing the threshold means flapping
+        elapsed = now - self.flap_updated[slot]
+        self.flap_scores[slot] = self.flap_scores[slot] * math.exp(-elapsed / self.flap_window) + 1.0
+        self.flap_updated[slot] = now
+
+        if success:
+            self.failures[slot] = 0
+            cooldown = self.base_cooldown
+        else:
+            self.failures[slot] = min(self.failures[slot] + 1, 16)
+            cooldown = min(self.max_cooldown, self.base_cooldown * 2 ** int(self.failures[slot]))
+
+        if self.flap_scores[slot] >= self.flap_threshold:
+            cooldown = max(cooldown, self.flap_cooldown)
+            logger.warning(f"🔁 {service_id} is flapping; suppressing healing for {cooldown:.0f}s")
+
+        self.states[slot] = RecoveryState.COOLDOWN
+        self.cooldown_until[slot] = now + cooldown
+        return cooldown
+
+    def cancel(self, service_id: str):
+        """pending/healing → idle without a cooldown (e.g. the trigger was withdrawn)"""
+        if service_id in self.slots:
+            self.states[self.slots[service_id]] = RecoveryState.IDLE
+
+    def export_state(self, now: float = None) -> Dict:
+        """Snapshot for a standby. Times are relative (the clock is per process)"""
+        now = self.clock() if now is None else now
+        n = len(self.slots)
+        return {
+            'services': list(self.slots),
+            'states': self.states[:n].tolist(),
+            'cooldown_remaining': np.maximum(self.cooldown_until[:n] - now, 0.0).tolist(),
+            'failures': self.failures[:n].tolist(),
+            'flap_scores': self.flap_scores[:n].tolist(),
+            'flap_age': (now - self.flap_updated[:n]).tolist()
+        }
+
+    def restore_state(self, state: Dict, now: float = None, deferred: Iterable[str] = ()):
+        """Load a snapshot written by export_state on another replica.
+
+        Services in `deferred` have an action in the restored scheduler queue;
+        they stay pending and finish when it runs. Other pending and in-flight
+        actions belonged to the previous leader and will never finish here, so
+        they restore as cooldowns: the service is not healed again straight
+        away, but is not blocked for good either.
+        """
+        now = self.clock() if now is None else now
+        deferred = set(deferred)
+        services = state.get('services', [])
+        capacity = max(64, len(services))
+        self.slots = {}
+        self.states = np.zeros(capacity, dtype=np.int8)
+        self.cooldown_until = np.zeros(capacity)
+        self.failures = np.zeros(capacity, dtype=np.int16)
+        self.flap_scores = np.zeros(capacity)
+        self.flap_updated = np.zeros(capacity)
+        for i, service_id in enumerate(services):
+            slot = self.slot(service_id)
+            remaining = float(state['cooldown_remaining'][i])
+            restored = RecoveryState(int(state['states'][i]))
+            orphaned = (restored == RecoveryState.HEALING
+                        or (restored == RecoveryState.PENDING and service_id not in deferred))
+            if orphaned:
+                restored, remaining = RecoveryState.COOLDOWN, max(remaining, self.base_cooldown)
+            self.states[slot] = restored
+            self.cooldown_until[slot] = now + remaining
+            self.failures[slot] = int(state['failures'][i])
+            self.flap_scores[slot] = float(state['flap_scores'][i])
+            self.flap_updated[slot] = now - float(state['flap_age'][i])
+
+    def get_summary(self) -> Dict:
+        """Service counts per state plus suppression counters"""
+        now = self.clock()
+        active = self.states[:len(self.slots)]
+        expired = (active == RecoveryState.COOLDOWN) & (self.cooldown_until[:len(self.slots)] <= now)
+        active[expired] = RecoveryState.IDLE
+        counts = np.bincount(active, minlength=len(RecoveryState))
+        return {
+            **{state.name.lower(): int(counts[state]) for state in RecoveryState},
+            'suppressed_triggers': self.suppressed,
+            'rate_limited_triggers': self.rate_limited
+        }
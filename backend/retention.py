@@ -0,0 +1,342 @@
+"""
+Retention - Rolls up, archives and deletes expired rows in smart_energy.db without long write locks
+
+Usage:
+    python backend/retention.py --db backend/smart_energy.db --dry-run
+    python backend/retention.py --db backend/smart_energy.db --enable-incremental-vacuum
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# ---------- FIX PYTHON PATH ----------
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+# --------------------------------------
+
+from config.settings import read_config
+from backend.metrics_store import (HEALING_COLUMNS, METRIC_COLUMNS, ROLLUP_COLUMNS, migrate,
+                                   table_exists)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Archives fall back to compressed .npz column files
+    pa = None
+    pq = None
+
+HOUR_MS = 3_600_000
+DAY_MS = 24 * HOUR_MS
+
+DEFAULT_CONFIG_PATH = str(root_dir / "config" / "config.yaml")
+
+
+def load_config(config_path: str) -> Dict:
+    """Parsed config (shared, read-only), re-read only when the file changes"""
+    return read_config(config_path)
+
+
+def managers_from_config(config_path: str = DEFAULT_CONFIG_PATH) -> Tuple[List['RetentionManager'], float]:
+    """One manager per existing database.maintenance.databases entry, and the pass interval"""
+    maintenance = load_config(config_path).get('database', {}).get('maintenance', {})
+    if not maintenance.get('enabled', False):
+        return [], 0.0
+    managers = [RetentionManager.from_config(str(root_dir / path), config_path)
+                for path in maintenance.get('databases', []) if (root_dir / path).exists()]
+    return managers, maintenance.get('interval_minutes', 60) * 60.0
+
+
+def day_label(day_start: int) -> str:
+    return datetime.fromtimestamp(day_start / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def write_archive(path_stem: Path, batches) -> Optional[Path]:
+    """Write column batches ({column: list}) as Parquet, or compressed .npz without pyarrow.
+
+    String columns are dictionary-encoded in the .npz (codes + values) so
+    service names are stored once per file.
+    """
+    path_stem.parent.mkdir(parents=True, exist_ok=True)
+    if pq is not None:
+        path = path_stem.with_suffix(".parquet")
+        writer = None
+        for batch in batches:
+            table = pa.table(batch)
+            if writer is None:
+                writer = pq.ParquetWriter(str(path), table.schema, compression="zstd")
+            writer.write_table(table)
+        if writer is None:
+            return None
+        writer.close()
+        return path
+
+    chunks: Dict[str, List[np.ndarray]] = {}
+    for batch in batches:
+        for column, values in batch.items():
+            chunks.setdefault(column, []).append(np.asarray(values))
+    if not chunks:
+        return None
+    arrays = {}
+    for column, parts in chunks.items():
+        values = np.concatenate(parts)
+        if values.dtype.kind in "OU":
+            names, codes = np.unique(values.astype(str), return_inverse=True)
+            arrays[f"{column}__codes"] = codes.astype(np.int32)
+            arrays[f"{column}__values"] = names
+        else:
+            arrays[column] = values
+    path = path_stem.with_suffix(".npz")
+    np.savez_compressed(path, **arrays)
+    return path
+
+
+def read_archive(path: str) -> Dict[str, np.ndarray]:
+    """Columns of an archive written by write_archive"""
+    if path.endswith(".parquet"):
+        table = pq.read_table(path)
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+    with np.load(path, allow_pickle=False) as data:
+        columns = {}
+        for key in data.files:
+            if key.endswith("__codes"):
+                name = key[:-len("__codes")]
+                columns[name] = data[f"{name}__values"][data[key]]
+            elif not key.endswith("__values"):
+                columns[key] = data[key]
+        return columns
+
+
+class RetentionManager:
+    """Enforces monitoring.retention_days on raw metrics and database.retention_days on history.
+
+    Expired data is handled one UTC day at a time, oldest first: raw
+    samples are rolled up into metrics_hourly, the day is exported to a
+    compressed columnar archive, and only then are rows deleted, in small
+    batches with a pause in between so the Spring backend's writers never
+    wait long for the lock. retention_state records the last day archived,
+    so a run interrupted mid-delete resumes deleting without re-rolling a
+    partial day. Freed pages are returned with PRAGMA incremental_vacuum.
+    """
+
+    def __init__(self, db_path: str, raw_days: int = 30, history_days: int = 180,
+                 archive_dir: str = None, batch_size: int = 2000, pause_seconds: float = 0.05,
+                 vacuum_pages: int = 10000, clock: Callable[[], float] = time.time):
+        self.db_path = db_path
+        self.raw_days = raw_days
+        self.history_days = history_days
+        self.archive_dir = Path(archive_dir or root_dir / "backend" / "data" / "archive")
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.vacuum_pages = vacuum_pages
+        self.clock = clock
+        self.last_run: Dict = {}
+
+    @classmethod
+    def from_config(cls, db_path: str, config_path: str = DEFAULT_CONFIG_PATH, **kwargs):
+        """Retention windows and maintenance settings from config.yaml"""
+        config = load_config(config_path)
+        database = config.get('database', {})
+        maintenance = database.get('maintenance', {})
+        settings = {
+            'raw_days': config.get('monitoring', {}).get('retention_days', 30),
+            'history_days': database.get('retention_days', 180),
+            'batch_size': maintenance.get('batch_size', 2000),
+            'pause_seconds': maintenance.get('pause_seconds', 0.05),
+            'vacuum_pages': maintenance.get('vacuum_pages', 10000)
+        }
+        if maintenance.get('archive_dir'):
+            settings['archive_dir'] = str(root_dir / maintenance['archive_dir'])
+        settings.update(kwargs)
+        return cls(db_path, **settings)
+
+    def cutoff(self, days: int) -> int:
+        """Start of the UTC day `days` ago, in epoch ms; only whole days expire"""
+        now_ms = int(self.clock() * 1000)
+        return (now_ms - days * DAY_MS) // DAY_MS * DAY_MS
+
+    def connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=30.0)
+        db.execute("PRAGMA busy_timeout = 30000")
+        return db
+
+    def run_once(self, dry_run: bool = False) -> Dict:
+        """One maintenance pass over every table; returns what was (or would be) done"""
+        started = time.perf_counter()
+        if not dry_run:
+            migrate(self.db_path)
+        db = self.connect()
+        try:
+            stats = {'db': self.db_path, 'metrics_deleted': 0, 'healing_deleted': 0,
+                     'rollups_deleted': 0, 'days_archived': 0, 'archives': []}
+            if table_exists(db, 'metrics'):
+                self.expire_table(db, 'metrics', METRIC_COLUMNS, self.cutoff(self.raw_days),
+                                  stats, 'metrics_deleted', dry_run, rollup=True)
+                if table_exists(db, 'metrics_hourly'):
+                    stats['rollups_deleted'] = self.expire_rollups(
+                        db, self.cutoff(self.history_days), dry_run)
+            if table_exists(db, 'healing_log'):
+                self.expire_table(db, 'healing_log', HEALING_COLUMNS,
+                                  self.cutoff(self.history_days), stats, 'healing_deleted', dry_run)
+            if not dry_run:
+                stats['pages_freed'] = self.incremental_vacuum(db)
+                db.execute("PRAGMA optimize")
+        finally:
+            db.close()
+        stats['seconds'] = time.perf_counter() - started
+        self.last_run = stats
+        if (stats['metrics_deleted'] or stats['healing_deleted']) and not dry_run:
+            logger.info(f"🧹 Retention on {self.db_path}: {stats['metrics_deleted']} metrics, "
+                        f"{stats['healing_deleted']} healing rows expired, "
+                        f"{stats['days_archived']} days archived")
+        return stats
+
+    def expire_table(self, db: sqlite3.Connection, table: str, columns: List[str], cutoff: int,
+                     stats: Dict, counter: str, dry_run: bool, rollup: bool = False):
+        """Roll up and archive each expired day not yet archived, then delete it in batches"""
+        row = db.execute("SELECT archived_through FROM retention_state WHERE name = ?",
+                         (table,)).fetchone() if table_exists(db, 'retention_state') else None
+        archived_through = row[0] if row else None
+        while True:
+            oldest = db.execute(f"SELECT MIN(timestamp) FROM {table}").fetchone()[0]
+            if oldest is None or oldest >= cutoff:
+                return
+            day_start = oldest // DAY_MS * DAY_MS
+            day_end = min(day_start + DAY_MS, cutoff)
+            if dry_run:
+                stats[counter] += db.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE timestamp < ?", (cutoff,)).fetchone()[0]
+                return
+            if archived_through is None or day_end > archived_through:
+                if rollup:
+                    self.rollup(db, day_start, day_end)
+                path = write_archive(self.archive_dir / table / day_label(day_start),
+                                     self.archive_batches(db, table, columns, day_start, day_end))
+                with db:
+                    db.execute("INSERT OR REPLACE INTO retention_state VALUES (?, ?)",
+                               (table, day_end))
+                archived_through = day_end
+                stats['days_archived'] += 1
+                if path is not None:
+                    stats['archives'].append(str(path))
+            stats[counter] += self.delete_batched(db, table, day_start, day_end)
+
+    def rollup(self, db: sqlite3.Connection, start: int, end: int):
+        """Hourly avg/max per service for [start, end), written in one statement"""
+        aggregates = ", ".join(f"AVG({c}), MAX({c})" for c in ROLLUP_COLUMNS)
+        with db:
+            db.execute(
+                f"INSERT OR REPLACE INTO metrics_hourly "
+                f"SELECT service_name, timestamp / {HOUR_MS} * {HOUR_MS}, COUNT(*), {aggregates} "
+                f"FROM metrics WHERE timestamp >= ? AND timestamp < ? GROUP BY 1, 2",
+                (start, end)
+            )
+
+    def archive_batches(self, db: sqlite3.Connection, table: str, columns: List[str],
+                        start: int, end: int):
+        """Column batches of [start, end) in (timestamp, id) order"""
+        cursor = db.execute(
+            f"SELECT {', '.join(columns)} FROM {table} "
+            f"WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp, id",
+            (start, end)
+        )
+        while True:
+            rows = cursor.fetchmany(self.batch_size * 10)
+            if not rows:
+                return
+            values = list(zip(*rows))
+            yield {column: [v if v is not None else np.nan for v in values[i]]
+                   if column not in ('service_name', 'action_taken', 'metrics_json')
+                   else ['' if v is None else v for v in values[i]]
+                   for i, column in enumerate(columns)}
+
+    def delete_batched(self, db: sqlite3.Connection, table: str, start: int, end: int) -> int:
+        """Delete [start, end) a batch at a time, releasing the write lock between batches"""
+        deleted = 0
+        while True:
+            with db:
+                if table == 'healing_log' and table_exists(db, 'healing_metrics'):
+                    db.execute(
+                        "DELETE FROM healing_metrics WHERE healing_id IN (SELECT id FROM healing_log "
+                        "WHERE timestamp >= ? AND timestamp < ? LIMIT ?)",
+                        (start, end, self.batch_size)
+                    )
+                count = db.execute(
+                    f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} "
+                    f"WHERE timestamp >= ? AND timestamp < ? LIMIT ?)",
+                    (start, end, self.batch_size)
+                ).rowcount
+            deleted += count
+            if count < self.batch_size:
+                return deleted
+            time.sleep(self.pause_seconds)
+
+    def expire_rollups(self, db: sqlite3.Connection, cutoff: int, dry_run: bool) -> int:
+        """Rollups follow the long-term history window"""
+        if dry_run:
+            return db.execute("SELECT COUNT(*) FROM metrics_hourly WHERE bucket < ?",
+                              (cutoff,)).fetchone()[0]
+        with db:
+            return db.execute("DELETE FROM metrics_hourly WHERE bucket < ?", (cutoff,)).rowcount
+
+    def incremental_vacuum(self, db: sqlite3.Connection) -> int:
+        """Return up to vacuum_pages free pages to the OS (needs auto_vacuum = INCREMENTAL)"""
+        if db.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+        before = db.execute("PRAGMA freelist_count").fetchone()[0]
+        # executescript steps the pragma to completion; execute() frees a single page
+        db.executescript(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)});")
+        return before - db.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def enable_incremental_vacuum(self):
+        """One-off switch to auto_vacuum = INCREMENTAL; rewrites the file with a full VACUUM"""
+        db = self.connect()
+        try:
+            if db.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                db.execute("VACUUM")
+                logger.info(f"🗜️ {self.db_path} switched to incremental auto-vacuum")
+        finally:
+            db.close()
+
+    async def run(self, interval_seconds: float = 3600.0, should_run: Callable[[], bool] = None):
+        """Maintenance loop; passes are skipped while should_run() is False (e.g. on standbys)"""
+        loop = asyncio.get_running_loop()
+        while True:
+            if should_run is None or should_run():
+                try:
+                    await loop.run_in_executor(None, self.run_once)
+                except sqlite3.Error as e:
+                    logger.error(f"❌ Retention pass on {self.db_path} failed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="smart_energy.db retention and archiving")
+    parser.add_argument('--db', nargs='+', required=True)
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH)
+    parser.add_argument('--dry-run', action='store_true')
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help="one-off full VACUUM so later passes can shrink the file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    for path in args.db:
+        manager = RetentionManager.from_config(path, args.config)
+        if args.enable_incremental_vacuum:
+            manager.enable_incremental_vacuum()
+        print(json.dumps(manager.run_once(dry_run=args.dry_run), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Serialization - Fast JSON encoding, cached encoded payloads and ETag responses for the API servers
+"""
+import hashlib
+import json
+import logging
+from datetime import date, datetime
+from typing import Callable, Dict, List, Tuple
+
+from fastapi import Request, Response
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib fallback below
+    orjson = None
+
+
+def default(obj):
+    """Encode values the JSON encoders do not know natively"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if hasattr(obj, 'tolist'):  # NumPy arrays and scalars
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, 'to_dict'):  # Slotted records (agent/records.py), scheduled actions
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj) -> bytes:
+        """Compact UTF-8 JSON"""
+        return orjson.dumps(obj, default=default, option=ORJSON_OPTIONS)
+else:
+    def dumps(obj) -> bytes:
+        """Compact UTF-8 JSON"""
+        return json.dumps(obj, default=default, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONResponse(Response):
+    """JSONResponse replacement backed by dumps()"""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def etag_for(body: bytes) -> str:
+    """Weak ETag derived from the encoded JSON body.
+
+    Weak, because GZipMiddleware may send the same payload gzip-encoded or
+    as identity, and a strong ETag must differ between those two bodies.
+    """
+    return 'W/"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def parse_etags(header: str) -> List[str]:
+    """Entity tags listed in an If-None-Match header ('*' kept as is)"""
+    return [tag.strip() for tag in header.split(',') if tag.strip()]
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match check with weak comparison (RFC 9110 13.1.2)"""
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for tag in parse_etags(header):
+        if tag == '*' or (tag[2:] if tag.startswith('W/') else tag) == opaque:
+            return True
+    return False
+
+
+class PayloadCache:
+    """Encoded bodies and ETags per resource, rebuilt only after invalidate().
+
+    Callers invalidate a resource when its data changes; until then every
+    request reuses the same bytes, and clients sending If-None-Match with
+    the current ETag get an empty 304.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[bytes, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, *keys: str):
+        """Drop the given resources (all when none are given)"""
+        if not keys:
+            self.entries.clear()
+        for key in keys:
+            self.entries.pop(key, None)
+
+    def get(self, key: str, build: Callable) -> Tuple[bytes, str]:
+        """(body, etag) for a resource, encoding build() on a miss"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            body = dumps(build())
+            entry = self.entries[key] = (body, etag_for(body))
+        else:
+            self.hits += 1
+        return entry
+
+    def response(self, request: Request, key: str, build: Callable) -> Response:
+        """200 with the cached body, or 304 when the client already has it"""
+        body, etag = self.get(key, build)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Encoded '{"type":"<name>"' prefixes, so broadcasts only encode their changing fields
+MESSAGE_PREFIXES: Dict[str, bytes] = {}
+
+
+def encode_message(message_type: str, **fields) -> str:
+    """WebSocket message text: the type prefix is encoded once per type"""
+    prefix = MESSAGE_PREFIXES.get(message_type)
+    if prefix is None:
+        prefix = MESSAGE_PREFIXES[message_type] = b'{"type":' + dumps(message_type)
+    parts = [prefix]
+    for name, value in fields.items():
+        parts.append(b',' + dumps(name) + b':' + dumps(value))
+    parts.append(b'}')
+    return b''.join(parts).decode('utf-8')
@@ -0,0 +1,334 @@
+"""
+Sharded Runtime - Runs collection and prediction in worker processes; the coordinator owns healing
+
+Usage:
+    python -m backend.sharded_runtime --workers 4 --batch-size 500
+"""
+import argparse
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing as mp
+import time
+from functools import partial
+from typing import Callable, Dict, List, Tuple
+
+from backend.recovery_state import RecoveryStateTable
+
+logger = logging.getLogger(__name__)
+
+# Compact per-service result sent from a worker: (service_id, cluster, probability, seconds to breach or -1)
+AtRisk = Tuple[str, int, float, float]
+
+
+def stable_hash(key: str) -> int:
+    """Process-independent 64-bit hash (str hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class ConsistentHashRing:
+    """Maps service ids to shards; adding a shard only moves ~1/N of the services"""
+
+    def __init__(self, shards: int, vnodes: int = 64):
+        self.shards = shards
+        self.vnodes = vnodes
+        points = sorted((stable_hash(f"shard-{s}#{v}"), s)
+                        for s in range(shards) for v in range(vnodes))
+        self.points = [p for p, _ in points]
+        self.owners = [s for _, s in points]
+
+    def shard_for(self, service_id: str) -> int:
+        """Shard owning a service"""
+        i = bisect.bisect(self.points, stable_hash(service_id))
+        return self.owners[i % len(self.points)]
+
+    def assign(self, services: List[Dict]) -> List[List[Dict]]:
+        """Split service descriptors into one list per shard"""
+        shards = [[] for _ in range(self.shards)]
+        for service in services:
+            shards[self.shard_for(service['id'])].append(service)
+        return shards
+
+
+def default_collector(services: List[Dict], shard: int, batch_size: int = 500):
+    """MetricsAgent restricted to one shard's services, scraping them in batches"""
+    from agent.monitoring_agent import MetricsAgent
+    agent = MetricsAgent(batch_size=batch_size)
+    agent.services = services
+    agent.energy_model.register(services)
+    return agent
+
+
+def shard_worker(shard: int, services: List[Dict], conn, collector_factory: Callable,
+                 predictor_kwargs: Dict):
+    """Worker process: collect and predict for one shard on every 'tick' command.
+
+    Every tick is answered with ('ok', result) or ('error', message), so a
+    failing cycle reaches the coordinator instead of killing the worker.
+    """
+    from predictor.failure_predictor import FailurePredictor
+
+    logging.basicConfig(level=logging.WARNING)
+    loop = asyncio.new_event_loop()
+    startup_error = None
+    try:
+        collector = collector_factory(services, shard)
+        predictor = FailurePredictor(**predictor_kwargs)
+        loop.run_until_complete(predictor.initialize())
+    except Exception as e:
+        startup_error = f"shard {shard} failed to start: {type(e).__name__}: {e}"
+        logger.exception(startup_error)
+
+    async def cycle() -> Tuple[int, List[AtRisk], float]:
+        started = time.perf_counter()
+        metrics = await collector.collect_metrics()
+        predictions = await predictor.predict(metrics)
+        at_risk = [
+            (sid, int(p.get('cluster', 0)), float(p.get('probability', 0.0)),
+             p.get('time_to_breach_seconds') or -1.0)
+            for sid, p in predictions.items() if p.get('will_fail')
+        ]
+        return len(predictions), at_risk, time.perf_counter() - started
+
+    try:
+        while True:
+            command = conn.recv()
+            if command == 'stop':
+                break
+            if startup_error is not None:
+                conn.send(('error', startup_error))
+                continue
+            try:
+                reply = ('ok', loop.run_until_complete(cycle()))
+            except Exception as e:
+                logger.exception(f"Shard {shard} cycle failed")
+                reply = ('error', f"shard {shard} cycle failed: {type(e).__name__}: {e}")
+            conn.send(reply)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        loop.close()
+        conn.close()
+
+
+class ShardedRuntime:
+    """Coordinator for N shard workers.
+
+    Services are spread over workers with a consistent hash ring. Each cycle
+    the coordinator sends one 'tick' to every worker over its pipe, and each
+    worker answers with only the at-risk services as compact tuples, so the
+    coordinator's share of the work stays proportional to failures rather
+    than fleet size. Healing decisions (planning, dedup, execution) stay in
+    the coordinator process, gated by a RecoveryStateTable so cooldowns and
+    flap suppression apply as in the API server. A shard whose cycle fails
+    is reported in cycle_stats['errors'] and skipped for that cycle; a worker
+    process that died or did not answer within reply_timeout is restarted.
+    """
+
+    def __init__(self, services: List[Dict], workers: int = None,
+                 collector_factory: Callable = default_collector,
+                 predictor_kwargs: Dict = None, vnodes: int = 64,
+                 recovery_states: RecoveryStateTable = None, reply_timeout: float = 120.0):
+        self.services = {s['id']: s for s in services}
+        self.workers = workers or mp.cpu_count()
+        self.ring = ConsistentHashRing(self.workers, vnodes)
+        self.shards = self.ring.assign(services)
+        self.collector_factory = collector_factory
+        self.predictor_kwargs = predictor_kwargs or {}
+        self.processes: List[mp.Process] = []
+        self.connections = []
+        self.recovery_states = recovery_states or RecoveryStateTable()
+        self.reply_timeout = reply_timeout
+        self.cycle_stats: Dict = {}
+        self.restarts = 0
+
+    def spawn(self, shard: int):
+        """Start the worker process for one shard"""
+        parent, child = mp.Pipe()
+        process = mp.Process(
+            target=shard_worker, name=f"shard-{shard}", daemon=True,
+            args=(shard, self.shards[shard], child, self.collector_factory, self.predictor_kwargs)
+        )
+        process.start()
+        child.close()
+        return process, parent
+
+    def start(self):
+        """Spawn one worker process per shard"""
+        for shard in range(len(self.shards)):
+            process, conn = self.spawn(shard)
+            self.processes.append(process)
+            self.connections.append(conn)
+        logger.info(f"🧩 Sharded runtime started: {self.workers} workers, "
+                    f"shard sizes {[len(s) for s in self.shards]}")
+
+    def collect(self) -> Dict[str, Dict]:
+        """Run one collect + predict cycle on every shard; returns at-risk predictions"""
+        started = time.perf_counter()
+        errors: Dict[int, str] = {}
+        ticked = []
+        for shard, conn in enumerate(self.connections):
+            try:
+                conn.send('tick')
+                ticked.append(shard)
+            except (BrokenPipeError, OSError):
+                errors[shard] = self.restart(shard, "exited")
+        at_risk: Dict[str, Dict] = {}
+        observed, worker_seconds = 0, []
+        deadline = time.monotonic() + self.reply_timeout
+        for shard in ticked:
+            conn = self.connections[shard]
+            try:
+                if not conn.poll(max(0.0, deadline - time.monotonic())):
+                    errors[shard] = self.restart(shard, f"did not answer within {self.reply_timeout:.0f}s")
+                    continue
+                status, payload = conn.recv()
+            except (EOFError, OSError):
+                errors[shard] = self.restart(shard, "exited")
+                continue
+            if status != 'ok':
+                logger.error(f"❌ {payload}")
+                errors[shard] = payload
+                continue
+            count, results, elapsed = payload
+            observed += count
+            worker_seconds.append(elapsed)
+            for service_id, cluster, probability, breach in results:
+                service = self.services.get(service_id, {})
+                at_risk[service_id] = {
+                    'service_id': service_id,
+                    'will_fail': True,
+                    'cluster': cluster,
+                    'probability': probability,
+                    'time_to_breach_seconds': breach if breach >= 0 else None,
+                    'criticality': service.get('criticality', 'medium'),
+                    'region': service.get('region'),
+                    'node': service.get('node', '')
+                }
+        self.cycle_stats = {
+            'services': observed,
+            'at_risk': len(at_risk),
+            'wall_seconds': time.perf_counter() - started,
+            'worker_seconds': worker_seconds,
+            'errors': errors
+        }
+        return at_risk
+
+    def restart(self, shard: int, reason: str) -> str:
+        """Replace a worker that exited or hung; returns the error to report for this cycle"""
+        old = self.processes[shard]
+        old.join(timeout=1)
+        if old.is_alive():
+            old.terminate()
+            old.join(timeout=5)
+        self.connections[shard].close()
+        self.processes[shard], self.connections[shard] = self.spawn(shard)
+        self.restarts += 1
+        message = f"shard {shard} worker {reason} (code {old.exitcode}); restarted"
+        logger.error(f"❌ {message}")
+        return message
+
+    async def run_cycle(self, controller, **plan_kwargs) -> List[Dict]:
+        """One full cycle: sharded collect/predict, then plan and heal centrally"""
+        states = self.recovery_states
+        results = []
+        # Deferred actions whose green slot arrived leave the pending state here
+        for action, result in await controller.run_due_actions():
+            self.finish(action.service_id, result)
+            results.append(result)
+
+        loop = asyncio.get_running_loop()
+        at_risk = await loop.run_in_executor(None, self.collect)
+        # Services pending, healing or cooling down are not planned again
+        candidates = {sid: p for sid, p in at_risk.items() if not states.is_busy(sid)}
+        plan = controller.plan_cycle(candidates, **plan_kwargs)
+        suppressed = 0
+        for action in plan:
+            service_id = action['service_id']
+            if states.request(service_id) is not None:
+                suppressed += 1
+                continue
+            states.start(service_id)
+            try:
+                result = await controller.execute_healing(
+                    service_id, at_risk[service_id], strategy=action['strategy']
+                )
+            except Exception as e:
+                logger.error(f"❌ Healing crashed for {service_id}: {e}")
+                result = {'success': False, 'error': str(e)}
+            self.finish(service_id, result)
+            results.append(result)
+        self.cycle_stats['suppressed'] = len(at_risk) - len(candidates) + suppressed
+        return results
+
+    def finish(self, service_id: str, result: Dict):
+        """Move a service on from healing: pending again when deferred, else cooldown"""
+        if result.get('deferred'):
+            self.recovery_states.defer(service_id)
+        else:
+            self.recovery_states.finish(service_id, success=bool(result.get('success')))
+
+    def stop(self):
+        """Stop every worker"""
+        for conn in self.connections:
+            try:
+                conn.send('stop')
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.processes.clear()
+        self.connections.clear()
+        logger.info("🛑 Sharded runtime stopped")
+
+
+async def run(workers: int, interval: float, batch_size: int, cycles: int = 0):
+    """Serve the discovered fleet: sharded collect/predict, central healing, every interval"""
+    from agent.monitoring_agent import MetricsAgent
+    from backend.healing_controller import HealingController
+
+    services = MetricsAgent().discover_services()
+    controller = HealingController()
+    await controller.initialize()
+    runtime = ShardedRuntime(services, workers, partial(default_collector, batch_size=batch_size))
+    runtime.start()
+    try:
+        cycle = 0
+        while not cycles or cycle < cycles:
+            started = time.monotonic()
+            results = await runtime.run_cycle(controller)
+            stats = runtime.cycle_stats
+            logger.info(f"🔁 Cycle {cycle}: {stats['services']} services, {stats['at_risk']} at risk, "
+                        f"{len(results)} healing actions, {len(stats['errors'])} shard errors "
+                        f"in {stats['wall_seconds']:.2f}s")
+            cycle += 1
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+    finally:
+        runtime.stop()
+
+
+def main(argv=None):
+    from config.settings import get_settings
+
+    parser = argparse.ArgumentParser(description="Sharded collect/predict runtime with central healing")
+    parser.add_argument('--workers', type=int, default=mp.cpu_count())
+    parser.add_argument('--interval', type=float, default=None,
+                        help="seconds between cycles (default: system.monitoring_interval)")
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help="services scraped per collection round trip")
+    parser.add_argument('--cycles', type=int, default=0, help="stop after N cycles (0: run forever)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    interval = args.interval if args.interval is not None else get_settings().system.monitoring_interval
+    try:
+        asyncio.run(run(args.workers, interval, args.batch_size, args.cycles))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
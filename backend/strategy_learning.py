@@ -0,0 +1,99 @@
+"""
+Strategy Learning - Online per-(cluster, strategy) outcome estimates for strategy selection
+"""
+import logging
+import math
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class StrategyLearner:
+    """Exponentially weighted outcome estimates with a UCB exploration bonus.
+
+    Success rate, execution time and energy saving are kept as
+    (cluster x strategy) arrays seeded from the static priors, so the first
+    choices match the old cluster map. Each recorded outcome is an O(1)
+    update of one cell; strategies that fail or run slowly on a cluster
+    drift down the ranking for that cluster only.
+    """
+
+    def __init__(self, strategies: List[str], prior_recovery: np.ndarray,
+                 prior_times: Dict[str, float], prior_energy: Dict[str, float],
+                 alpha: float = 0.2, exploration: float = 0.05,
+                 latency_weight: float = 0.02, energy_weight: float = 0.1):
+        self.strategies = list(strategies)
+        self.strategy_index = {s: i for i, s in enumerate(self.strategies)}
+        self.alpha = alpha
+        self.exploration = exploration
+        self.latency_weight = latency_weight
+        self.energy_weight = energy_weight
+
+        clusters = len(prior_recovery)
+        self.success = np.array(prior_recovery, dtype=float)
+        self.execution_time = np.tile(
+            [prior_times.get(s, 2.0) for s in self.strategies], (clusters, 1)
+        ).astype(float)
+        self.energy_saving = np.tile(
+            [prior_energy.get(s, 0.0) for s in self.strategies], (clusters, 1)
+        ).astype(float)
+        self.counts = np.zeros((clusters, len(self.strategies)), dtype=np.int64)
+        self.cluster_totals = np.zeros(clusters, dtype=np.int64)
+
+    def record(self, cluster: int, strategy: str, success: bool,
+               execution_time: float, energy_saving: float = 0.0):
+        """Fold one healing outcome into the estimates"""
+        column = self.strategy_index.get(strategy)
+        if column is None or not 0 <= cluster < len(self.success):
+            return
+        a = self.alpha
+        self.success[cluster, column] += a * (float(success) - self.success[cluster, column])
+        self.execution_time[cluster, column] += a * (execution_time - self.execution_time[cluster, column])
+        if success:
+            self.energy_saving[cluster, column] += a * (energy_saving - self.energy_saving[cluster, column])
+        self.counts[cluster, column] += 1
+        self.cluster_totals[cluster] += 1
+
+    def set_priors(self, prior_times: Dict[str, float], prior_energy: Dict[str, float]):
+        """Replace time and energy priors wherever no outcome has been observed yet"""
+        unseen = self.counts == 0
+        times = np.array([prior_times.get(s, 2.0) for s in self.strategies])
+        energy = np.array([prior_energy.get(s, 0.0) for s in self.strategies])
+        self.execution_time[unseen] = np.broadcast_to(times, self.execution_time.shape)[unseen]
+        self.energy_saving[unseen] = np.broadcast_to(energy, self.energy_saving.shape)[unseen]
+
+    def scores(self, cluster: int) -> np.ndarray:
+        """Expected value of each strategy for a cluster, with exploration bonus"""
+        value = (self.success[cluster]
+                 - self.latency_weight * self.execution_time[cluster]
+                 + self.energy_weight * self.energy_saving[cluster])
+        total = self.cluster_totals[cluster]
+        if total and self.exploration:
+            value = value + self.exploration * np.sqrt(
+                math.log(total + 1) / (self.counts[cluster] + 1)
+            )
+        return value
+
+    def best_strategy(self, cluster: int, exclude: List[str] = ()) -> str:
+        """Highest-scoring strategy for a cluster"""
+        scores = self.scores(cluster)
+        for strategy in exclude:
+            if strategy in self.strategy_index:
+                scores[self.strategy_index[strategy]] = -np.inf
+        return self.strategies[int(np.argmax(scores))]
+
+    def get_estimates(self, cluster: int = None) -> List[Dict]:
+        """Current estimates per (cluster, strategy); [] for a cluster that has no row"""
+        if cluster is not None and not 0 <= cluster < len(self.success):
+            return []
+        clusters = range(len(self.success)) if cluster is None else [cluster]
+        return [{
+            'cluster': c,
+            'strategy': strategy,
+            'success_rate': float(self.success[c, i]),
+            'execution_time': float(self.execution_time[c, i]),
+            'energy_saving': float(self.energy_saving[c, i]),
+            'observations': int(self.counts[c, i])
+        } for c in clusters for i, strategy in enumerate(self.strategies)]
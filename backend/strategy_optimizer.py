@@ -0,0 +1,222 @@
+"""
+Strategy Optimizer - Chooses healing actions across all at-risk services per cycle
+"""
+import logging
+import time
+from typing import Dict, List
+
+import numpy as np
+
+# STRATEGY_ORDER is the column order of every per-strategy array below
+from config.settings import STRATEGY_ORDER
+
+logger = logging.getLogger(__name__)
+
+DO_NOTHING = STRATEGY_ORDER.index('do_nothing')
+
+# Prior probability that a strategy recovers a service, by failure cluster (rows 0-5)
+RECOVERY_PRIORS = np.array([
+    # up   down  green restart thr  opt  none
+    [0.30, 0.20, 0.25, 0.35, 0.30, 0.35, 0.30],  # 0: no specific cluster
+    [0.90, 0.05, 0.40, 0.50, 0.60, 0.30, 0.05],  # 1: resource exhaustion
+    [0.20, 0.50, 0.85, 0.30, 0.60, 0.60, 0.10],  # 2: energy spike
+    [0.40, 0.10, 0.40, 0.50, 0.30, 0.80, 0.10],  # 3: network issues
+    [0.40, 0.10, 0.30, 0.85, 0.40, 0.40, 0.10],  # 4: high error rate
+    [0.50, 0.20, 0.40, 0.50, 0.75, 0.60, 0.20],  # 5: general degradation
+])
+
+# Extra capacity (replica-equivalents) a strategy needs on the service's node
+CAPACITY_DEMAND = {
+    'scale_up': 1.0,
+    'migrate_green': 1.0
+}
+
+CRITICALITY_WEIGHTS = {
+    'low': 0.5,
+    'medium': 1.0,
+    'high': 1.5,
+    'critical': 2.0
+}
+
+
+class StrategyOptimizer:
+    """Greedy multiple-choice knapsack over (service, strategy) candidates.
+
+    Each at-risk service gets at most one action. A candidate's value is the
+    gain in expected recovery over doing nothing, weighted by failure
+    probability and criticality, minus energy and latency cost. Candidates
+    are taken in order of value per unit of constrained resource while node
+    capacity and the cycle energy budget allow.
+
+    Service rows persist between cycles: update() only touches the services
+    whose prediction changed and solve() reuses the last plan when nothing did.
+    """
+
+    def __init__(self, energy_by_strategy: np.ndarray, time_by_strategy: np.ndarray,
+                 energy_weight: float = 1.0, latency_weight: float = 0.02):
+        self.energy_weight = energy_weight
+        self.latency_weight = latency_weight
+        self.recovery = RECOVERY_PRIORS.copy()
+        self.demand = np.array([CAPACITY_DEMAND.get(s, 0.0) for s in STRATEGY_ORDER])
+        self.set_costs(energy_by_strategy, time_by_strategy)
+
+        self.service_index: Dict[str, int] = {}
+        self.service_ids: List[str] = []
+        self.active = np.zeros(0, dtype=bool)
+        self.clusters = np.zeros(0, dtype=np.int64)
+        self.probabilities = np.zeros(0)
+        self.weights = np.zeros(0)
+        self.node_codes = np.zeros(0, dtype=np.int64)
+        self.node_names: List[str] = []
+        self.node_index: Dict[str, int] = {}
+        self.dirty = True
+        self.last_plan: List[Dict] = []
+        self.last_key = None
+
+    def set_costs(self, energy_by_strategy: np.ndarray, time_by_strategy: np.ndarray):
+        """Energy (kWh consumed) and latency (s) cost vectors from HealingSettings' STRATEGY_ORDER arrays"""
+        self.energy_cost = -np.asarray(energy_by_strategy, dtype=float)
+        self.latency_cost = np.tile(np.asarray(time_by_strategy, dtype=float), (len(self.recovery), 1))
+        self.dirty = True
+
+    def set_recovery(self, recovery: np.ndarray, execution_time: np.ndarray = None):
+        """Replace the cluster x strategy recovery-probability (and latency) tables"""
+        self.recovery = np.asarray(recovery, dtype=float)
+        if execution_time is not None:
+            self.latency_cost = np.asarray(execution_time, dtype=float)
+        self.dirty = True
+
+    def update(self, predictions: Dict[str, Dict]):
+        """Upsert at-risk services; services absent from this cycle become inactive"""
+        grow = [sid for sid in predictions if sid not in self.service_index]
+        if grow:
+            start = len(self.service_ids)
+            for offset, sid in enumerate(grow):
+                self.service_index[sid] = start + offset
+            self.service_ids.extend(grow)
+            self.active = np.concatenate([self.active, np.zeros(len(grow), dtype=bool)])
+            self.clusters = np.concatenate([self.clusters, np.zeros(len(grow), dtype=np.int64)])
+            self.probabilities = np.concatenate([self.probabilities, np.zeros(len(grow))])
+            self.weights = np.concatenate([self.weights, np.zeros(len(grow))])
+            self.node_codes = np.concatenate([self.node_codes, np.zeros(len(grow), dtype=np.int64)])
+
+        n = len(predictions)
+        values = list(predictions.values())
+        rows = np.fromiter((self.service_index[sid] for sid in predictions), dtype=np.int64, count=n)
+        clusters = np.fromiter((p.get('cluster', 0) for p in values), dtype=np.int64, count=n)
+        probabilities = np.fromiter((p.get('probability', 0.0) for p in values), dtype=float, count=n)
+        weights = np.fromiter((CRITICALITY_WEIGHTS.get(p.get('criticality', 'medium'), 1.0)
+                               for p in values), dtype=float, count=n)
+        node_codes = np.fromiter((self.node_code(p.get('node', '')) for p in values),
+                                 dtype=np.int64, count=n)
+
+        active = np.zeros_like(self.active)
+        active[rows] = True
+        changed = (not np.array_equal(active, self.active)
+                   or not np.array_equal(self.clusters[rows], clusters)
+                   or not np.array_equal(self.probabilities[rows], probabilities)
+                   or not np.array_equal(self.weights[rows], weights)
+                   or not np.array_equal(self.node_codes[rows], node_codes))
+        if changed:
+            self.active = active
+            self.clusters[rows] = clusters
+            self.probabilities[rows] = probabilities
+            self.weights[rows] = weights
+            self.node_codes[rows] = node_codes
+            self.dirty = True
+
+    def node_code(self, node: str) -> int:
+        """Small integer id for a node name"""
+        code = self.node_index.get(node)
+        if code is None:
+            code = self.node_index[node] = len(self.node_names)
+            self.node_names.append(node)
+        return code
+
+    def gains(self, rows: np.ndarray) -> np.ndarray:
+        """Value of each strategy over doing nothing, shape (len(rows), n_strategies)"""
+        clusters = np.clip(self.clusters[rows], 0, len(self.recovery) - 1)
+        recovery = self.recovery[clusters]
+        uplift = recovery - recovery[:, DO_NOTHING:DO_NOTHING + 1]
+        benefit = (self.probabilities[rows] * self.weights[rows])[:, None] * uplift
+        cost = (self.energy_weight * np.maximum(self.energy_cost, 0.0)[None, :]
+                + self.latency_weight * self.latency_cost[clusters])
+        gain = benefit - cost
+        gain[:, DO_NOTHING] = 0.0
+        return gain
+
+    def solve(self, node_capacity: Dict[str, float] = None, energy_budget: float = None,
+              max_actions: int = None, time_budget: float = 0.05) -> List[Dict]:
+        """Return the chosen actions for every active service, best first"""
+        key = (tuple(sorted((node_capacity or {}).items())), energy_budget, max_actions)
+        if not self.dirty and key == self.last_key:
+            return self.last_plan
+
+        started = time.perf_counter()
+        rows = np.flatnonzero(self.active)
+        gain = self.gains(rows)
+        energy_use = np.maximum(self.energy_cost, 0.0)
+        budget_share = energy_use / energy_budget if energy_budget else np.zeros_like(energy_use)
+        weight = 1.0 + budget_share + self.demand
+
+        # Each service's options in order of gain; services ordered by best value density
+        options = np.argsort(-gain, axis=1, kind='stable')
+        best = options[:, 0]
+        best_gain = gain[np.arange(len(rows)), best]
+        candidates = np.flatnonzero(best_gain > 0)
+        candidates = candidates[np.argsort(-(best_gain / weight[best])[candidates], kind='stable')]
+
+        chosen = np.full(len(rows), -1, dtype=np.int64)
+        unconstrained = (self.demand == 0) & (energy_use == 0)
+        if max_actions is None:
+            # Options that use no capacity or budget are accepted in one vectorized step
+            free = unconstrained[best[candidates]]
+            chosen[candidates[free]] = best[candidates[free]]
+            candidates = candidates[~free]
+
+        capacity = np.full(len(self.node_names), np.inf)
+        for node, slots in (node_capacity or {}).items():
+            if node in self.node_index:
+                capacity[self.node_index[node]] = slots
+        energy_left = energy_budget if energy_budget is not None else float('inf')
+        accepted = int((chosen >= 0).sum())
+
+        for position, local in enumerate(candidates.tolist()):
+            if max_actions is not None and accepted >= max_actions:
+                break
+            if position % 1024 == 0 and time.perf_counter() - started > time_budget:
+                logger.warning(f"⏱️ Optimizer hit its {time_budget * 1000:.0f} ms budget "
+                               f"after {accepted} actions")
+                break
+            node = self.node_codes[rows[local]]
+            for strategy in options[local].tolist():
+                if gain[local, strategy] <= 0:
+                    break
+                need = self.demand[strategy]
+                if need > capacity[node] or energy_use[strategy] > energy_left:
+                    continue
+                capacity[node] -= need
+                energy_left -= energy_use[strategy]
+                chosen[local] = strategy
+                accepted += 1
+                break
+
+        picked = np.flatnonzero(chosen >= 0)
+        picked = picked[np.argsort(-gain[picked, chosen[picked]], kind='stable')]
+        picked_clusters = np.clip(self.clusters[rows[picked]], 0, len(self.recovery) - 1)
+        plan = [{
+            'service_id': self.service_ids[rows[local]],
+            'strategy': STRATEGY_ORDER[strategy],
+            'expected_value': value,
+            'energy_cost_kwh': energy,
+            'execution_time': latency
+        } for local, strategy, value, energy, latency in zip(
+            picked.tolist(), chosen[picked].tolist(), gain[picked, chosen[picked]].tolist(),
+            self.energy_cost[chosen[picked]].tolist(),
+            self.latency_cost[picked_clusters, chosen[picked]].tolist()
+        )]
+
+        self.dirty = False
+        self.last_key = key
+        self.last_plan = plan
+        return plan
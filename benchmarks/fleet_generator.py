@@ -0,0 +1,146 @@
+"""
+Synthetic Fleet Generator - Reproducible service fleets and metric streams for benchmarks
+"""
+from enum import Enum
+from typing import Dict, List
+
+import numpy as np
+
+from agent.energy_model import DEFAULT_CARBON_INTENSITY
+
+# Same profile buckets MetricsAgent uses for energy (watts)
+ENERGY_PROFILES = {
+    'low': 50,
+    'medium': 150,
+    'high': 300
+}
+
+SERVICE_TYPES = ['backend', 'security', 'database', 'cache', 'gateway']
+CRITICALITIES = ['medium', 'high', 'critical']
+
+
+class InjectionPattern(Enum):
+    NONE = "none"                  # Healthy fleet, no failures
+    RANDOM = "random"              # Independent failures at a fixed rate
+    BURST = "burst"                # Correlated outage hitting a slice of the fleet
+    SLOW_LEAK = "slow_leak"        # Memory grows tick over tick until exhaustion
+    ENERGY_SPIKE = "energy_spike"  # Power draw jumps well above profile
+
+
+class FleetGenerator:
+    """Generates a fleet of services and per-tick metrics in the MetricsAgent schema.
+
+    All randomness comes from a seeded NumPy generator so the same
+    (size, seed, pattern, failure_rate) always yields the same stream.
+    """
+
+    def __init__(self, size: int, seed: int = 42,
+                 pattern: InjectionPattern = InjectionPattern.RANDOM,
+                 failure_rate: float = 0.05, services: List[Dict] = None):
+        self.size = size if services is None else len(services)
+        self.seed = seed
+        self.pattern = InjectionPattern(pattern)
+        self.failure_rate = failure_rate
+        # A pre-built service list (e.g. one runtime shard) replaces the generated one
+        self.services = self.generate_services() if services is None else services
+
+        # Services that leak memory are fixed up-front so the leak accumulates
+        leak_rng = np.random.default_rng(seed + 1)
+        self.leaking = leak_rng.random(self.size) < failure_rate
+
+    def generate_services(self) -> List[Dict]:
+        """Generate service descriptors shaped like MetricsAgent.discover_services"""
+        rng = np.random.default_rng(self.seed)
+        profiles = list(ENERGY_PROFILES)
+        type_idx = rng.integers(0, len(SERVICE_TYPES), self.size)
+        crit_idx = rng.integers(0, len(CRITICALITIES), self.size)
+        profile_idx = rng.integers(0, len(profiles), self.size)
+
+        services = []
+        for i in range(self.size):
+            service_type = SERVICE_TYPES[type_idx[i]]
+            services.append({
+                'id': f"{service_type}-service-{i:06d}",
+                'name': f"{service_type.title()} Service {i}",
+                'type': service_type,
+                'endpoint': f"http://{service_type}-{i}:8080",
+                'criticality': CRITICALITIES[crit_idx[i]],
+                'energy_profile': profiles[profile_idx[i]]
+            })
+        return services
+
+    def failure_mask(self, tick: int, rng: np.random.Generator) -> np.ndarray:
+        """Boolean mask of services that should look unhealthy on this tick"""
+        if self.pattern == InjectionPattern.NONE:
+            return np.zeros(self.size, dtype=bool)
+        if self.pattern == InjectionPattern.BURST:
+            # Every third tick a contiguous slice of the fleet goes down together
+            mask = np.zeros(self.size, dtype=bool)
+            if tick % 3 == 2:
+                width = max(1, int(self.size * self.failure_rate))
+                start = int(rng.integers(0, max(1, self.size - width + 1)))
+                mask[start:start + width] = True
+            return mask
+        if self.pattern == InjectionPattern.SLOW_LEAK:
+            return self.leaking
+        return rng.random(self.size) < self.failure_rate
+
+    def generate_metrics(self, tick: int) -> Dict[str, Dict]:
+        """Generate one collection sweep for the whole fleet"""
+        rng = np.random.default_rng((self.seed, tick))
+        n = self.size
+
+        cpu = rng.uniform(10, 70, n)
+        memory = rng.uniform(20, 70, n)
+        error_rate = rng.uniform(0.001, 0.05, n)
+        base_energy = np.array([ENERGY_PROFILES[s['energy_profile']] for s in self.services])
+        energy = base_energy * rng.uniform(0.6, 0.8, n)
+
+        failing = self.failure_mask(tick, rng)
+        if self.pattern == InjectionPattern.SLOW_LEAK:
+            memory = np.where(failing, np.minimum(99.0, memory + 8.0 * tick), memory)
+        elif self.pattern == InjectionPattern.ENERGY_SPIKE:
+            energy = np.where(failing, base_energy * rng.uniform(1.2, 1.6, n) + 100, energy)
+        elif self.pattern != InjectionPattern.NONE:
+            cpu = np.where(failing, rng.uniform(91, 100, n), cpu)
+            error_rate = np.where(failing, rng.uniform(0.2, 0.4, n), error_rate)
+
+        memory_available = rng.uniform(0.5, 16, n)
+        disk_io = rng.uniform(0, 100, n)
+        latency = rng.uniform(10, 500, n)
+        request_rate = rng.uniform(50, 1000, n)
+        response_time = rng.uniform(50, 800, n)
+        connections = rng.integers(10, 500, n)
+        efficiency = rng.uniform(0.7, 0.95, n)
+        health = np.where(failing, rng.uniform(10, 40, n), rng.uniform(70, 100, n))
+        timestamp = f"tick-{tick}"
+
+        metrics = {}
+        columns = zip(
+            self.services, cpu.tolist(), memory.tolist(), memory_available.tolist(),
+            disk_io.tolist(), latency.tolist(), request_rate.tolist(), error_rate.tolist(),
+            response_time.tolist(), connections.tolist(), energy.tolist(),
+            efficiency.tolist(), health.tolist(), failing.tolist()
+        )
+        for (service, c, m, avail, disk, lat, req, err, resp, conn, watts,
+             eff, score, down) in columns:
+            metrics[service['id']] = {
+                'service_id': service['id'],
+                'service_name': service['name'],
+                'timestamp': timestamp,
+                'cpu_usage_percent': c,
+                'memory_usage_percent': m,
+                'memory_available_gb': avail,
+                'disk_io_percent': disk,
+                'network_latency_ms': lat,
+                'request_rate': req,
+                'error_rate': err,
+                'response_time_ms': resp,
+                'active_connections': conn,
+                'energy_consumption_watts': watts,
+                'carbon_footprint_kg': (watts / 1000) * DEFAULT_CARBON_INTENSITY,
+                'energy_efficiency_score': eff,
+                'health_score': score,
+                'status': 'unhealthy' if down else 'healthy'
+            }
+        return metrics
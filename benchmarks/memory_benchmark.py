@@ -0,0 +1,158 @@
+"""
+Memory Benchmark - Per-record memory of dict vs slotted samples, predictions and healing events
+
+Usage:
+    python benchmarks/memory_benchmark.py --services 100000 --output memory_bench.json
+"""
+import sys
+from pathlib import Path
+
+# ---------- FIX PYTHON PATH ----------
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+# --------------------------------------
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from agent.records import HealingEvent, MetricSample, Prediction
+from predictor import feature_schema
+
+FEATURES = list(feature_schema.layout('agent').keys)
+
+
+def columns(services: int, seed: int) -> Dict[str, List]:
+    """Field values shared by both layouts, so only the container differs"""
+    rng = np.random.default_rng(seed)
+    now = time.time()
+    return {
+        # Ids come from a parse/decode, as in collection, so equal ids are distinct objects
+        'service_id': [f"service-{i:06d}" for i in range(services)],
+        'timestamp': (now + rng.uniform(0, 1, services)).tolist(),
+        'values': rng.uniform(0, 100, (services, 12)).tolist(),
+        'connections': rng.integers(10, 500, services).tolist(),
+        'probability': rng.uniform(0, 1, services).tolist()
+    }
+
+
+def sample_dicts(data: Dict) -> List[Dict]:
+    """MetricsAgent samples as they used to be built: wide dicts with ISO timestamps"""
+    return [{
+        'service_id': sid,
+        'service_name': sid,
+        'timestamp': datetime.fromtimestamp(ts).isoformat(),
+        'cpu_usage_percent': v[0], 'memory_usage_percent': v[1], 'memory_available_gb': v[2],
+        'disk_io_percent': v[3], 'network_latency_ms': v[4], 'request_rate': v[5],
+        'error_rate': v[6], 'response_time_ms': v[7], 'active_connections': conn,
+        'energy_efficiency_score': v[8], 'health_score': v[9],
+        'status': 'healthy', 'energy_consumption_watts': v[10], 'carbon_footprint_kg': v[11]
+    } for sid, ts, v, conn in zip(data['service_id'], data['timestamp'], data['values'],
+                                  data['connections'])]
+
+
+def sample_records(data: Dict) -> List[MetricSample]:
+    samples = []
+    for sid, ts, v, conn in zip(data['service_id'], data['timestamp'], data['values'],
+                                data['connections']):
+        sample = MetricSample(sid, sid, ts, v[0], v[1], v[2], v[3], v[4], v[5], v[6], v[7],
+                              conn, v[8], v[9], 'healthy')
+        sample.energy_consumption_watts = v[10]
+        sample.carbon_footprint_kg = v[11]
+        samples.append(sample)
+    return samples
+
+
+def prediction_dicts(data: Dict) -> List[Dict]:
+    """FailurePredictor output as it used to be built: a features_used copy per prediction"""
+    return [{
+        'service_id': sid, 'will_fail': p > 0.7, 'probability': p, 'cluster': 1,
+        'confidence': 1 - abs(p - 0.5) * 2, 'features_used': list(FEATURES),
+        'timestamp': datetime.fromtimestamp(ts).isoformat(), 'model_used': 'rule_based'
+    } for sid, ts, p in zip(data['service_id'], data['timestamp'], data['probability'])]
+
+
+def prediction_records(data: Dict) -> List[Prediction]:
+    features = tuple(FEATURES)
+    return [Prediction(sid, p > 0.7, p, 1, 1 - abs(p - 0.5) * 2, ts, 'rule_based', features)
+            for sid, ts, p in zip(data['service_id'], data['timestamp'], data['probability'])]
+
+
+def healing_dicts(data: Dict) -> List[Dict]:
+    """HealingController.healing_history entries as they used to be built"""
+    return [{
+        'timestamp': datetime.fromtimestamp(ts).isoformat(), 'service_id': sid,
+        'strategy': 'scale_up', 'prediction_cluster': 1, 'prediction_probability': v[0],
+        'expected_energy_saving': v[1], 'actual_energy_saving': v[2],
+        'execution_time_seconds': v[3], 'status': 'success', 'region': 'eu-west',
+        'target_node': None, 'carbon_intensity': v[4], 'requested_carbon_intensity': v[4],
+        'deferred_seconds': 0.0, 'carbon_reduction_kg': v[5]
+    } for sid, ts, v in zip(data['service_id'], data['timestamp'], data['values'])]
+
+
+def healing_records(data: Dict) -> List[HealingEvent]:
+    return [HealingEvent(ts, sid, 'scale_up', 1, v[0], v[1], v[2], v[3], 'success', 'eu-west',
+                         v[5], target_node=None, carbon_intensity=v[4],
+                         requested_carbon_intensity=v[4], deferred_seconds=0.0)
+            for sid, ts, v in zip(data['service_id'], data['timestamp'], data['values'])]
+
+
+def measure(build: Callable, data: Dict) -> Dict:
+    """Bytes allocated by build() that are still alive, beyond the input columns"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    built = build(data)
+    seconds = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(built)
+    del built
+    return {
+        'records': count,
+        'build_seconds': seconds,
+        'retained_mb': current / (1024 ** 2),
+        'bytes_per_record': current / max(1, count),
+        'peak_mb': peak / (1024 ** 2)
+    }
+
+
+KINDS = {
+    'metric_sample': (sample_dicts, sample_records),
+    'prediction': (prediction_dicts, prediction_records),
+    'healing_event': (healing_dicts, healing_records)
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dict vs slotted record memory")
+    parser.add_argument('--services', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='memory_bench.json')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for kind, (as_dicts, as_records) in KINDS.items():
+        # Fresh columns per layout: records intern ids, which would otherwise leak into the dict run
+        dicts = measure(as_dicts, columns(args.services, args.seed))
+        records = measure(as_records, columns(args.services, args.seed))
+        ratio = dicts['bytes_per_record'] / records['bytes_per_record']
+        results[kind] = {'dict': dicts, 'record': records, 'reduction': ratio}
+        print(f"{kind:<14} dict {dicts['bytes_per_record']:>7.0f} B | record "
+              f"{records['bytes_per_record']:>6.0f} B | {ratio:.1f}x smaller "
+              f"({dicts['retained_mb']:.1f} -> {records['retained_mb']:.1f} MB "
+              f"for {args.services} services)")
+
+    with open(args.output, 'w') as f:
+        json.dump({'args': vars(args), 'results': results}, f, indent=2)
+    print(f"\n💾 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Metrics Store Benchmark - Range query latency on a synthetic metrics table before and after indexing,
+and healing_log aggregation from metrics_json blobs vs the typed healing_metrics table
+
+Usage:
+    python benchmarks/metrics_store_benchmark.py --rows 10000000 --healing-rows 1000000 --db /tmp/metrics_bench.db
+"""
+import sys
+from pathlib import Path
+
+# ---------- FIX PYTHON PATH ----------
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+# --------------------------------------
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from backend.metrics_store import MetricsStore, migrate
+
+# Same DDL the Spring backend generates for smart_energy.db
+METRICS_DDL = ("CREATE TABLE metrics (id integer, cpu float, diskio float, energy float, "
+               "latency_ms bigint, memory float, network float, service_name varchar(255), "
+               "timestamp timestamp, primary key (id))")
+HEALING_DDL = ("CREATE TABLE healing_log (id integer, action_taken varchar(255), metrics_json TEXT, "
+               "predicted_cluster integer not null, service_name varchar(255), "
+               "timestamp bigint not null, primary key (id))")
+START_MS = 1_760_000_000_000
+
+
+def build_database(path: str, rows: int, services: int, interval_ms: int, seed: int,
+                   healing_rows: int = 0):
+    """Synthetic metrics table: `services` services sampled round-robin every interval_ms,
+    plus healing_log rows with the JSON blobs the Spring backend writes"""
+    if os.path.exists(path):
+        os.remove(path)
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode = OFF")
+    db.execute("PRAGMA synchronous = OFF")
+    db.execute(METRICS_DDL)
+    db.execute(HEALING_DDL)
+    rng = np.random.default_rng(seed)
+    names = [f"service-{i:05d}" for i in range(services)]
+    chunk = 200_000
+    for offset in range(0, rows, chunk):
+        n = min(chunk, rows - offset)
+        index = np.arange(offset, offset + n)
+        columns = zip(
+            rng.uniform(5, 95, n).tolist(), rng.uniform(0, 100, n).tolist(),
+            rng.uniform(20, 300, n).tolist(), rng.integers(5, 500, n).tolist(),
+            rng.uniform(200, 8000, n).tolist(), rng.uniform(0, 20, n).tolist(),
+            [names[i % services] for i in index.tolist()],
+            (START_MS + (index // services) * interval_ms).tolist()
+        )
+        db.executemany("INSERT INTO metrics (cpu, diskio, energy, latency_ms, memory, network, "
+                       "service_name, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", columns)
+        db.commit()
+    for offset in range(0, healing_rows, chunk):
+        n = min(chunk, healing_rows - offset)
+        blobs = (json.dumps({
+            "CPU_Usage (%)": cpu, "Memory_Usage (MB)": memory, "Network_Usage (MBps)": network,
+            "Disk_IO (MBps)": disk, "Energy_Consumption (Watts)": energy,
+            "Service_Latency (ms)": latency, "Predicted_Workload (%)": workload,
+            "Task_Priority": priority, "Workload_Type": kind
+        }) for cpu, memory, network, disk, energy, latency, workload, priority, kind in zip(
+            rng.uniform(5, 95, n).tolist(), rng.uniform(200, 8000, n).tolist(),
+            rng.uniform(0, 500, n).tolist(), rng.uniform(0, 100, n).tolist(),
+            rng.uniform(20, 300, n).tolist(), rng.uniform(5, 500, n).tolist(),
+            rng.uniform(0, 100, n).tolist(), rng.integers(0, 3, n).tolist(),
+            rng.integers(0, 3, n).tolist()))
+        db.executemany("INSERT INTO healing_log (action_taken, metrics_json, predicted_cluster, "
+                       "service_name, timestamp) VALUES (?, ?, ?, ?, ?)", zip(
+                           rng.choice(['RESTART', 'SCALE', 'REROUTE'], n).tolist(), blobs,
+                           rng.integers(0, 5, n).tolist(),
+                           [names[i] for i in rng.integers(0, services, n).tolist()],
+                           (START_MS + np.arange(offset, offset + n) * 1000).tolist()))
+        db.commit()
+    db.close()
+
+
+def timed(fn: Callable, repeat: int) -> Dict:
+    """Median and max latency (ms) of fn over `repeat` runs"""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {'p50_ms': samples[len(samples) // 2], 'max_ms': samples[-1]}
+
+
+def run_queries(db_path: str, services: int, interval_ms: int, rows: int, repeat: int) -> Dict:
+    """Time the query mix the store serves"""
+    store = MetricsStore(db_path, auto_migrate=False)
+    span_ms = (rows // services) * interval_ms
+    service = f"service-{services // 2:05d}"
+    hour_start = START_MS + span_ms // 2
+    hour_end = hour_start + 3_600_000
+
+    results = {
+        'service_hour_range': timed(
+            lambda: list(store.iter_metrics(service, hour_start, hour_end)), repeat),
+        'service_latest_100': timed(lambda: store.latest_metrics(service, 100), repeat),
+        'fleet_minute_range': timed(
+            lambda: list(store.iter_metrics(None, hour_start, hour_start + 60_000)), repeat),
+        'keyset_page_100': timed(
+            lambda: store.page_metrics(service, hour_start, limit=100), repeat)
+    }
+
+    # Full export of one service: peak Python heap stays at one batch
+    tracemalloc.start()
+    exported = sum(1 for _ in store.iter_metrics(service, batch_size=5000))
+    results['service_export'] = {
+        'rows': exported,
+        'traced_peak_mb': tracemalloc.get_traced_memory()[1] / (1024 ** 2)
+    }
+    tracemalloc.stop()
+    store.close()
+    return results
+
+
+def aggregate_from_json(db_path: str) -> List[Dict]:
+    """Per-service action count and mean/max energy the pre-columnar way: parse every blob"""
+    db = sqlite3.connect(db_path)
+    groups = defaultdict(lambda: [0, 0.0, 0.0])
+    for service, blob in db.execute("SELECT service_name, metrics_json FROM healing_log"):
+        energy = json.loads(blob).get("Energy_Consumption (Watts)", 0.0)
+        group = groups[service]
+        group[0] += 1
+        group[1] += energy
+        group[2] = max(group[2], energy)
+    db.close()
+    return [{'service_name': s, 'actions': n, 'avg_energy': total / n, 'max_energy': peak}
+            for s, (n, total, peak) in groups.items()]
+
+
+def run_healing(db_path: str, repeat: int) -> Dict:
+    """Backfill healing_metrics, then compare JSON-parse and SQL aggregation"""
+    store = MetricsStore(db_path, auto_migrate=False)
+    t0 = time.perf_counter()
+    backfilled = store.backfill_healing_metrics()
+    results = {
+        'backfilled_rows': backfilled,
+        'backfill_seconds': time.perf_counter() - t0,
+        'json_parse_aggregate': timed(lambda: aggregate_from_json(db_path), max(1, repeat // 2)),
+        'sql_aggregate': timed(lambda: store.healing_aggregates('service_name'), repeat)
+    }
+    store.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="metrics table index benchmark")
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--healing-rows', type=int, default=1_000_000)
+    parser.add_argument('--services', type=int, default=1000)
+    parser.add_argument('--interval-ms', type=int, default=30_000)
+    parser.add_argument('--db', default='metrics_bench.db')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='metrics_store_bench.json')
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    build_database(args.db, args.rows, args.services, args.interval_ms, args.seed, args.healing_rows)
+    print(f"Built {args.rows:,} metrics + {args.healing_rows:,} healing rows "
+          f"in {time.perf_counter() - t0:.1f}s")
+
+    before = run_queries(args.db, args.services, args.interval_ms, args.rows, max(1, args.repeat // 2))
+    t0 = time.perf_counter()
+    migrate(args.db)
+    migration_seconds = time.perf_counter() - t0
+    after = run_queries(args.db, args.services, args.interval_ms, args.rows, args.repeat)
+    healing = run_healing(args.db, args.repeat)
+
+    print(f"Migration (index build): {migration_seconds:.1f}s")
+    for name in before:
+        if 'p50_ms' in before[name]:
+            print(f"  {name:<20} {before[name]['p50_ms']:>10.2f} ms -> {after[name]['p50_ms']:>8.2f} ms")
+    print(f"  service export       {after['service_export']['rows']:,} rows, "
+          f"peak heap {after['service_export']['traced_peak_mb']:.1f} MB")
+    print(f"  healing backfill     {healing['backfilled_rows']:,} rows in {healing['backfill_seconds']:.1f}s")
+    print(f"  healing aggregate    {healing['json_parse_aggregate']['p50_ms']:>10.2f} ms -> "
+          f"{healing['sql_aggregate']['p50_ms']:>8.2f} ms")
+
+    report = {
+        'rows': args.rows,
+        'services': args.services,
+        'db_size_mb': os.path.getsize(args.db) / (1024 ** 2),
+        'migration_seconds': migration_seconds,
+        'before': before,
+        'after': after,
+        'healing': healing
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
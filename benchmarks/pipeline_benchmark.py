@@ -0,0 +1,313 @@
+"""
+Pipeline Benchmark - Drives collect -> predict -> plan -> heal in-process on synthetic fleets
+
+Usage:
+    python benchmarks/pipeline_benchmark.py --sizes 10 1000 100000 --output bench.json
+    python benchmarks/pipeline_benchmark.py --compare bench_before.json bench_after.json
+"""
+import sys
+from pathlib import Path
+
+# ---------- FIX PYTHON PATH ----------
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+# --------------------------------------
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks.fleet_generator import FleetGenerator, InjectionPattern
+from backend.healing_controller import HealingController
+from backend.orchestrator import FakeCluster
+from predictor.failure_predictor import FailurePredictor
+from predictor.model_artifacts import ARTIFACT_ENV, ModelArtifacts
+
+logger = logging.getLogger(__name__)
+
+STAGES = ['collect', 'predict', 'plan', 'heal']
+# collect, predict and plan process the whole fleet in one call, so their latency
+# percentiles are over per-tick batches; heal actions are timed one by one
+BATCH_STAGES = {'collect', 'predict', 'plan'}
+DEFAULT_SIZES = [10, 1000, 100000]
+# The predictor always takes the rule-based path, whatever model files are on disk
+PREDICTOR_PATH = 'rule_based'
+
+
+class StubbedHealingController(HealingController):
+    """HealingController whose actions complete instantly and always succeed"""
+
+    async def simulate_healing_action(self, strategy: str):
+        return True, 0.0
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], items: int, wall_seconds: float, unit: str) -> Dict:
+    """Summarize measured latencies (seconds, one per `unit`) for one stage"""
+    ordered = sorted(latencies)
+    return {
+        'count': items,
+        'latency_unit': unit,
+        'samples': len(ordered),
+        'total_seconds': wall_seconds,
+        'throughput_per_sec': items / wall_seconds if wall_seconds > 0 else 0.0,
+        'mean_item_ms': wall_seconds / items * 1000 if items else 0.0,
+        'p50_ms': percentile(ordered, 50) * 1000,
+        'p99_ms': percentile(ordered, 99) * 1000,
+        'max_ms': ordered[-1] * 1000 if ordered else 0.0
+    }
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's peak RSS counter so the next reading covers one run (Linux only)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size in MB, since the last reset_peak_rss() where supported"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Fallback: process-lifetime peak
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS reports bytes
+        return peak / (1024 ** 2) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 ** 2)
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB"""
+    import psutil
+    return psutil.Process().memory_info().rss / (1024 ** 2)
+
+
+def git_commit() -> str:
+    """Current commit hash, so reports can be compared between commits"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=root_dir,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+
+def rule_based_artifacts() -> ModelArtifacts:
+    """Artifacts with every model marked unavailable, so nothing is loaded from config.yaml"""
+    artifacts = ModelArtifacts({name: '' for name in ARTIFACT_ENV})
+    for name in ARTIFACT_ENV:
+        artifacts.set(name, None)
+    return artifacts
+
+
+async def run_fleet(size: int, ticks: int, seed: int, pattern: InjectionPattern,
+                    failure_rate: float, trace_memory: bool, fake_cluster: bool = False) -> Dict:
+    """Run the full pipeline for one fleet size and return its stage summary"""
+    generator = FleetGenerator(size, seed=seed, pattern=pattern, failure_rate=failure_rate)
+    predictor = FailurePredictor(artifacts=rule_based_artifacts())
+    if fake_cluster:
+        # Heal against an in-process cluster (no sleeping) instead of the stub
+        cluster = FakeCluster(time_scale=0.0, seed=seed)
+        for i in range(max(1, size // 50)):
+            cluster.add_node(f"node-{i}", 64.0, 256.0)
+        for service in generator.services:
+            cluster.create_deployment(service['id'], 2, 0.5, 1.0)
+        controller = HealingController(orchestrator=cluster)
+    else:
+        controller = StubbedHealingController()
+
+    latencies = {stage: [] for stage in STAGES}
+    items = {stage: 0 for stage in STAGES}
+    wall = {stage: 0.0 for stage in STAGES}
+
+    gc.collect()
+    # Memory is measured per run: baseline RSS now, peak RSS from here on
+    per_run_peak = reset_peak_rss()
+    baseline_rss_mb = rss_mb()
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+
+    for tick in range(ticks):
+        # ---- collect ----
+        t0 = time.perf_counter()
+        metrics = generator.generate_metrics(tick)
+        elapsed = time.perf_counter() - t0
+        wall['collect'] += elapsed
+        latencies['collect'].append(elapsed)
+        items['collect'] += len(metrics)
+
+        # ---- predict ----
+        # Batched so the anomaly detector screens the fleet before the model runs
+        t0 = time.perf_counter()
+        predictions = await predictor.predict(metrics)
+        elapsed = time.perf_counter() - t0
+        wall['predict'] += elapsed
+        latencies['predict'].append(elapsed)
+        items['predict'] += len(metrics)
+
+        # ---- plan ----
+        at_risk = {sid: p for sid, p in predictions.items() if p.get('will_fail')}
+        t0 = time.perf_counter()
+        plan = controller.plan_cycle(at_risk)
+        elapsed = time.perf_counter() - t0
+        wall['plan'] += elapsed
+        latencies['plan'].append(elapsed)
+        items['plan'] += len(at_risk)
+
+        # ---- heal ----
+        t0 = time.perf_counter()
+        for action in plan:
+            s0 = time.perf_counter()
+            await controller.execute_healing(action['service_id'], at_risk[action['service_id']],
+                                             strategy=action['strategy'])
+            latencies['heal'].append(time.perf_counter() - s0)
+            items['heal'] += 1
+        wall['heal'] += time.perf_counter() - t0
+
+    total_seconds = time.perf_counter() - started
+    traced_peak_mb = None
+    if trace_memory:
+        traced_peak_mb = tracemalloc.get_traced_memory()[1] / (1024 ** 2)
+        tracemalloc.stop()
+
+    return {
+        'fleet_size': size,
+        'ticks': ticks,
+        'total_seconds': total_seconds,
+        'services_per_sec': size * ticks / total_seconds if total_seconds > 0 else 0.0,
+        'healing_actions': len(latencies['heal']),
+        'stages': {stage: summarize(latencies[stage], items[stage], wall[stage],
+                                    'batch' if stage in BATCH_STAGES else 'item')
+                   for stage in STAGES},
+        'baseline_rss_mb': baseline_rss_mb,
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_per_run': per_run_peak,
+        'traced_peak_mb': traced_peak_mb
+    }
+
+
+async def run_benchmark(args) -> Dict:
+    """Run every requested fleet size and build the report"""
+    results = []
+    for size in args.sizes:
+        logger.info(f"📏 Benchmarking fleet of {size} services...")
+        result = await run_fleet(size, args.ticks, args.seed, InjectionPattern(args.pattern),
+                                 args.failure_rate, args.trace_memory, args.fake_cluster)
+        results.append(result)
+        print_result(result)
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'pattern': args.pattern,
+            'failure_rate': args.failure_rate,
+            'ticks': args.ticks,
+            'fake_cluster': args.fake_cluster,
+            'predictor': PREDICTOR_PATH
+        },
+        'results': results
+    }
+
+
+def print_result(result: Dict):
+    """Print a one-line-per-stage summary"""
+    print(f"\nFleet {result['fleet_size']:>7} | {result['services_per_sec']:,.0f} services/s "
+          f"| heals {result['healing_actions']} | RSS {result['baseline_rss_mb']:.1f} -> "
+          f"peak {result['peak_rss_mb']:.1f} MB")
+    for stage, s in result['stages'].items():
+        print(f"  {stage:<8} n={s['count']:<8} {s['throughput_per_sec']:>12,.0f}/s "
+              f"mean={s['mean_item_ms']:.4f}ms/item | per {s['latency_unit']}: "
+              f"p50={s['p50_ms']:.4f}ms p99={s['p99_ms']:.4f}ms")
+
+
+def compare_reports(before_path: str, after_path: str):
+    """Print per-stage throughput and p99 deltas between two reports"""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    print(f"Comparing {before['meta']['commit']} -> {after['meta']['commit']}")
+    previous = {r['fleet_size']: r for r in before['results']}
+    for result in after['results']:
+        base = previous.get(result['fleet_size'])
+        if base is None:
+            continue
+        print(f"\nFleet {result['fleet_size']}")
+        for stage in STAGES:
+            old, new = base['stages'][stage], result['stages'][stage]
+            speedup = (new['throughput_per_sec'] / old['throughput_per_sec']
+                       if old['throughput_per_sec'] else float('nan'))
+            print(f"  {stage:<8} throughput x{speedup:.2f}  "
+                  f"p99 {old['p99_ms']:.4f}ms -> {new['p99_ms']:.4f}ms")
+        print(f"  peak RSS {base['peak_rss_mb']:.1f} MB -> {result['peak_rss_mb']:.1f} MB")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end recovery pipeline benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--ticks', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pattern', choices=[p.value for p in InjectionPattern],
+                        default=InjectionPattern.RANDOM.value)
+    parser.add_argument('--failure-rate', type=float, default=0.05)
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Also record Python heap peak via tracemalloc (slower)")
+    parser.add_argument('--fake-cluster', action='store_true',
+                        help="Heal against the in-process FakeCluster instead of a stub")
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        compare_reports(*args.compare)
+        return
+
+    # Per-service warnings from the predictor would dominate the timings
+    logging.basicConfig(level=logging.ERROR)
+    report = asyncio.run(run_benchmark(args))
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
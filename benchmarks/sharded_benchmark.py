@@ -0,0 +1,99 @@
+"""
+Sharded Benchmark - Collect + predict throughput of the sharded runtime by worker count
+
+Usage:
+    python benchmarks/sharded_benchmark.py --size 50000 --workers 1 2 4 8
+"""
+import sys
+from pathlib import Path
+
+# ---------- FIX PYTHON PATH ----------
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+# --------------------------------------
+
+import argparse
+import json
+import logging
+import os
+from functools import partial
+from typing import Dict, List
+
+from benchmarks.fleet_generator import FleetGenerator, InjectionPattern
+from backend.sharded_runtime import ShardedRuntime
+
+
+class FleetShardCollector:
+    """Synthetic collector for one shard, shaped like MetricsAgent.collect_metrics"""
+
+    def __init__(self, generator: FleetGenerator):
+        self.generator = generator
+        self.tick = 0
+
+    async def collect_metrics(self) -> Dict[str, Dict]:
+        metrics = self.generator.generate_metrics(self.tick)
+        self.tick += 1
+        return metrics
+
+
+def fleet_collector(services: List[Dict], shard: int, seed: int = 42,
+                    pattern: str = 'random', failure_rate: float = 0.05) -> FleetShardCollector:
+    """Collector factory for ShardedRuntime (top-level so worker processes can import it)"""
+    return FleetShardCollector(FleetGenerator(len(services), seed=seed + shard,
+                                              pattern=InjectionPattern(pattern),
+                                              failure_rate=failure_rate, services=services))
+
+
+def run(size: int, workers: int, ticks: int, seed: int, pattern: str,
+        failure_rate: float) -> Dict:
+    """Throughput for one worker count (first tick excluded as warm-up)"""
+    services = FleetGenerator(size, seed=seed).services
+    runtime = ShardedRuntime(services, workers, partial(fleet_collector, seed=seed, pattern=pattern,
+                                                        failure_rate=failure_rate))
+    runtime.start()
+    try:
+        runtime.collect()
+        wall, at_risk = 0.0, 0
+        for _ in range(ticks):
+            at_risk += len(runtime.collect())
+            wall += runtime.cycle_stats['wall_seconds']
+    finally:
+        runtime.stop()
+    return {
+        'workers': workers,
+        'fleet_size': size,
+        'ticks': ticks,
+        'wall_seconds': wall,
+        'services_per_sec': size * ticks / wall if wall > 0 else 0.0,
+        'at_risk_per_tick': at_risk / ticks if ticks else 0.0
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded runtime scaling benchmark")
+    parser.add_argument('--size', type=int, default=50000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--ticks', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pattern', choices=[p.value for p in InjectionPattern],
+                        default=InjectionPattern.RANDOM.value)
+    parser.add_argument('--failure-rate', type=float, default=0.05)
+    parser.add_argument('--output', default='sharded_bench.json')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    results = []
+    for workers in args.workers:
+        result = run(args.size, workers, args.ticks, args.seed, args.pattern, args.failure_rate)
+        results.append(result)
+        speedup = result['services_per_sec'] / results[0]['services_per_sec']
+        print(f"workers={workers:<3} {result['services_per_sec']:>12,.0f} services/s "
+              f"x{speedup:.2f} | at risk/tick {result['at_risk_per_tick']:.0f}")
+
+    with open(args.output, 'w') as f:
+        json.dump({'cpu_count': os.cpu_count(), 'results': results}, f, indent=2)
+    print(f"\n💾 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Startup Benchmark - Cold import time of each entry point, with the slowest modules per entry
+
+Usage:
+    python benchmarks/startup_benchmark.py --runs 5 --top 10
+    python benchmarks/startup_benchmark.py --modules backend.api_server --warmup
+"""
+import sys
+from pathlib import Path
+
+# ---------- FIX PYTHON PATH ----------
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+# --------------------------------------
+
+import argparse
+import json
+import statistics
+import subprocess
+import time
+from typing import Dict, List
+
+# Modules behind the CLI tools and servers (importing never starts their loops)
+ENTRY_POINTS = [
+    'backend.api_server',
+    'predictor.failure_predictor',
+    'agent.monitoring_agent',
+    'ai_model.predict_cluster',
+    'ai_model.predict_api',
+    'ai_model.predict_server',
+    'predictor.predictor',
+    'app'
+]
+
+# What --warmup adds on top of the import, per entry point
+WARMUP = {
+    'backend.api_server': "mod.warmup()",
+    'predictor.failure_predictor': "mod.FailurePredictor().artifacts.warmup()",
+    'ai_model.predict_cluster': "mod.artifacts.warmup()",
+    'ai_model.predict_api': "mod.artifacts.warmup()",
+    'ai_model.predict_server': "mod.artifacts.warmup()",
+    'app': "mod.artifacts.warmup()"
+}
+
+
+def child_code(module: str, warmup: bool) -> str:
+    code = f"import logging; logging.disable(logging.CRITICAL); import importlib; mod = importlib.import_module({module!r})"
+    if warmup and module in WARMUP:
+        code += f"; {WARMUP[module]}"
+    return code
+
+
+def wall_time(module: str, warmup: bool) -> Dict:
+    """Seconds from interpreter spawn to exit, i.e. what a restarted pod pays before serving"""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", child_code(module, warmup)], cwd=root_dir,
+                          capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    error = proc.stderr.strip().splitlines()[-1] if proc.returncode else None
+    return {'seconds': elapsed, 'error': error}
+
+
+def import_profile(module: str) -> List[Dict]:
+    """Per-module self and cumulative import time (µs) from `python -X importtime`"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", child_code(module, False)],
+                          cwd=root_dir, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({'module': name.strip(), 'self_us': int(self_us),
+                     'cumulative_us': int(cumulative_us)})
+    return rows
+
+
+def top_level_packages(rows: List[Dict], top: int) -> List[Dict]:
+    """Total self time per top-level package, slowest first"""
+    totals: Dict[str, int] = {}
+    for row in rows:
+        package = row['module'].split('.')[0]
+        totals[package] = totals.get(package, 0) + row['self_us']
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{'package': package, 'ms': us / 1000} for package, us in ranked]
+
+
+def run(module: str, runs: int, warmup: bool, top: int) -> Dict:
+    wall_time(module, warmup)  # Prime the page cache and .pyc files
+    samples = [wall_time(module, warmup) for _ in range(runs)]
+    if samples[0]['error']:
+        return {'module': module, 'error': samples[0]['error']}
+    seconds = [s['seconds'] for s in samples]
+    rows = import_profile(module)
+    return {
+        'module': module,
+        'warmup': warmup,
+        'wall_ms_min': min(seconds) * 1000,
+        'wall_ms_median': statistics.median(seconds) * 1000,
+        'modules_imported': len(rows),
+        'top_packages': top_level_packages(rows, top),
+        'top_modules': [{'module': r['module'], 'self_ms': r['self_us'] / 1000}
+                        for r in sorted(rows, key=lambda r: r['self_us'], reverse=True)[:top]]
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Entry point cold start / import time report")
+    parser.add_argument('--modules', nargs='+', default=ENTRY_POINTS)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8)
+    parser.add_argument('--warmup', action='store_true', help="also load models / build caches")
+    parser.add_argument('--output', default='startup_bench.json')
+    args = parser.parse_args(argv)
+
+    baseline = wall_time('sys', False)['seconds'] * 1000
+    print(f"Interpreter alone: {baseline:.0f} ms\n")
+    results = []
+    for module in args.modules:
+        result = run(module, args.runs, args.warmup, args.top)
+        results.append(result)
+        if 'error' in result:
+            print(f"{module:<30} ⚠️ not importable here: {result['error']}\n")
+            continue
+        print(f"{module:<30} {result['wall_ms_median']:>7.0f} ms median "
+              f"({result['wall_ms_min']:.0f} min, {result['modules_imported']} modules)")
+        print("    " + ", ".join(f"{p['package']} {p['ms']:.0f}" for p in result['top_packages']) + "\n")
+
+    with open(args.output, 'w') as f:
+        json.dump({'python': sys.version, 'interpreter_ms': baseline, 'results': results}, f, indent=2)
+    print(f"💾 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
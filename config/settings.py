@@ -0,0 +1,340 @@
+"""
+Settings - Typed, validated view of config.yaml with precomputed lookup tables and change notifications
+"""
+import asyncio
+import logging
+import os
+import threading
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Tuple
+
+import numpy as np
+import yaml
+
+logger = logging.getLogger(__name__)
+
+root_dir = Path(__file__).parent.parent
+
+DEFAULT_CONFIG_PATH = str(root_dir / "config" / "config.yaml")
+# libyaml parses config.yaml ~10x faster than the pure-Python loader
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Column order of every per-strategy array (settings tables and the strategy optimizer)
+STRATEGY_ORDER = ['scale_up', 'scale_down', 'migrate_green', 'restart',
+                  'throttle', 'optimize', 'do_nothing']
+DEFAULT_CARBON_INTENSITY = 0.233  # kg CO2 per kWh (US average)
+
+# Used when config.yaml does not set healing.energy_impact / healing.execution_times
+DEFAULT_ENERGY_IMPACT = {  # kWh saved per action; negative uses more energy
+    'scale_up': -0.3,
+    'scale_down': 0.25,
+    'migrate_green': 0.4,
+    'restart': 0.1,
+    'throttle': 0.35,
+    'optimize': 0.2,
+    'do_nothing': 0.0
+}
+DEFAULT_EXECUTION_TIMES = {  # seconds
+    'scale_up': 2.5,
+    'scale_down': 1.5,
+    'migrate_green': 5.0,
+    'restart': 3.0,
+    'throttle': 1.0,
+    'optimize': 4.0,
+    'do_nothing': 0.1
+}
+DEFAULT_CLUSTER_MAPPING = {1: 'scale_up', 2: 'migrate_green', 3: 'optimize', 4: 'restart', 5: 'throttle'}
+DEFAULT_CRITICAL_THRESHOLDS = {'cpu': 90.0, 'memory': 90.0, 'energy': 250.0}
+# Metric each monitoring.alerting.critical_thresholds key bounds
+THRESHOLD_METRICS = {'cpu': 'cpu_usage_percent', 'memory': 'memory_usage_percent',
+                     'energy': 'energy_consumption_watts'}
+
+
+class ConfigError(ValueError):
+    """config.yaml value with the wrong type or out of range; message starts with its key path"""
+
+
+@dataclass(frozen=True, slots=True)
+class SystemSettings:
+    monitoring_interval: float
+    prediction_threshold: float
+    max_recovery_time: float
+    enable_energy_optimization: bool
+
+
+@dataclass(frozen=True, slots=True)
+class SamplingSettings:
+    min_interval: float
+    max_interval: float
+    samples_per_second: float
+    backoff: float
+    healing_boost_seconds: float
+
+
+@dataclass(frozen=True, slots=True)
+class MonitoringSettings:
+    metrics: Tuple[str, ...]
+    retention_days: int
+    critical_thresholds: Mapping[str, float]
+    sampling: SamplingSettings
+
+    def metric_limits(self) -> Dict[str, float]:
+        """critical_thresholds keyed by the metric each one bounds"""
+        return {THRESHOLD_METRICS[k]: v for k, v in self.critical_thresholds.items()
+                if k in THRESHOLD_METRICS}
+
+
+@dataclass(frozen=True, slots=True)
+class ModelSettings:
+    model_path: str
+    scaler_path: str
+    cluster_model_path: str
+    retrain_interval_hours: float
+    features: Tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class HealingSettings:
+    """Healing tables, plus arrays in STRATEGY_ORDER and a cluster -> strategy tuple"""
+    strategies: Tuple[str, ...]
+    energy_priority: bool
+    cluster_mapping: Mapping[int, str]
+    energy_impact: Mapping[str, float]
+    execution_times: Mapping[str, float]
+    cluster_strategy: Tuple[str, ...]
+    energy_by_strategy: np.ndarray
+    time_by_strategy: np.ndarray
+
+    def strategy_for(self, cluster: int) -> str:
+        """Configured strategy for a cluster, do_nothing when unmapped"""
+        if 0 <= cluster < len(self.cluster_strategy):
+            return self.cluster_strategy[cluster]
+        return 'do_nothing'
+
+
+@dataclass(frozen=True, slots=True)
+class EnergySettings:
+    cost_per_kwh: float
+    carbon_intensity: float
+    regions: Tuple[str, ...]
+    green_zones: Tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """One parsed config.yaml. `raw` is the parsed YAML for untyped sections; do not mutate it"""
+    path: str
+    mtime_ns: int
+    system: SystemSettings
+    monitoring: MonitoringSettings
+    model: ModelSettings
+    healing: HealingSettings
+    energy: EnergySettings
+    raw: Dict
+
+
+def read_config(path: str = DEFAULT_CONFIG_PATH) -> Dict:
+    """Parsed YAML (shared, read-only), parsed again only when the file changes; {} if missing"""
+    if not os.path.exists(path):
+        return {}
+    return parse_yaml(path, os.stat(path).st_mtime_ns)
+
+
+@lru_cache(maxsize=8)
+def parse_yaml(path: str, mtime_ns: int) -> Dict:
+    with open(path) as f:
+        return yaml.load(f, Loader=YAML_LOADER) or {}
+
+
+def section(config: Dict, key: str) -> Dict:
+    value = config.get(key) or {}
+    if not isinstance(value, dict):
+        raise ConfigError(f"{key}: expected a mapping, got {type(value).__name__}")
+    return value
+
+
+def number(block: Dict, path: str, default: float, minimum: float = None,
+           maximum: float = None) -> float:
+    value = block.get(path.rsplit('.', 1)[-1], default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ConfigError(f"{path}: expected a number, got {value!r}")
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise ConfigError(f"{path}: {value} outside [{minimum}, {maximum}]")
+    return float(value)
+
+
+def names(block: Dict, path: str, default=()) -> Tuple[str, ...]:
+    value = block.get(path.rsplit('.', 1)[-1], default) or ()
+    if not isinstance(value, (list, tuple)) or not all(isinstance(v, str) for v in value):
+        raise ConfigError(f"{path}: expected a list of names, got {value!r}")
+    return tuple(value)
+
+
+def strategy_table(block: Dict, path: str, default: Dict[str, float],
+                   minimum: float = None) -> Mapping[str, float]:
+    table = {**default, **(block.get(path.rsplit('.', 1)[-1]) or {})}
+    for strategy in table:
+        if strategy not in STRATEGY_ORDER:
+            raise ConfigError(f"{path}.{strategy}: unknown strategy")
+    return MappingProxyType({s: number(table, f"{path}.{s}", 0.0, minimum) for s in table})
+
+
+def frozen_array(values: List[float]) -> np.ndarray:
+    array = np.array(values, dtype=float)
+    array.flags.writeable = False
+    return array
+
+
+def resolve_path(value: str) -> str:
+    return value if os.path.isabs(value) else str(root_dir / value)
+
+
+def parse(config: Dict, path: str = DEFAULT_CONFIG_PATH, mtime_ns: int = 0) -> Settings:
+    """Validate a parsed config.yaml; raises ConfigError naming the first bad key"""
+    system = section(config, 'system')
+    monitoring = section(config, 'monitoring')
+    critical = section(section(monitoring, 'alerting'), 'critical_thresholds')
+    sampling = section(monitoring, 'sampling')
+    ai_model = section(config, 'ai_model')
+    healing = section(config, 'healing')
+    cloud = section(config, 'cloud')
+    energy = section(cloud, 'energy_data')
+
+    mapping = {}
+    for cluster, strategy in (healing.get('cluster_mapping') or DEFAULT_CLUSTER_MAPPING).items():
+        if not isinstance(cluster, int) or cluster < 0:
+            raise ConfigError(f"healing.cluster_mapping.{cluster}: cluster must be an integer >= 0")
+        if strategy not in STRATEGY_ORDER:
+            raise ConfigError(f"healing.cluster_mapping.{cluster}: unknown strategy {strategy!r}")
+        mapping[cluster] = strategy
+    min_interval = number(sampling, 'monitoring.sampling.min_interval', 5, minimum=0.1)
+    energy_impact = strategy_table(healing, 'healing.energy_impact', DEFAULT_ENERGY_IMPACT)
+    execution_times = strategy_table(healing, 'healing.execution_times', DEFAULT_EXECUTION_TIMES,
+                                     minimum=0)
+
+    return Settings(
+        path=path,
+        mtime_ns=mtime_ns,
+        system=SystemSettings(
+            monitoring_interval=number(system, 'system.monitoring_interval', 30, minimum=0.1),
+            prediction_threshold=number(system, 'system.prediction_threshold', 0.7, 0, 1),
+            max_recovery_time=number(system, 'system.max_recovery_time', 120, minimum=0),
+            enable_energy_optimization=bool(system.get('enable_energy_optimization', True))
+        ),
+        monitoring=MonitoringSettings(
+            metrics=names(monitoring, 'monitoring.metrics'),
+            retention_days=int(number(monitoring, 'monitoring.retention_days', 30, minimum=1)),
+            critical_thresholds=MappingProxyType({
+                **DEFAULT_CRITICAL_THRESHOLDS,
+                **{k: number(critical, f"monitoring.alerting.critical_thresholds.{k}", 0)
+                   for k in critical}
+            }),
+            sampling=SamplingSettings(
+                min_interval=min_interval,
+                max_interval=number(sampling, 'monitoring.sampling.max_interval', 120,
+                                    minimum=min_interval),
+                samples_per_second=number(sampling, 'monitoring.sampling.samples_per_second', 50,
+                                          minimum=0.001),
+                backoff=number(sampling, 'monitoring.sampling.backoff', 1.5, minimum=1),
+                healing_boost_seconds=number(sampling, 'monitoring.sampling.healing_boost_seconds',
+                                             300, minimum=0)
+            )
+        ),
+        model=ModelSettings(
+            model_path=resolve_path(ai_model.get('model_path', "ai_model/trained_cluster_model.pkl")),
+            scaler_path=resolve_path(ai_model.get('scaler_path', "ai_model/scaler.pkl")),
+            cluster_model_path=resolve_path(ai_model.get('cluster_model_path',
+                                                         "ai_model/cloud_cluster_model.pkl")),
+            retrain_interval_hours=number(ai_model, 'ai_model.retrain_interval_hours', 24, minimum=0),
+            features=names(ai_model, 'ai_model.features')
+        ),
+        healing=HealingSettings(
+            strategies=names(healing, 'healing.strategies', STRATEGY_ORDER[:-1]),
+            energy_priority=bool(healing.get('energy_priority', True)),
+            cluster_mapping=MappingProxyType(mapping),
+            energy_impact=energy_impact,
+            execution_times=execution_times,
+            cluster_strategy=tuple(mapping.get(c, 'do_nothing') for c in range(max(mapping, default=-1) + 1)),
+            energy_by_strategy=frozen_array([energy_impact.get(s, 0.0) for s in STRATEGY_ORDER]),
+            time_by_strategy=frozen_array([execution_times.get(s, 2.0) for s in STRATEGY_ORDER])
+        ),
+        energy=EnergySettings(
+            cost_per_kwh=number(energy, 'cloud.energy_data.cost_per_kwh', 0.12, minimum=0),
+            carbon_intensity=number(energy, 'cloud.energy_data.carbon_intensity_kg_per_kwh',
+                                    DEFAULT_CARBON_INTENSITY, minimum=0),
+            regions=names(cloud, 'cloud.regions'),
+            green_zones=names(cloud, 'cloud.green_zones')
+        ),
+        raw=config
+    )
+
+
+def load(path: str = DEFAULT_CONFIG_PATH) -> Settings:
+    mtime_ns = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+    return parse(read_config(path), path, mtime_ns)
+
+
+class SettingsWatcher:
+    """Current Settings for one file, re-validated when it changes on disk.
+
+    Subscribers get the new Settings after every successful reload. An
+    invalid edit is logged and ignored, so the previous settings stay live.
+    """
+
+    def __init__(self, path: str = DEFAULT_CONFIG_PATH):
+        self.path = path
+        self.current = load(path)
+        self.subscribers: List[Callable[[Settings], None]] = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[Settings], None]) -> Settings:
+        """Register for reloads; returns the current settings to initialise from"""
+        self.subscribers.append(callback)
+        return self.current
+
+    def unsubscribe(self, callback: Callable[[Settings], None]):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def refresh(self) -> bool:
+        """Reload if the file changed (one stat call otherwise); True when subscribers were notified"""
+        mtime_ns = os.stat(self.path).st_mtime_ns if os.path.exists(self.path) else 0
+        if mtime_ns == self.current.mtime_ns:
+            return False
+        with self.lock:
+            if mtime_ns == self.current.mtime_ns:
+                return False
+            try:
+                settings = load(self.path)
+            except (ConfigError, yaml.YAMLError) as e:
+                logger.error(f"❌ Invalid {self.path}, keeping previous settings: {e}")
+                # Remember the bad version so it is not re-parsed on every poll
+                self.current = replace(self.current, mtime_ns=mtime_ns)
+                return False
+            self.current = settings
+        logger.info(f"⚙️ Settings reloaded from {self.path}")
+        for callback in list(self.subscribers):
+            try:
+                callback(settings)
+            except Exception as e:
+                logger.error(f"Settings subscriber {getattr(callback, '__qualname__', callback)} failed: {e}")
+        return True
+
+    async def watch(self, interval_seconds: float = 5.0):
+        """Poll the file until cancelled"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            self.refresh()
+
+
+@lru_cache(maxsize=None)
+def watcher(path: str = DEFAULT_CONFIG_PATH) -> SettingsWatcher:
+    """Shared watcher per config file, so every module sees the same reloads"""
+    return SettingsWatcher(path)
+
+
+def get_settings(path: str = DEFAULT_CONFIG_PATH) -> Settings:
+    return watcher(path).current
@@ -0,0 +1,141 @@
+"""
+Anomaly Detector - Streaming per-service baselines that decide which services need the ML model
+"""
+import logging
+from typing import Dict, List
+
+import numpy as np
+
+from config.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# config.yaml has no critical threshold for the error rate
+ERROR_RATE_LIMIT = 0.2
+
+
+def default_limits(settings: Settings = None) -> Dict[str, float]:
+    """Absolute limits from config critical_thresholds, plus the error rate limit"""
+    settings = settings or get_settings()
+    return {**settings.monitoring.metric_limits(), 'error_rate': ERROR_RATE_LIMIT}
+
+
+class StreamingAnomalyDetector:
+    """EWMA mean, variance and rate of change for every (service, metric).
+
+    All state is held as (service x metric) arrays, so one fleet snapshot is
+    scored and folded in with a handful of vectorized operations. A service
+    is flagged when any metric deviates from its own baseline by more than
+    z_threshold standard deviations, already sits above an absolute limit,
+    or shows a significant upward trend that would cross a limit within
+    leak_horizon samples (slow leaks). Services still warming up are always
+    flagged so that nothing is skipped before a baseline exists.
+    """
+
+    def __init__(self, metric_names: List[str], alpha: float = 0.1,
+                 z_threshold: float = 4.0, leak_horizon: float = 30.0, trend_z: float = 3.0,
+                 warmup: int = 5, limits: Dict[str, float] = None,
+                 relative_floor: float = 0.02, capacity: int = 64):
+        self.metric_names = list(metric_names)
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.leak_horizon = leak_horizon
+        # Noise level of an EWMA of first differences relative to the metric's std
+        self.trend_threshold = trend_z * np.sqrt(2 * alpha / (2 - alpha))
+        self.warmup = warmup
+        self.relative_floor = relative_floor
+        self.set_limits(default_limits() if limits is None else limits)
+
+        self.service_index: Dict[str, int] = {}
+        self.allocate(capacity)
+        self.flagged_total = 0
+        self.observed_total = 0
+
+    def set_limits(self, limits: Dict[str, float]):
+        """Absolute limit per metric; metrics without one are never over their limit"""
+        self.limits = np.array([limits.get(m, np.inf) for m in self.metric_names])
+
+    def allocate(self, capacity: int):
+        """(Re)size the state arrays, keeping existing rows"""
+        metrics = len(self.metric_names)
+        old = getattr(self, 'mean', None)
+        rows = 0 if old is None else len(old)
+        grown = {
+            'mean': np.zeros((capacity, metrics)),
+            'var': np.zeros((capacity, metrics)),
+            'rate': np.zeros((capacity, metrics)),
+            'last': np.zeros((capacity, metrics)),
+            'count': np.zeros(capacity, dtype=np.int64)
+        }
+        for name, array in grown.items():
+            if rows:
+                array[:rows] = getattr(self, name)
+            setattr(self, name, array)
+
+    def rows(self, service_ids: List[str]) -> np.ndarray:
+        """Row index per service, registering unseen services"""
+        index = self.service_index
+        for service_id in service_ids:
+            if service_id not in index:
+                index[service_id] = len(index)
+        if len(index) > len(self.mean):
+            self.allocate(max(len(index), 2 * len(self.mean)))
+        return np.fromiter((index[s] for s in service_ids), dtype=np.int64, count=len(service_ids))
+
+    def update(self, service_ids: List[str], values: np.ndarray) -> np.ndarray:
+        """Score a snapshot against the baselines, then fold it in; returns the flag mask"""
+        rows = self.rows(service_ids)
+        mean, var, rate = self.mean[rows], self.var[rows], self.rate[rows]
+        count = self.count[rows]
+        seen = count > 0
+
+        # Score against the baseline before the new sample moves it
+        floor = self.relative_floor * np.abs(mean) + 1e-6
+        std = np.maximum(np.sqrt(var), floor)
+        deviation = np.abs(values - mean) / std > self.z_threshold
+        over_limit = values > self.limits
+        leaking = ((rate > self.trend_threshold * std)
+                   & (values + rate * self.leak_horizon > self.limits))
+        flagged = ((count < self.warmup)
+                   | (deviation & seen[:, None]).any(axis=1)
+                   | over_limit.any(axis=1)
+                   | leaking.any(axis=1))
+
+        # EWMA updates; first sample initialises the baseline
+        a = self.alpha
+        delta = values - mean
+        new_mean = np.where(seen[:, None], mean + a * delta, values)
+        new_var = np.where(seen[:, None], (1 - a) * (var + a * delta * delta), 0.0)
+        step = values - self.last[rows]
+        new_rate = np.where((count > 1)[:, None], rate + a * (step - rate),
+                            np.where(seen[:, None], step, 0.0))
+
+        self.mean[rows] = new_mean
+        self.var[rows] = new_var
+        self.rate[rows] = new_rate
+        self.last[rows] = values
+        self.count[rows] = count + 1
+
+        self.observed_total += len(rows)
+        self.flagged_total += int(flagged.sum())
+        return flagged
+
+    def baseline(self, service_id: str) -> Dict:
+        """Current baseline for one service"""
+        row = self.service_index.get(service_id)
+        if row is None:
+            return {}
+        return {name: {
+            'mean': float(self.mean[row, i]),
+            'std': float(np.sqrt(self.var[row, i])),
+            'rate': float(self.rate[row, i])
+        } for i, name in enumerate(self.metric_names)}
+
+    def get_stats(self) -> Dict:
+        """How many samples were escalated to the model"""
+        return {
+            'services': len(self.service_index),
+            'observed': self.observed_total,
+            'flagged': self.flagged_total,
+            'flag_rate': self.flagged_total / self.observed_total if self.observed_total else 0.0
+        }
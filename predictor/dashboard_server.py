@@ -1,7 +1,7 @@
 """
 Dashboard Server - Provides web interface for monitoring
 """
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, Request, WebSocket
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
@@ -11,16 +11,21 @@ from typing import Dict, List
 import logging
 from datetime import datetime
 
+from backend.serialization import FastJSONResponse, PayloadCache, encode_message
+
 logger = logging.getLogger(__name__)
 
 class DashboardServer:
     def __init__(self, host="0.0.0.0", port=8080):
         self.host = host
         self.port = port
-        self.app = FastAPI(title="Energy-Aware Recovery Dashboard")
+        self.app = FastAPI(title="Energy-Aware Recovery Dashboard",
+                           default_response_class=FastJSONResponse)
         self.connected_clients = []
         self.stats = {}
+        self.payload_cache = PayloadCache()
         
+        self.dashboard_html = self.get_dashboard_html()
         self.setup_routes()
     
     def setup_routes(self):
@@ -28,11 +33,11 @@ class DashboardServer:
         
         @self.app.get("/")
         async def dashboard():
-            return HTMLResponse(self.get_dashboard_html())
+            return HTMLResponse(self.dashboard_html)
         
         @self.app.get("/api/stats")
-        async def get_stats():
-            return self.stats
+        async def get_stats(request: Request):
+            return self.payload_cache.response(request, "stats", lambda: self.stats)
         
         @self.app.get("/api/health")
         async def health():
@@ -47,7 +52,7 @@ class DashboardServer:
                 while True:
                     # Keep connection alive
                     await asyncio.sleep(10)
-                    await websocket.send_json({"type": "ping", "timestamp": datetime.now().isoformat()})
+                    await websocket.send_text(encode_message("ping", timestamp=datetime.now().isoformat()))
             except:
                 pass
             finally:
@@ -222,17 +227,14 @@ class DashboardServer:
     async def update_stats(self, stats: Dict):
         """Update dashboard statistics"""
         self.stats = stats
+        self.payload_cache.invalidate("stats")
         
-        # Broadcast to connected WebSocket clients
-        message = {
-            'type': 'stats_update',
-            'timestamp': datetime.now().isoformat(),
-            'data': stats
-        }
+        # Broadcast to connected WebSocket clients (encoded once for all of them)
+        message = encode_message('stats_update', timestamp=datetime.now().isoformat(), data=stats)
         
         for client in self.connected_clients:
             try:
-                await client.send_json(message)
+                await client.send_text(message)
             except:
                 pass
     
@@ -1,56 +1,76 @@
 """
 Failure Prediction Service - Uses AI models to predict failures
 """
-import joblib
 import numpy as np
-import pandas as pd
 from typing import Dict, List
 import logging
+import time
 from datetime import datetime
-import os
+from itertools import repeat
+
+from agent.records import Prediction
+from config.settings import watcher
+from predictor import feature_schema
+from predictor.anomaly_detector import StreamingAnomalyDetector, default_limits
+from predictor.metric_forecaster import MetricForecaster
+from predictor.model_artifacts import ModelArtifacts, artifact_property
+from predictor.prediction_history import PredictionHistory
+from predictor.rule_engine import RuleEngine
 
 logger = logging.getLogger(__name__)
 
 class FailurePredictor:
-    def __init__(self):
-        self.model = None
-        self.scaler = None
-        self.cluster_model = None
-        self.prediction_history = []
+    def __init__(self, interval_seconds: float = 30.0, horizon_seconds: float = 600.0,
+                 artifacts: ModelArtifacts = None):
+        # Model files load on first use (paths from config.yaml ai_model / MODEL_PATH etc.)
+        self.artifacts = artifacts or ModelArtifacts()
+        # Typed config.yaml (system.prediction_threshold), reloaded when the file changes
+        self.config = watcher()
+        self.prediction_history = PredictionHistory(max_entries=1000)
         
-        # Feature columns expected by the model
-        self.feature_columns = [
-            'cpu_usage_percent',
-            'memory_usage_percent',
-            'disk_io_percent',
-            'network_latency_ms',
-            'energy_consumption_watts',
-            'request_rate',
-            'error_rate',
-            'response_time_ms'
-        ]
+        # Feature columns expected by the model (MetricsAgent layout of the schema registry)
+        self.schema = feature_schema.layout('agent')
+        self.feature_columns = list(self.schema.keys)
+        # One tuple shared by every prediction's features_used
+        self.features_used = tuple(self.feature_columns)
+
+        # Declarative fallback rules from config.yaml, recompiled when the settings reload
+        self.rules = RuleEngine(self.feature_columns)
+
+        # Screens each snapshot so only deviating services reach the model
+        self.detector = StreamingAnomalyDetector(self.feature_columns)
+        # Forecasts CPU, memory and energy so healing can start before a breach
+        self.forecaster = MetricForecaster(interval_seconds=interval_seconds,
+                                           horizon_seconds=horizon_seconds)
+        self.forecast_columns = [self.feature_columns.index(m) for m in self.forecaster.metric_names]
+        # Detector and forecaster limits follow monitoring.alerting.critical_thresholds on reload
+        self.config.subscribe(self.apply_settings)
     
-    async def initialize(self):
-        """Initialize the predictor and load models"""
+    model = artifact_property('model')
+    scaler = artifact_property('scaler')
+    cluster_model = artifact_property('cluster_model')
+
+    def apply_settings(self, settings):
+        """Rebuild the absolute limits after config.yaml changed"""
+        self.detector.set_limits(default_limits(settings))
+        self.forecaster.set_limits(settings.monitoring.metric_limits())
+    
+    async def initialize(self, warmup: bool = False):
+        """Initialize the predictor; models load on first prediction unless warmup is set"""
         logger.info("🤖 Initializing Failure Predictor...")
         
         try:
-            # Load pre-trained models
-            model_path = "ai_model/trained_cluster_model.pkl"
-            scaler_path = "ai_model/scaler.pkl"
-            cluster_path = "ai_model/cloud_cluster_model.pkl"
-            
-            if os.path.exists(model_path):
-                self.model = joblib.load(model_path)
-                logger.info("✅ Loaded failure prediction model")
+            if warmup:
+                available = self.artifacts.warmup()
             else:
-                logger.warning("❌ Model file not found, using rule-based prediction")
+                available = {name: self.artifacts.exists(name) for name in self.artifacts.paths}
             
-            if os.path.exists(scaler_path):
-                self.scaler = joblib.load(scaler_path)
+            if not available.get('model'):
+                logger.warning("❌ Model file not found, using rule-based prediction")
             
-            if os.path.exists(cluster_path):
-                self.cluster_model = joblib.load(cluster_path)
+            if available.get('cluster_model'):
+                # Report fields the agent cannot supply once, not on every prediction
+                feature_schema.converter('agent', 'dataset')
             
             logger.info("✅ Failure Predictor initialized successfully")
             return True
@@ -62,31 +82,45 @@ class FailurePredictor:
     async def predict(self, metrics: Dict[str, Dict]) -> Dict[str, Dict]:
         """Predict failures for all services"""
         predictions = {}
+        service_ids = list(metrics)
+        snapshot = self.schema.matrix(metrics.values())
+        flagged = self.detector.update(service_ids, snapshot)
+        forecast = self.forecaster.update(service_ids, snapshot[:, self.forecast_columns])
+        
+        # Without a model the whole snapshot is labelled by the rules in one pass, and a
+        # matching rule applies even to services the detector did not escalate
+        self.config.refresh()
+        labels = zip(*self.rules.predict(snapshot)) if self.model is None else repeat(None)
         
-        for service_id, service_metrics in metrics.items():
+        for service_id, service_metrics, escalate, label in zip(service_ids, metrics.values(),
+                                                                flagged, labels):
             try:
-                prediction = await self.predict_service(service_id, service_metrics)
+                if label is not None and (escalate or label[0]):
+                    prediction = self.rule_prediction(service_metrics, *label)
+                elif escalate:
+                    prediction = await self.predict_service(service_id, service_metrics)
+                else:
+                    prediction = self.steady_prediction(service_id)
                 predictions[service_id] = prediction
                 
-                # Store in history
-                self.prediction_history.append({
-                    'timestamp': datetime.now(),
-                    'service_id': service_id,
-                    'prediction': prediction
-                })
-                
             except Exception as e:
                 logger.error(f"Prediction failed for {service_id}: {e}")
                 predictions[service_id] = self.get_default_prediction()
         
-        # Keep only last 1000 predictions
-        if len(self.prediction_history) > 1000:
-            self.prediction_history = self.prediction_history[-1000:]
+        self.forecaster.annotate(predictions, service_ids, forecast, self.calculate_confidence)
         
-        logger.info(f"🔮 Made predictions for {len(predictions)} services")
+        # Store in history once final (bounded, aggregates kept incrementally)
+        self.prediction_history.reserve(len(predictions))
+        now = datetime.now()
+        for service_id, prediction in predictions.items():
+            if 'error' not in prediction:
+                self.prediction_history.append(service_id, prediction, now)
+        
+        logger.info(f"🔮 Made predictions for {len(predictions)} services "
+                    f"({int(flagged.sum())} escalated by the anomaly detector)")
         return predictions
     
-    async def predict_service(self, service_id: str, metrics: Dict) -> Dict:
+    async def predict_service(self, service_id: str, metrics: Dict) -> Prediction:
         """Predict failure for a single service"""
         if self.model is None:
             # Fallback to rule-based prediction
@@ -108,18 +142,18 @@ class FailurePredictor:
             # Determine cluster
             cluster = self.determine_cluster(features, probability)
             
-            prediction = {
-                'service_id': service_id,
-                'will_fail': probability > 0.7,  # Threshold
-                'probability': float(probability),
-                'cluster': cluster,
-                'confidence': self.calculate_confidence(probability),
-                'features_used': self.feature_columns,
-                'timestamp': datetime.now().isoformat(),
-                'model_used': 'ml'
-            }
+            prediction = Prediction(
+                service_id=service_id,
+                will_fail=bool(probability > self.config.current.system.prediction_threshold),
+                probability=float(probability),
+                cluster=cluster,
+                confidence=self.calculate_confidence(probability),
+                timestamp=time.time(),
+                model_used='ml',
+                features_used=self.features_used
+            )
             
-            if prediction['will_fail']:
+            if prediction.will_fail:
                 logger.warning(f"🔴 Failure predicted for {service_id}: "
                              f"{probability:.1%} (Cluster: {cluster})")
             
@@ -132,25 +166,8 @@ class FailurePredictor:
     def extract_features(self, metrics: Dict) -> np.ndarray:
         """Extract features from metrics"""
         try:
-            features = []
-            for col in self.feature_columns:
-                if col in metrics:
-                    features.append(float(metrics[col]))
-                else:
-                    # Use default value if missing
-                    default_values = {
-                        'cpu_usage_percent': 0.0,
-                        'memory_usage_percent': 0.0,
-                        'disk_io_percent': 0.0,
-                        'network_latency_ms': 0.0,
-                        'energy_consumption_watts': 0.0,
-                        'request_rate': 0.0,
-                        'error_rate': 0.0,
-                        'response_time_ms': 0.0
-                    }
-                    features.append(default_values.get(col, 0.0))
-            
-            return np.array(features)
+            # Missing metrics take the schema defaults
+            return self.schema.vector(metrics)
         except Exception as e:
             logger.error(f"Feature extraction failed: {e}")
             return None
@@ -164,66 +181,48 @@ class FailurePredictor:
                 pass
         
         # Rule-based clustering
-        cpu_usage = features[0] if len(features) > 0 else 0
-        memory_usage = features[1] if len(features) > 1 else 0
-        energy_consumption = features[4] if len(features) > 4 else 0
-        error_rate = features[6] if len(features) > 6 else 0
-        response_time = features[7] if len(features) > 7 else 0
-        
-        if cpu_usage > 90 or memory_usage > 90:
-            return 1  # Resource exhaustion
-        elif energy_consumption > 200:
-            return 2  # Energy spike
-        elif response_time > 1000:
-            return 3  # Network issues
-        elif error_rate > 0.1:
-            return 4  # High error rate
-        elif probability > 0.5:
-            return 5  # General degradation
-        
-        return 0  # No specific cluster
+        return int(self.rules.cluster(np.asarray(features, dtype=float)[None, :], probability)[0])
     
-    def rule_based_prediction(self, metrics: Dict) -> Dict:
+    def rule_based_prediction(self, metrics: Dict) -> Prediction:
         """Rule-based prediction as fallback"""
-        # Simple rules based on thresholds
-        will_fail = False
-        probability = 0.0
-        
-        if metrics.get('cpu_usage_percent', 0) > 90:
-            will_fail = True
-            probability = 0.85
-        elif metrics.get('memory_usage_percent', 0) > 90:
-            will_fail = True
-            probability = 0.80
-        elif metrics.get('error_rate', 0) > 0.2:
-            will_fail = True
-            probability = 0.75
-        elif metrics.get('energy_consumption_watts', 0) > 250:
-            will_fail = True
-            probability = 0.70
-        
-        # Determine cluster
-        cluster = self.determine_cluster(
-            self.extract_features(metrics) or np.zeros(len(self.feature_columns)),
-            probability
+        features = self.extract_features(metrics)
+        if features is None:
+            features = np.zeros(len(self.feature_columns))
+        will_fail, probability, cluster = self.rules.predict(features[None, :])
+        return self.rule_prediction(metrics, will_fail[0], probability[0], cluster[0])
+    
+    def rule_prediction(self, metrics: Dict, will_fail: bool, probability: float,
+                        cluster: int) -> Prediction:
+        """Prediction record for a rule engine label"""
+        probability = float(probability)
+        return Prediction(
+            service_id=metrics.get('service_id', 'unknown'),
+            will_fail=bool(will_fail),
+            probability=probability,
+            cluster=int(cluster),
+            confidence=self.calculate_confidence(probability),
+            timestamp=time.time(),
+            model_used='rule_based',
+            features_used=self.features_used
         )
-        
-        return {
-            'service_id': metrics.get('service_id', 'unknown'),
-            'will_fail': will_fail,
-            'probability': probability,
-            'cluster': cluster,
-            'confidence': self.calculate_confidence(probability),
-            'features_used': list(metrics.keys()),
-            'timestamp': datetime.now().isoformat(),
-            'model_used': 'rule_based'
-        }
     
     def calculate_confidence(self, probability: float) -> float:
         """Calculate prediction confidence"""
         # Confidence is higher when probability is close to 0 or 1
         return 1 - abs(probability - 0.5) * 2
     
+    def steady_prediction(self, service_id: str) -> Prediction:
+        """Prediction for a service that is tracking its own baseline"""
+        return Prediction(
+            service_id=service_id,
+            will_fail=False,
+            probability=0.0,
+            cluster=0,
+            confidence=self.calculate_confidence(0.0),
+            timestamp=time.time(),
+            model_used='baseline'
+        )
+    
     def get_default_prediction(self) -> Dict:
         """Get default prediction"""
         return {
@@ -235,29 +234,14 @@ class FailurePredictor:
             'error': 'Prediction failed'
         }
     
-    def get_prediction_history(self, service_id: str = None):
-        """Get prediction history"""
-        if service_id:
-            return [p for p in self.prediction_history if p['service_id'] == service_id]
-        return self.prediction_history
+    def get_prediction_history(self, service_id: str = None) -> List[Dict]:
+        """Get prediction history, with each prediction as a dict"""
+        return [dict(entry, prediction=entry['prediction'].to_dict())
+                for entry in self.prediction_history.get(service_id)]
     
     def get_prediction_stats(self) -> Dict:
         """Get prediction statistics"""
-        if not self.prediction_history:
-            return {}
-        
-        total = len(self.prediction_history)
-        failure_predictions = sum(1 for p in self.prediction_history 
-                                 if p['prediction']['will_fail'])
-        
-        return {
-            'total_predictions': total,
-            'failure_predictions': failure_predictions,
-            'failure_rate_percentage': (failure_predictions / total * 100) if total > 0 else 0,
-            'average_confidence': sum(p['prediction']['confidence'] 
-                                     for p in self.prediction_history) / total if total > 0 else 0,
-            'ml_predictions': sum(1 for p in self.prediction_history 
-                                 if p['prediction']['model_used'] == 'ml'),
-            'rule_based_predictions': sum(1 for p in self.prediction_history 
-                                         if p['prediction']['model_used'] == 'rule_based')
-        }
\ No newline at end of file
+        stats = self.prediction_history.get_stats()
+        if stats:
+            stats['detector'] = self.detector.get_stats()
+        return stats
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""
+Feature Schema - One registry of metric names across agent, backend, store, dataset and model layouts
+"""
+import logging
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Canonical features: name -> (unit, default used when a layout cannot supply it)
+FEATURES = {
+    'cpu': ('%', 0.0),
+    'memory_percent': ('%', 0.0),
+    'memory_mb': ('MB', 0.0),
+    'network_mbps': ('MBps', 0.0),
+    'disk_io': ('MBps', 0.0),
+    'disk_io_percent': ('%', 0.0),
+    'disk_usage_percent': ('%', 0.0),
+    'energy_watts': ('W', 0.0),
+    'latency_ms': ('ms', 0.0),
+    'network_latency_ms': ('ms', 0.0),
+    'response_time_ms': ('ms', 0.0),
+    'request_rate': ('req/s', 0.0),
+    'error_rate': ('ratio', 0.0),
+    'predicted_workload': ('%', 0.0),
+    'workload_type': ('code', 0.0),
+    'task_priority': ('code', 0.0),
+    'temp': ('C', 0.0),
+    'voltage': ('V', 0.0)
+}
+
+# Layout -> ordered (key in that layout, canonical feature). Order is the column
+# order of the layout's matrices, so model layouts list their inputs in fit order.
+LAYOUTS: Dict[str, List[Tuple[str, str]]] = {
+    # MetricsAgent.collect_metrics and FailurePredictor.feature_columns
+    'agent': [
+        ('cpu_usage_percent', 'cpu'),
+        ('memory_usage_percent', 'memory_percent'),
+        ('disk_io_percent', 'disk_io_percent'),
+        ('network_latency_ms', 'network_latency_ms'),
+        ('energy_consumption_watts', 'energy_watts'),
+        ('request_rate', 'request_rate'),
+        ('error_rate', 'error_rate'),
+        ('response_time_ms', 'response_time_ms')
+    ],
+    # agent/sender.py payload for the Spring /api/metrics endpoint
+    'sender': [
+        ('cpu', 'cpu'),
+        ('memory', 'memory_mb'),
+        ('network', 'network_mbps'),
+        ('diskIO', 'disk_io'),
+        ('energy', 'energy_watts'),
+        ('latencyMs', 'latency_ms')
+    ],
+    # metrics table / healing_metrics columns in smart_energy.db (the last two are
+    # healing_metrics only: the agent's units, kept apart from Spring's MBps and service latency)
+    'store': [
+        ('cpu', 'cpu'),
+        ('memory', 'memory_mb'),
+        ('network', 'network_mbps'),
+        ('diskio', 'disk_io'),
+        ('energy', 'energy_watts'),
+        ('latency_ms', 'latency_ms'),
+        ('predicted_workload', 'predicted_workload'),
+        ('task_priority', 'task_priority'),
+        ('workload_type', 'workload_type'),
+        ('diskio_percent', 'disk_io_percent'),
+        ('network_latency_ms', 'network_latency_ms')
+    ],
+    # cloud_resource_allocation_dataset.csv, cloud_cluster_model.pkl, healing_log.metrics_json
+    'dataset': [
+        ('CPU_Usage (%)', 'cpu'),
+        ('Memory_Usage (MB)', 'memory_mb'),
+        ('Network_Usage (MBps)', 'network_mbps'),
+        ('Disk_IO (MBps)', 'disk_io'),
+        ('Energy_Consumption (Watts)', 'energy_watts'),
+        ('Service_Latency (ms)', 'latency_ms'),
+        ('Predicted_Workload (%)', 'predicted_workload'),
+        ('Workload_Type', 'workload_type'),
+        ('Task_Priority', 'task_priority')
+    ],
+    # trained_cluster_model.pkl inputs served by ai_model/predict_api.py
+    'predict_api': [
+        ('CPU_Usage (%)', 'cpu'),
+        ('Memory_Usage (MB)', 'memory_mb'),
+        ('Network_Usage (MBps)', 'network_mbps'),
+        ('Disk_Usage (%)', 'disk_usage_percent'),
+        ('IO_Load', 'disk_io'),
+        ('Latency', 'latency_ms'),
+        ('Requests', 'request_rate'),
+        ('Temp', 'temp'),
+        ('Voltage', 'voltage'),
+        ('Power', 'energy_watts')
+    ]
+}
+
+
+class Layout:
+    """Field order of one layout, with a compiled getter from dict records to a matrix"""
+
+    def __init__(self, name: str, fields: Sequence[Tuple[str, str]]):
+        self.name = name
+        self.keys = [key for key, _ in fields]
+        self.features = [feature for _, feature in fields]
+        self.defaults = np.array([FEATURES[f][1] for f in self.features], dtype=float)
+        self.index = {feature: i for i, feature in enumerate(self.features)}
+        # itemgetter pulls every key in one C call; always return a tuple
+        getter = itemgetter(*self.keys)
+        self.getter = getter if len(self.keys) > 1 else (lambda record: (getter(record),))
+
+    def matrix(self, records: Iterable[Dict]) -> np.ndarray:
+        """(record x field) float array; records missing a key fall back to defaults"""
+        rows = []
+        for record in records:
+            try:
+                rows.append(self.getter(record))
+            except KeyError:
+                rows.append(tuple(record.get(key, default)
+                                  for key, default in zip(self.keys, self.defaults)))
+        return np.array(rows, dtype=float).reshape(len(rows), len(self.keys))
+
+    def vector(self, record: Dict) -> np.ndarray:
+        return self.matrix((record,))[0]
+
+    def records(self, matrix: np.ndarray) -> List[Dict]:
+        """Rows of a matrix back to dicts keyed by this layout"""
+        return [dict(zip(self.keys, row)) for row in matrix.tolist()]
+
+
+class Converter:
+    """Compiled column mapping between two layouts.
+
+    The source column for every destination field is resolved once, so
+    converting a batch is a single NumPy column take (a view when the
+    destination is a leading slice of the source). Fields the source
+    cannot provide are filled with their defaults.
+    """
+
+    def __init__(self, source: Layout, target: Layout):
+        self.source = source
+        self.target = target
+        self.take = np.array([source.index.get(f, -1) for f in target.features], dtype=np.intp)
+        self.missing = [key for key, i in zip(target.keys, self.take) if i < 0]
+        self.present = self.take >= 0
+        self.prefix = bool(self.present.all()) and np.array_equal(self.take, np.arange(len(self.take)))
+
+    def __call__(self, matrix: np.ndarray) -> np.ndarray:
+        if self.prefix:
+            return matrix[:, :len(self.take)]
+        out = np.empty((matrix.shape[0], len(self.take)), dtype=float)
+        out[:, self.present] = matrix[:, self.take[self.present]]
+        out[:, ~self.present] = self.target.defaults[~self.present]
+        return out
+
+    def records(self, records: Iterable[Dict]) -> np.ndarray:
+        """Source-layout dicts straight to a target-layout matrix"""
+        return self(self.source.matrix(records))
+
+
+@lru_cache(maxsize=None)
+def layout(name: str) -> Layout:
+    return Layout(name, LAYOUTS[name])
+
+
+@lru_cache(maxsize=None)
+def converter(source: str, target: str) -> Converter:
+    """Cached converter; mismatched fields are logged once, when it is first built"""
+    compiled = Converter(layout(source), layout(target))
+    if compiled.missing:
+        logger.warning(f"⚠️ Feature schema: {source} → {target} has no source for "
+                       f"{', '.join(compiled.missing)}; defaults are used")
+    return compiled
+
+
+def keys(name: str) -> List[str]:
+    """Keys of a layout, in column order"""
+    return list(layout(name).keys)
+
+
+def aliases(target: str, sources: Sequence[str]) -> Dict[str, List[str]]:
+    """For each key of `target`, the keys other layouts use for the same feature"""
+    return {
+        key: [layout(s).keys[layout(s).index[feature]] for s in sources
+              if feature in layout(s).index]
+        for key, feature in LAYOUTS[target]
+    }
+
+
+def check(pairs: Iterable[Tuple[str, str]]) -> Dict[str, List[str]]:
+    """Build converters up front (e.g. at startup) and return the missing fields per pair"""
+    return {f"{source}->{target}": converter(source, target).missing for source, target in pairs}
+
+
+def to_layout(records: List[Dict], target: str,
+              sources: Sequence[str] = ()) -> Tuple[Optional[np.ndarray], List[str]]:
+    """Target-layout matrix from records in the target or one of the source layouts.
+
+    A source layout is only accepted if it supplies every target field, so no
+    model input is silently filled with a default. The layout is recognised
+    from the first record and every record is checked against it; returns
+    (None, keys missing from the first incomplete record) otherwise.
+    """
+    required = layout(target).keys
+    if not records or not isinstance(records[0], dict):
+        return None, list(required)
+    first = records[0]
+    for name in (target, *sources):
+        if name != target and converter(name, target).missing:
+            continue
+        keys = layout(name).keys
+        if all(key in first for key in keys):
+            for record in records:
+                if not isinstance(record, dict):
+                    return None, list(keys)
+                missing = [key for key in keys if key not in record]
+                if missing:
+                    return None, missing
+            if name == target:
+                return layout(target).matrix(records), []
+            return converter(name, target).records(records), []
+    return None, [key for key in required if key not in first]
@@ -0,0 +1,166 @@
+"""
+Metric Forecaster - Fleet-wide short-horizon forecasts and time to threshold breach
+"""
+import logging
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+FORECAST_METRICS = ['cpu_usage_percent', 'memory_usage_percent', 'energy_consumption_watts']
+
+# Failure cluster a forecast breach points at
+BREACH_CLUSTERS = {
+    'cpu_usage_percent': 1,         # Resource exhaustion
+    'memory_usage_percent': 1,      # Resource exhaustion
+    'energy_consumption_watts': 2   # Energy spike
+}
+
+# Smoothing for the one-step residual variance (the trend noise reference)
+RESIDUAL_ALPHA = 0.1
+
+
+class MetricForecaster:
+    """Damped Holt (level + trend) smoothing over every (service, metric).
+
+    Level and trend are (service x metric) arrays, so one collection cycle is
+    a single batched update and the forecast for the whole fleet is a couple
+    of vectorized expressions. Time to breach solves the damped trend
+    projection for the step at which each metric crosses its limit, and only
+    counts trends that stand out from the one-step forecast noise, so noisy
+    but flat services are not escalated.
+    """
+
+    def __init__(self, metric_names: List[str] = None, interval_seconds: float = 30.0,
+                 horizon_seconds: float = 600.0, alpha: float = 0.5, beta: float = 0.2,
+                 damping: float = 0.98, trend_z: float = 3.0, warmup: int = 5,
+                 limits: Dict[str, float] = None, capacity: int = 64):
+        self.metric_names = list(metric_names or FORECAST_METRICS)
+        self.interval_seconds = interval_seconds
+        self.horizon_seconds = horizon_seconds
+        self.alpha = alpha
+        self.beta = beta
+        self.damping = damping
+        self.trend_threshold = trend_z * noise_trend_ratio(alpha, beta, damping)
+        self.warmup = warmup
+        # Defaults to config critical_thresholds (cpu, memory, energy)
+        self.set_limits(get_settings().monitoring.metric_limits() if limits is None else limits)
+        self.clusters = np.array([BREACH_CLUSTERS.get(m, 5) for m in self.metric_names])
+
+        self.service_index: Dict[str, int] = {}
+        self.level = np.zeros((capacity, len(self.metric_names)))
+        self.trend = np.zeros((capacity, len(self.metric_names)))
+        self.residual_var = np.zeros((capacity, len(self.metric_names)))
+        self.count = np.zeros(capacity, dtype=np.int64)
+
+    def set_limits(self, limits: Dict[str, float]):
+        """Breach limit per metric; metrics without one never breach"""
+        self.limits = np.array([limits.get(m, np.inf) for m in self.metric_names])
+
+    def rows(self, service_ids: List[str]) -> np.ndarray:
+        """Row index per service, registering unseen services"""
+        index = self.service_index
+        for service_id in service_ids:
+            if service_id not in index:
+                index[service_id] = len(index)
+        if len(index) > len(self.level):
+            capacity = max(len(index), 2 * len(self.level))
+            pad = capacity - len(self.level)
+            self.level = np.vstack([self.level, np.zeros((pad, self.level.shape[1]))])
+            self.trend = np.vstack([self.trend, np.zeros((pad, self.trend.shape[1]))])
+            self.residual_var = np.vstack([self.residual_var, np.zeros((pad, self.trend.shape[1]))])
+            self.count = np.concatenate([self.count, np.zeros(pad, dtype=np.int64)])
+        return np.fromiter((index[s] for s in service_ids), dtype=np.int64, count=len(service_ids))
+
+    def update(self, service_ids: List[str], values: np.ndarray) -> Dict[str, np.ndarray]:
+        """Fold in one cycle and forecast the horizon for the same services"""
+        rows = self.rows(service_ids)
+        level, trend, count = self.level[rows], self.trend[rows], self.count[rows]
+        seen = (count > 0)[:, None]
+        a, b, phi = self.alpha, self.beta, self.damping
+
+        projected = level + phi * trend
+        residual = np.where(seen, values - projected, 0.0)
+        residual_var = self.residual_var[rows] + RESIDUAL_ALPHA * (residual * residual - self.residual_var[rows])
+        new_level = np.where(seen, a * values + (1 - a) * projected, values)
+        new_trend = np.where(seen, b * (new_level - level) + (1 - b) * phi * trend, 0.0)
+        self.level[rows] = new_level
+        self.trend[rows] = new_trend
+        self.residual_var[rows] = residual_var
+        self.count[rows] = count + 1
+
+        # Bias-corrected residual std (the EWMA starts from zero); `count` residuals so far
+        noise = np.sqrt(residual_var / (1 - (1 - RESIDUAL_ALPHA) ** np.maximum(count, 1))[:, None])
+        significant = (new_trend > self.trend_threshold * noise) & (count >= self.warmup)[:, None]
+        return {
+            'forecast': self.project(new_level, new_trend, self.horizon_seconds / self.interval_seconds),
+            'time_to_breach': self.time_to_breach(new_level, np.where(significant, new_trend, 0.0))
+        }
+
+    def project(self, level: np.ndarray, trend: np.ndarray, steps: float) -> np.ndarray:
+        """Damped trend forecast `steps` cycles ahead"""
+        phi = self.damping
+        gain = steps if phi == 1.0 else phi * (1 - phi ** steps) / (1 - phi)
+        return level + gain * trend
+
+    def time_to_breach(self, level: np.ndarray, trend: np.ndarray) -> np.ndarray:
+        """Seconds until each metric crosses its limit (0 if already over, inf if never)"""
+        phi = self.damping
+        gap = self.limits - level
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if phi == 1.0:
+                steps = np.where(trend > 0, gap / trend, np.inf)
+            else:
+                # Solve level + trend * phi * (1 - phi^k) / (1 - phi) = limit for k
+                remaining = 1 - gap * (1 - phi) / (trend * phi)
+                steps = np.where((trend > 0) & (remaining > 0),
+                                 np.log(remaining) / np.log(phi), np.inf)
+        steps = np.where(gap <= 0, 0.0, steps)
+        return steps * self.interval_seconds
+
+    def annotate(self, predictions: Dict[str, Dict], service_ids: List[str],
+                 result: Dict[str, np.ndarray], confidence: Callable[[float], float] = None):
+        """Attach forecasts and time to breach; escalate breaches inside the horizon.
+
+        `confidence` maps a probability to the predictor's confidence, so an
+        escalated prediction does not keep the confidence of its old probability.
+        """
+        forecast, breach = result['forecast'], result['time_to_breach']
+        first = breach.argmin(axis=1)
+        soonest = breach[np.arange(len(service_ids)), first]
+        for i, service_id in enumerate(service_ids):
+            prediction = predictions[service_id]
+            prediction['forecast'] = dict(zip(self.metric_names, forecast[i].tolist()))
+            seconds = float(soonest[i])
+            prediction['time_to_breach_seconds'] = seconds if np.isfinite(seconds) else None
+            if seconds <= self.horizon_seconds and not prediction.get('will_fail'):
+                prediction['will_fail'] = True
+                prediction['probability'] = max(prediction.get('probability', 0.0), 0.75)
+                if confidence is not None:
+                    prediction['confidence'] = confidence(prediction['probability'])
+                prediction['breach_metric'] = self.metric_names[first[i]]
+                if not prediction.get('cluster'):
+                    prediction['cluster'] = int(self.clusters[first[i]])
+
+
+def noise_trend_ratio(alpha: float, beta: float, damping: float, steps: int = 200) -> float:
+    """Std of the trend estimate relative to the one-step residual std under white noise.
+
+    Both are linear filters of the input, so the ratio follows from their
+    impulse responses.
+    """
+    level = trend = 0.0
+    trend_energy = residual_energy = 0.0
+    for k in range(steps):
+        x = 1.0 if k == 0 else 0.0
+        projected = level + damping * trend
+        residual = x - projected
+        new_level = alpha * x + (1 - alpha) * projected
+        trend = beta * (new_level - level) + (1 - beta) * damping * trend
+        level = new_level
+        trend_energy += trend * trend
+        residual_energy += residual * residual
+    return float(np.sqrt(trend_energy / residual_energy))
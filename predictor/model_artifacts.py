@@ -0,0 +1,96 @@
+"""
+Model Artifacts - Lazily loaded model files with configurable paths
+"""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from config.settings import DEFAULT_CONFIG_PATH, get_settings
+
+logger = logging.getLogger(__name__)
+
+root_dir = Path(__file__).parent.parent
+
+# Artifact name -> environment variable overriding its config.yaml ai_model path
+ARTIFACT_ENV = {
+    'model': 'MODEL_PATH',
+    'scaler': 'SCALER_PATH',
+    'cluster_model': 'CLUSTER_MODEL_PATH'
+}
+
+
+def artifact_paths(config_path: str = DEFAULT_CONFIG_PATH, **overrides) -> Dict[str, str]:
+    """Absolute artifact paths: keyword override, then environment, then config.yaml ai_model.
+
+    Relative paths are resolved against the repository root, so entry points
+    work from any working directory.
+    """
+    model = get_settings(config_path).model
+    configured = {'model': model.model_path, 'scaler': model.scaler_path,
+                  'cluster_model': model.cluster_model_path}
+    paths = {}
+    for name, env in ARTIFACT_ENV.items():
+        path = overrides.get(name) or os.environ.get(env) or configured[name]
+        paths[name] = str(path if os.path.isabs(path) else root_dir / path)
+    return paths
+
+
+class ModelArtifacts:
+    """Loads each artifact on first access and keeps it (or None when unavailable).
+
+    joblib, and whatever the pickle pulls in (sklearn, pandas), is only
+    imported by the first load, so importing a module that holds a
+    ModelArtifacts stays cheap. warmup() loads everything up front.
+    """
+
+    def __init__(self, paths: Optional[Dict[str, str]] = None, config_path: str = DEFAULT_CONFIG_PATH):
+        self.paths = paths if paths is not None else artifact_paths(config_path)
+        self.loaded: Dict[str, object] = {}
+        self.load_seconds: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def get(self, name: str):
+        if name in self.loaded:
+            return self.loaded[name]
+        with self.lock:
+            if name not in self.loaded:
+                self.loaded[name] = self.load(name)
+        return self.loaded[name]
+
+    def set(self, name: str, value):
+        """Replace an artifact in memory (e.g. a freshly trained model)"""
+        with self.lock:
+            self.loaded[name] = value
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self.paths[name])
+
+    def load(self, name: str):
+        path = self.paths[name]
+        if not os.path.exists(path):
+            logger.warning(f"❌ {name} artifact not found at {path}")
+            return None
+        start = time.perf_counter()
+        try:
+            import joblib
+
+            artifact = joblib.load(path)
+        except Exception as e:
+            logger.error(f"Failed to load {name} artifact from {path}: {e}")
+            return None
+        self.load_seconds[name] = time.perf_counter() - start
+        logger.info(f"✅ Loaded {name} from {path} in {self.load_seconds[name] * 1000:.0f} ms")
+        return artifact
+
+    def warmup(self, names=None) -> Dict[str, bool]:
+        """Load the given (default: all) artifacts now; returns which ones are available"""
+        return {name: self.get(name) is not None for name in (names or self.paths)}
+
+
+def artifact_property(name: str) -> property:
+    """Attribute backed by the owner's `artifacts`, loaded on first read"""
+    return property(lambda self: self.artifacts.get(name),
+                    lambda self, value: self.artifacts.set(name, value))
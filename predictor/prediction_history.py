@@ -0,0 +1,90 @@
+"""
+Prediction History - Bounded per-service prediction history with running aggregates
+"""
+from collections import Counter, OrderedDict, deque
+from datetime import datetime
+from typing import Deque, Dict, List
+
+# Per-service histories kept, as a multiple of the largest fleet seen; churned services age out
+SERVICE_HEADROOM = 2
+
+
+class PredictionHistory:
+    """Recent predictions, fleet-wide and per service.
+
+    The fleet window is a bounded deque whose aggregates (counts by
+    model_used, failure count, confidence sum) are adjusted on every append
+    and eviction, so statistics never rescan the window. Each service also
+    keeps its own bounded deque, so a noisy service cannot evict another
+    service's history. Per-service histories are kept for the max_services
+    most recently predicted services only (LRU). Unless fixed by the caller,
+    max_services is sized from the fleet via reserve(), so every live service
+    keeps its history while services that left are eventually dropped.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_per_service: int = 100,
+                 max_services: int = None):
+        self.max_per_service = max_per_service
+        self.max_services = max_services
+        self.fixed_services = max_services is not None
+        self.entries: Deque[Dict] = deque(maxlen=max_entries)
+        self.by_service: 'OrderedDict[str, Deque[Dict]]' = OrderedDict()
+        self.model_counts = Counter()
+        self.failures = 0
+        self.confidence_sum = 0.0
+
+    def append(self, service_id: str, prediction: Dict, timestamp: datetime = None):
+        """Record one prediction"""
+        entry = {
+            'timestamp': timestamp or datetime.now(),
+            'service_id': service_id,
+            'prediction': prediction
+        }
+        if len(self.entries) == self.entries.maxlen:
+            self.account(self.entries[0]['prediction'], -1)
+        self.entries.append(entry)
+        self.account(prediction, 1)
+
+        service_entries = self.by_service.get(service_id)
+        if service_entries is None:
+            service_entries = self.by_service[service_id] = deque(maxlen=self.max_per_service)
+            if self.max_services is not None and len(self.by_service) > self.max_services:
+                self.by_service.popitem(last=False)  # Least recently predicted service
+        else:
+            self.by_service.move_to_end(service_id)
+        service_entries.append(entry)
+
+    def reserve(self, services: int):
+        """Size the per-service LRU for a fleet of `services`; only ever grows"""
+        if not self.fixed_services:
+            self.max_services = max(self.max_services or 0, SERVICE_HEADROOM * services)
+
+    def account(self, prediction: Dict, sign: int):
+        """Add (sign=1) or remove (sign=-1) a prediction from the aggregates"""
+        self.model_counts[prediction.get('model_used', 'none')] += sign
+        self.failures += sign * bool(prediction.get('will_fail'))
+        self.confidence_sum += sign * prediction.get('confidence', 0.0)
+
+    def get(self, service_id: str = None) -> List[Dict]:
+        """History for one service, or the fleet window"""
+        if service_id:
+            return list(self.by_service.get(service_id, ()))
+        return list(self.entries)
+
+    def get_stats(self) -> Dict:
+        """Aggregates over the fleet window"""
+        total = len(self.entries)
+        if not total:
+            return {}
+        return {
+            'total_predictions': total,
+            'failure_predictions': self.failures,
+            'failure_rate_percentage': self.failures / total * 100,
+            'average_confidence': self.confidence_sum / total,
+            'ml_predictions': self.model_counts['ml'],
+            'rule_based_predictions': self.model_counts['rule_based'],
+            'baseline_predictions': self.model_counts['baseline']
+        }
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,4 +1,4 @@
-import requests
+import argparse
 import time
 import random
 
@@ -14,21 +14,35 @@ def generate_metrics():
         "latency": round(random.uniform(10, 200), 2)
     }
 
-while True:
-    metrics = generate_metrics()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forward ML cluster predictions to the backend")
+    parser.add_argument('--model-url', default=MODEL_URL)
+    parser.add_argument('--backend-url', default=BACKEND_URL)
+    parser.add_argument('--interval', type=float, default=10.0)
+    args = parser.parse_args(argv)
 
-    # 1️⃣ Send real metrics to ML model
-    ml_response = requests.post(MODEL_URL, json=metrics).json()
-    cluster = ml_response["cluster"]
+    # One pooled connection per host instead of a new TCP handshake every tick
+    import requests
+    session = requests.Session()
 
-    # 2️⃣ Forward prediction to backend
-    payload = {
-        "serviceName": "backend",
-        "cluster": cluster,
-        "metrics": metrics
-    }
+    while True:
+        metrics = generate_metrics()
+
+        # 1️⃣ Send real metrics to ML model
+        ml_response = session.post(args.model_url, json=metrics).json()
+        cluster = ml_response["cluster"]
+
+        # 2️⃣ Forward prediction to backend
+        payload = {
+            "serviceName": "backend",
+            "cluster": cluster,
+            "metrics": metrics
+        }
+
+        print(f"📤 Predicted cluster {cluster}, sending to backend...")
+        session.post(args.backend_url, json=payload)
 
-    print(f"📤 Predicted cluster {cluster}, sending to backend...")
-    requests.post(BACKEND_URL, json=payload)
+        time.sleep(args.interval)
 
-    time.sleep(10)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Rule Engine - Declarative failure and cluster rules compiled to vectorized masks
+"""
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from config.settings import DEFAULT_CONFIG_PATH, DEFAULT_CRITICAL_THRESHOLDS, Settings, watcher
+
+logger = logging.getLogger(__name__)
+
+# Pseudo-column rules can use to test the model's failure probability
+PROBABILITY = 'probability'
+
+# Used when config.yaml has no prediction_rules block (same as the old if/elif chains)
+DEFAULT_RULES = {
+    'failure': [
+        {'metric': 'cpu_usage_percent', 'above': 'cpu', 'probability': 0.85},
+        {'metric': 'memory_usage_percent', 'above': 'memory', 'probability': 0.80},
+        {'metric': 'error_rate', 'above': 0.2, 'probability': 0.75},
+        {'metric': 'energy_consumption_watts', 'above': 'energy', 'probability': 0.70}
+    ],
+    'clusters': [
+        {'cluster': 1, 'any': [{'metric': 'cpu_usage_percent', 'above': 90},
+                               {'metric': 'memory_usage_percent', 'above': 90}]},
+        {'cluster': 2, 'metric': 'energy_consumption_watts', 'above': 200},
+        {'cluster': 3, 'metric': 'response_time_ms', 'above': 1000},
+        {'cluster': 4, 'metric': 'error_rate', 'above': 0.1},
+        {'cluster': 5, 'metric': PROBABILITY, 'above': 0.5}
+    ]
+}
+
+
+class CompiledRules:
+    """An ordered rule list flattened into condition arrays.
+
+    Every condition of every rule is one column test (value > threshold or
+    value < threshold), so a whole fleet is tested with a single comparison
+    over the gathered (service x condition) matrix. Conditions are then
+    OR-ed per rule and the first matching rule wins.
+    """
+
+    def __init__(self, rules: List[Dict], columns: List[str], critical: Dict[str, float]):
+        index = {name: i for i, name in enumerate(columns + [PROBABILITY])}
+        self.rules = rules
+        cols, thresholds, signs, starts = [], [], [], []
+        for rule in rules:
+            starts.append(len(cols))
+            for condition in rule.get('any') or [rule]:
+                metric = condition['metric']
+                if metric not in index:
+                    raise ValueError(f"Unknown metric in rule: {metric}")
+                above, below = condition.get('above'), condition.get('below')
+                if (above is None) == (below is None):
+                    raise ValueError(f"Rule on {metric} needs exactly one of above/below")
+                threshold = above if above is not None else below
+                if isinstance(threshold, str):
+                    threshold = critical[threshold]
+                # x > t  <=>  sign * x > sign * t, with sign -1 turning it into x < t
+                sign = 1.0 if above is not None else -1.0
+                cols.append(index[metric])
+                thresholds.append(sign * float(threshold))
+                signs.append(sign)
+        self.columns = np.array(cols, dtype=np.int64)
+        self.thresholds = np.array(thresholds)
+        self.signs = np.array(signs)
+        self.starts = np.array(starts, dtype=np.int64)
+
+    def first_match(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Index of the first matching rule per row, and whether any matched"""
+        n = len(values)
+        if not len(self.rules):
+            return np.zeros(n, dtype=np.int64), np.zeros(n, dtype=bool)
+        hits = values[:, self.columns] * self.signs > self.thresholds
+        matched = np.logical_or.reduceat(hits, self.starts, axis=1)
+        first = matched.argmax(axis=1)
+        return first, matched[np.arange(n), first]
+
+
+class RuleEngine:
+    """Failure and cluster rules from config.yaml, recompiled when the settings reload"""
+
+    def __init__(self, columns: List[str], config_path: str = DEFAULT_CONFIG_PATH):
+        self.columns = list(columns)
+        if not self.compile(DEFAULT_RULES, DEFAULT_CRITICAL_THRESHOLDS):
+            self.compile({}, DEFAULT_CRITICAL_THRESHOLDS)
+        self.apply_settings(watcher(config_path).subscribe(self.apply_settings))
+
+    def compile(self, rules: Dict, critical: Dict[str, float]):
+        """Compile a rules block; keeps the current rules if it is invalid"""
+        try:
+            failure = CompiledRules(rules.get('failure', []), self.columns, critical)
+            clusters = CompiledRules(rules.get('clusters', []), self.columns, critical)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.error(f"❌ Invalid prediction rules, keeping previous set: {e!r}")
+            return False
+        self.failure = failure
+        self.failure_probability = np.array([float(r['probability']) for r in failure.rules])
+        self.clusters = clusters
+        self.cluster_ids = np.array([int(r['cluster']) for r in clusters.rules], dtype=np.int64)
+        return True
+
+    def apply_settings(self, settings: Settings):
+        """Recompile from reloaded settings; an invalid rules block keeps the previous rules"""
+        # Named thresholds come from the validated monitoring.alerting.critical_thresholds
+        rules = settings.raw.get('prediction_rules') or DEFAULT_RULES
+        if self.compile(rules, settings.monitoring.critical_thresholds):
+            logger.info(f"📐 Prediction rules loaded: {len(self.failure.rules)} failure, "
+                        f"{len(self.clusters.rules)} cluster")
+
+    def with_probability(self, values: np.ndarray, probability) -> np.ndarray:
+        """Append the probability pseudo-column to a (service x feature) matrix"""
+        probability = np.broadcast_to(np.asarray(probability, dtype=float), (len(values),))
+        return np.column_stack([values, probability])
+
+    def predict(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Label a (service x feature) matrix: (will_fail, probability, cluster)"""
+        first, matched = self.failure.first_match(self.with_probability(values, 0.0))
+        probability = (np.where(matched, self.failure_probability[first], 0.0)
+                       if len(self.failure_probability) else np.zeros(len(values)))
+        return matched, probability, self.cluster(values, probability)
+
+    def cluster(self, values: np.ndarray, probability) -> np.ndarray:
+        """Failure cluster per row; 0 when no cluster rule matches"""
+        first, matched = self.clusters.first_match(self.with_probability(values, probability))
+        if not len(self.cluster_ids):
+            return np.zeros(len(values), dtype=np.int64)
+        return np.where(matched, self.cluster_ids[first], 0)